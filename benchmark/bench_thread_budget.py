@@ -0,0 +1,194 @@
+"""
+CPU线程预算对比：N 路 DetectionThread 同时运行，分别用各库默认线程数和 resource_budget 分配的线程数，比较检测帧率和线程数
+
+每种设置在单独的子进程中运行（torch/OpenCV 的线程设置是进程级的，且 inter-op 线程只能设置一次）。
+检测器：
+- 有 ultralytics 和模型文件时用真实模型（LeanDetector，与检测时一致）
+- 否则用 OpenCV 计算负载代替推理（letterbox + 大核滤波，由OpenCV线程池并行），只能反映OpenCV线程的影响
+
+用法：
+    python -m benchmark.bench_thread_budget --streams 8 --duration 20
+    python -m benchmark.bench_thread_budget --streams 4,8 --model model/best.pt --variant int8 --affinity
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from benchmark.run_benchmark import CACHE_DIR, RESULTS_DIR, SYNTHETIC_VIDEOS
+
+MODES = ("default", "budget")
+DEFAULT_MODEL = os.path.join(os.path.dirname(BENCH_DIR), "model", "best.pt")
+
+
+class Cv2Workload:
+    """没有模型时代替推理的OpenCV计算负载（每次约相当于一次小模型推理的计算量），不返回检测框"""
+
+    def __init__(self, imgsz=640, passes=4):
+        from controller.letterbox import Letterbox
+        self.letterbox = Letterbox(imgsz)
+        self.passes = passes
+
+    def detect_bare(self, frame, conf):
+        import cv2
+        import numpy as np
+        image = self.letterbox(frame)[0].transpose(1, 2, 0)
+        for _ in range(self.passes):
+            image = cv2.GaussianBlur(image, (31, 31), 0)
+        return np.zeros((0, 5), dtype=np.float32)
+
+
+def _thread_count():
+    """当前进程的线程数（含各库的工作线程）"""
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().num_threads()
+    except ImportError:
+        return threading.active_count()
+
+
+def _make_detector(args):
+    if args.model and os.path.exists(args.model):
+        try:
+            from controller.offline_detector import load_detector
+            return load_detector(args.model, args.variant, "cpu", args.imgsz), "model"
+        except ImportError:
+            pass
+    return Cv2Workload(args.imgsz), "cv2"
+
+
+def run_child(args):
+    """子进程：按 args.child 的设置运行 N 路检测线程，输出一行JSON"""
+    from PyQt6.QtCore import QCoreApplication
+
+    from benchmark.synthetic_video import generate_video
+    from controller.main_controller import DetectionThread
+    from controller.resource_budget import apply_process_limits, plan_budget
+    from model.db import VideoSource
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)  # noqa: F841
+    n = args.streams[0]
+    plan = None
+    if args.child == "budget":
+        plan = plan_budget(n, cores=args.cores, affinity=args.affinity)
+        apply_process_limits(plan)
+
+    threads = []
+    kind = None
+    for i in range(n):
+        name, xml_path = SYNTHETIC_VIDEOS[i % len(SYNTHETIC_VIDEOS)]
+        path = generate_video(os.path.join(CACHE_DIR, name), xml_path, seconds=args.video_seconds)
+        source = VideoSource(id=950000 + i, name=f"budget{i}", path=path, is_true=True, is_valid=True,
+                             scene_id=0, type=1)
+        detector, kind = _make_detector(args)
+        threads.append(DetectionThread(source, None, 1, model=detector, resource_plan=plan))
+
+    for thread in threads:
+        thread.start()
+    time.sleep(args.warmup)
+    proc0 = [t.metrics.frames_processed.value for t in threads]
+    cpu0 = time.process_time()
+    t0 = time.perf_counter()
+    samples = []
+    while time.perf_counter() - t0 < args.duration:
+        time.sleep(0.5)
+        samples.append(_thread_count())
+    elapsed = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    proc = [t.metrics.frames_processed.value - p for t, p in zip(threads, proc0)]
+    for thread in threads:
+        thread.stop()
+
+    print(json.dumps({
+        "mode": args.child,
+        "detector": kind,
+        "streams": n,
+        "processed_fps_total": round(sum(proc) / elapsed, 2),
+        "processed_fps_min": round(min(proc) / elapsed, 2),
+        "cpu_seconds_per_frame": round(cpu / max(1, sum(proc)), 4),
+        "threads_max": max(samples) if samples else None,
+        "plan": plan.describe() if plan else None,
+    }, ensure_ascii=False))
+
+
+def _run_mode(mode, n, args):
+    cmd = [sys.executable, "-m", "benchmark.bench_thread_budget", "--child", mode, "--streams", str(n),
+           "--duration", str(args.duration), "--warmup", str(args.warmup), "--video_seconds", str(args.video_seconds),
+           "--imgsz", str(args.imgsz), "--variant", args.variant, "--model", args.model or ""]
+    if args.cores:
+        cmd += ["--cores", str(args.cores)]
+    if args.affinity:
+        cmd.append("--affinity")
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    proc = subprocess.run(cmd, cwd=os.path.dirname(BENCH_DIR), env=env, capture_output=True, text=True,
+                          encoding="utf-8")
+    if proc.returncode != 0:
+        raise RuntimeError(f"{mode} {n}路 运行失败:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CPU线程预算对比（默认线程数 vs 按预算分配）')
+    parser.add_argument('--streams', type=lambda s: [int(x) for x in s.split(",")], default=[4, 8],
+                        help='并发路数，逗号分隔')
+    parser.add_argument('--duration', type=float, default=15.0, help='每种设置的测量时长(秒)')
+    parser.add_argument('--warmup', type=float, default=3.0, help='预热时长(秒)')
+    parser.add_argument('--video_seconds', type=float, default=60.0, help='合成视频时长(秒)')
+    parser.add_argument('--model', type=str, default=DEFAULT_MODEL, help='模型文件，不存在或没有ultralytics时用OpenCV负载')
+    parser.add_argument('--variant', type=str, default='fp32', help='模型精度变体')
+    parser.add_argument('--imgsz', type=int, default=640, help='推理分辨率')
+    parser.add_argument('--cores', type=int, default=None, help='CPU预算核数，默认全部可用核')
+    parser.add_argument('--affinity', action='store_true', help='按预算绑核')
+    parser.add_argument('--out', type=str, default=os.path.join(RESULTS_DIR, "thread_budget.json"), help='结果输出路径')
+    parser.add_argument('--child', type=str, default=None, choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    rows = []
+    for n in args.streams:
+        for mode in MODES:
+            print(f"{n}路 {mode} ...")
+            rows.append(_run_mode(mode, n, args))
+
+    print(f"\n{'路数':>4} {'设置':>8} {'检测fps合计':>12} {'最低fps/路':>10} {'CPU秒/帧':>9} {'线程数':>6}")
+    for row in rows:
+        print(f"{row['streams']:>4} {row['mode']:>8} {row['processed_fps_total']:>12} {row['processed_fps_min']:>10} "
+              f"{row['cpu_seconds_per_frame']:>9} {row['threads_max']:>6}")
+    for row in rows:
+        if row["plan"]:
+            print(f"{row['streams']}路: {row['plan']}")
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "detector": rows[0]["detector"] if rows else None,
+            "duration": args.duration,
+        },
+        "rows": rows,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+区域判断基准测试：每个框的判断耗时随区域数量的变化（线性扫描 vs 网格索引）
+
+区域按密集工位的方式随机生成（矩形与多边形混合，平铺在整个画面），
+检测框为手部大小的随机框。网格索引的每框耗时应基本不随区域数量增长。
+
+用法：
+    python -m benchmark.bench_zone_index
+    python -m benchmark.bench_zone_index --zones 10,50,100,400 --boxes 20000 --out benchmark/results/zone_index.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+import numpy as np
+
+from controller.zones import ZoneSet, _rect_points
+
+SRC_SIZE = (1860, 1080)
+FRAME_SIZE = (930, 540)
+
+
+def make_zones(n, seed=0):
+    """在标注分辨率下生成 n 个工位区域，按网格平铺并随机抖动，三分之一为多边形"""
+    rng = np.random.default_rng(seed)
+    cols = int(np.ceil(np.sqrt(n * SRC_SIZE[0] / SRC_SIZE[1])))
+    rows = int(np.ceil(n / cols))
+    cw, ch = SRC_SIZE[0] / cols, SRC_SIZE[1] / rows
+    zones = []
+    for i in range(n):
+        r, c = divmod(i, cols)
+        x1 = c * cw + rng.uniform(0, cw * 0.1)
+        y1 = r * ch + rng.uniform(0, ch * 0.1)
+        x2 = (c + 1) * cw - rng.uniform(0, cw * 0.1)
+        y2 = (r + 1) * ch - rng.uniform(0, ch * 0.1)
+        if i % 3 == 0:
+            points = np.array([[x1, y1], [x2, y1 + (y2 - y1) * 0.3], [x2, y2], [x1 + (x2 - x1) * 0.2, y2]],
+                              dtype=np.float32)
+            zones.append((points, False))
+        else:
+            zones.append((_rect_points(x1, y1, x2, y2), True))
+    return zones
+
+
+def make_boxes(n, seed=1):
+    rng = np.random.default_rng(seed)
+    x1 = rng.uniform(0, FRAME_SIZE[0] - 40, n)
+    y1 = rng.uniform(0, FRAME_SIZE[1] - 40, n)
+    w = rng.uniform(8, 40, n)
+    h = rng.uniform(8, 40, n)
+    return np.stack([x1, y1, x1 + w, y1 + h], axis=1).tolist()
+
+
+def linear_scan(zone_set, box):
+    """原来的做法：逐个区域判断"""
+    return [i for i in range(len(zone_set)) if zone_set.contains(i, box)]
+
+
+def time_per_box(func, zone_set, boxes, repeat=3):
+    """最快一轮的每框耗时（微秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for box in boxes:
+            func(zone_set, box)
+        best = min(best, time.perf_counter() - start)
+    return best / len(boxes) * 1e6
+
+
+def run(zone_counts, n_boxes):
+    boxes = make_boxes(n_boxes)
+    results = []
+    for n in zone_counts:
+        start = time.perf_counter()
+        zone_set = ZoneSet(make_zones(n), SRC_SIZE, FRAME_SIZE)
+        build_ms = (time.perf_counter() - start) * 1000
+        # 两种方式结果必须一致
+        for box in boxes[:500]:
+            assert zone_set.zones_containing(box) == linear_scan(zone_set, box)
+        results.append({
+            "zones": n,
+            "build_ms": round(build_ms, 3),
+            "linear_us": round(time_per_box(linear_scan, zone_set, boxes), 3),
+            "index_us": round(time_per_box(ZoneSet.zones_containing, zone_set, boxes), 3),
+            "avg_candidates": round(float(np.mean([len(zone_set.index.candidates(b)) for b in boxes])), 2),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='区域判断基准测试')
+    parser.add_argument('--zones', type=lambda s: [int(x) for x in s.split(",")], default=[1, 10, 25, 50, 100, 200],
+                        help='区域数量，逗号分隔')
+    parser.add_argument('--boxes', type=int, default=10000, help='每档测试的检测框数量')
+    parser.add_argument('--out', type=str, default=None, help='结果输出路径(JSON)')
+    args = parser.parse_args()
+
+    results = run(args.zones, args.boxes)
+    print(f"{'区域数':>6} {'构建(ms)':>10} {'线性扫描(us/框)':>16} {'网格索引(us/框)':>16} {'平均候选数':>10}")
+    for r in results:
+        print(f"{r['zones']:>6} {r['build_ms']:>10} {r['linear_us']:>16} {r['index_us']:>16} {r['avg_candidates']:>10}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "boxes": args.boxes, "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"结果已写入: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,414 @@
+"""
+本地摄像头模拟器：把录像按实时速率循环播放，作为本机 HTTP-MJPEG 实时流提供（可选推送RTSP），
+并按计划注入故障，用于离线测试 DetectionThread 的重连、节奏控制和多路扩展
+
+- 每路一个生产线程：按源视频帧率解码（单调时钟定速，读完从头循环），JPEG只压缩一次，所有客户端共用
+- 地址：http://127.0.0.1:<端口>/cam/<编号>（multipart/x-mixed-replace，OpenCV/FFmpeg 可直接打开）
+  http://127.0.0.1:<端口>/ 返回各路状态（JSON）
+- 故障（相对每路开始播放的时间，可按周期重复）：
+  disconnect  断开所有连接，持续期间拒绝新连接（503）
+  stall       连接保持但不再发送新帧
+  fps         帧率降到指定值，如 fps@90+30=5
+  resolution  输出分辨率改为指定值（切换时断开现有连接），如 resolution@120+30=960x540
+- RTSP：Python 没有可用的RTSP服务端，--rtsp 时每路用 ffmpeg 把同样的帧推送到外部RTSP服务器（如 mediamtx），
+  disconnect 时停止推流，分辨率变化时重启推流
+
+用法：
+    python -m benchmark.camera_farm --videos D:\\videos\\20250829_1.mp4 D:\\videos\\20250829_2.mp4 --count 8
+    python -m benchmark.camera_farm --synthetic --count 16 --faults "disconnect@30+5,stall@60+3,fps@90+30=5" --period 120
+    python -m benchmark.camera_farm --videos a.mp4 --rtsp rtsp://127.0.0.1:8554
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+import cv2
+
+from benchmark.synthetic_video import generate_video
+
+DEFAULT_PORT = 8090
+FAULT_KINDS = ("disconnect", "stall", "fps", "resolution")
+BOUNDARY = "camframe"
+
+_FAULT_SPEC = re.compile(r'^(\w+)@([\d.]+)\+([\d.]+)(?:=(.+))?$')
+
+
+@dataclass
+class Fault:
+    kind: str
+    start: float  # 开始时间（秒，相对该路开始播放）
+    duration: float
+    value: object = None  # fps: 帧率；resolution: (宽, 高)
+
+    def active(self, t):
+        return self.start <= t < self.start + self.duration
+
+
+def parse_faults(spec):
+    """
+    解析故障计划 "kind@开始+持续[=值],..."
+    例: "disconnect@30+5,stall@60+3,fps@90+30=5,resolution@120+30=960x540"
+    """
+    faults = []
+    for item in filter(None, (s.strip() for s in (spec or "").split(","))):
+        m = _FAULT_SPEC.match(item)
+        if not m or m.group(1) not in FAULT_KINDS:
+            raise ValueError(f"无法解析的故障: {item}")
+        kind, start, duration, value = m.group(1), float(m.group(2)), float(m.group(3)), m.group(4)
+        if kind == "fps":
+            value = float(value)
+        elif kind == "resolution":
+            w, h = value.lower().split("x")
+            value = (int(w), int(h))
+        faults.append(Fault(kind, start, duration, value))
+    return faults
+
+
+class SimulatedCamera:
+    """
+    Args:
+        cam_id: 编号（地址中的 /cam/<编号>）
+        path: 录像路径
+        faults: 故障计划
+        fault_period: 故障计划的重复周期（秒），None 表示只执行一次
+        offset: 故障时间的偏移（秒），多路错开故障
+        jpeg_quality: JPEG 质量
+    """
+
+    def __init__(self, cam_id, path, faults=(), fault_period=None, offset=0.0, jpeg_quality=80):
+        self.cam_id = cam_id
+        self.path = path
+        self.faults = list(faults)
+        self.fault_period = fault_period
+        self.offset = offset
+        self.jpeg_quality = jpeg_quality
+        self.frames_published = 0
+        self.clients = 0
+        self.disconnected = False  # 当前是否处于断开故障
+        self.generation = 0  # 每次断开加一，旧连接据此退出
+        self.on_frame = []  # 新帧回调 fn(帧)，在生产线程中调用（RTSP推流用）
+
+        self._cond = threading.Condition()
+        self._jpeg = None
+        self._seq = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._t0 = None
+        self._resolution = None  # 当前生效的分辨率故障
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"SimCamera-{self.cam_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def active_faults(self):
+        """当前生效的故障"""
+        if self._t0 is None:
+            return []
+        t = time.monotonic() - self._t0 - self.offset
+        if self.fault_period:
+            t %= self.fault_period
+        return [f for f in self.faults if f.active(t)]
+
+    def state(self):
+        return {"id": self.cam_id, "video": os.path.basename(self.path), "clients": self.clients,
+                "frames": self.frames_published, "faults": [f.kind for f in self.active_faults()]}
+
+    def attach(self):
+        with self._cond:
+            self.clients += 1
+
+    def detach(self):
+        with self._cond:
+            self.clients -= 1
+
+    def wait_frame(self, last_seq, timeout=1.0):
+        """等待比 last_seq 新的帧，返回 (序号, JPEG)；超时、断开或停止时返回 None"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != last_seq or self._stop.is_set(), timeout)
+            if self._stop.is_set() or self._seq == last_seq or self._jpeg is None:
+                return None
+            return self._seq, self._jpeg
+
+    def _run(self):
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            print(f"无法打开视频: {self.path}")
+            return
+        src_fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self._t0 = time.monotonic()
+        next_time = self._t0
+        last_publish = 0.0
+        try:
+            while not self._stop.is_set():
+                # 按源帧率定速（落后时不补帧，直接从当前时间继续）
+                now = time.monotonic()
+                if next_time > now:
+                    time.sleep(next_time - now)
+                next_time = max(next_time + 1.0 / src_fps, time.monotonic() - 1.0 / src_fps)
+
+                ret, frame = cap.read()
+                if not ret:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # 循环播放
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+
+                faults = {f.kind: f for f in self.active_faults()}
+                disconnected = "disconnect" in faults
+                resolution = faults["resolution"].value if "resolution" in faults else None
+                # 断开、分辨率切换时关闭现有连接（摄像头改配置后重启码流，客户端重连后拿到新尺寸）
+                if (disconnected and not self.disconnected) or resolution != self._resolution:
+                    with self._cond:
+                        self.generation += 1
+                        self._cond.notify_all()
+                self.disconnected = disconnected
+                self._resolution = resolution
+                if disconnected or "stall" in faults:
+                    continue
+                if "fps" in faults and time.monotonic() - last_publish < 1.0 / faults["fps"].value:
+                    continue
+                if resolution is not None:
+                    frame = cv2.resize(frame, resolution, interpolation=cv2.INTER_AREA)
+                last_publish = time.monotonic()
+                self._publish(frame)
+        finally:
+            cap.release()
+
+    def _publish(self, frame):
+        jpeg = None
+        if self.clients:
+            ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            jpeg = data.tobytes() if ok else None
+        for callback in self.on_frame:
+            callback(frame)
+        with self._cond:
+            self._jpeg = jpeg
+            self._seq += 1
+            self.frames_published += 1
+            self._cond.notify_all()
+
+
+class _FarmHandler(BaseHTTPRequestHandler):
+    farm = None  # 由 CameraFarm 设置
+
+    def do_GET(self):
+        m = re.match(r'^/cam/(\d+)/?$', self.path)
+        if self.path in ("/", "/status"):
+            body = json.dumps([c.state() for c in self.farm.cameras.values()], ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        camera = self.farm.cameras.get(int(m.group(1))) if m else None
+        if camera is None:
+            self.send_error(404)
+            return
+        if camera.disconnected:
+            self.send_error(503, "simulated disconnect")
+            return
+        self._stream(camera)
+
+    def _stream(self, camera):
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        generation = camera.generation
+        camera.attach()
+        seq = None
+        try:
+            while not self.farm.stopping and camera.generation == generation:
+                item = camera.wait_frame(seq)
+                if item is None:
+                    continue  # 卡顿故障：连接保持，不发送
+                seq, jpeg = item
+                if jpeg is None:
+                    continue  # 该帧发布时还没有客户端
+                self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                 f"Content-Length: {len(jpeg)}\r\n\r\n".encode("ascii"))
+                self.wfile.write(jpeg)
+                self.wfile.write(b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            camera.detach()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _RtspPublisher:
+    """用 ffmpeg 把一路的帧推送到外部RTSP服务器（断开故障时停止推流，分辨率变化时重启）"""
+
+    def __init__(self, camera, url, fps):
+        self.camera = camera
+        self.url = url
+        self.fps = fps
+        self._proc = None
+        self._size = None
+        camera.on_frame.append(self._on_frame)
+
+    def _on_frame(self, frame):
+        h, w = frame.shape[:2]
+        if self._proc is None or self._size != (w, h) or self._proc.poll() is not None:
+            self.close()
+            self._size = (w, h)
+            self._proc = subprocess.Popen(
+                ["ffmpeg", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{w}x{h}",
+                 "-r", str(self.fps), "-i", "-", "-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency",
+                 "-f", "rtsp", "-rtsp_transport", "tcp", self.url],
+                stdin=subprocess.PIPE)
+        try:
+            self._proc.stdin.write(frame.tobytes())
+        except (BrokenPipeError, OSError):
+            self.close()
+
+    def poll_disconnect(self):
+        if self.camera.disconnected:
+            self.close()
+
+    def close(self):
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+            except OSError:
+                pass
+            self._proc.terminate()
+            self._proc = None
+
+
+class CameraFarm:
+    """
+    多路模拟摄像头 + HTTP-MJPEG 服务
+    Args:
+        cameras: SimulatedCamera 列表
+        host / port: 监听地址（默认只监听本机）
+    """
+
+    def __init__(self, cameras, host="127.0.0.1", port=DEFAULT_PORT):
+        self.cameras = {c.cam_id: c for c in cameras}
+        self.host = host
+        self.port = port
+        self.stopping = False
+        self.publishers = []
+        handler = type("FarmHandler", (_FarmHandler,), {"farm": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]  # port=0 时为系统分配的端口
+        self._thread = None
+        self._monitor = None
+
+    def url(self, cam_id):
+        return f"http://{self.host}:{self.port}/cam/{cam_id}"
+
+    def enable_rtsp(self, base_url):
+        """每路推送到 <base_url>/cam<编号>，返回各路的RTSP地址"""
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("推送RTSP需要 ffmpeg（并需要外部RTSP服务器，如 mediamtx）")
+        urls = {}
+        for cam_id, camera in self.cameras.items():
+            cap = cv2.VideoCapture(camera.path)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+            cap.release()
+            urls[cam_id] = f"{base_url.rstrip('/')}/cam{cam_id}"
+            self.publishers.append(_RtspPublisher(camera, urls[cam_id], fps))
+        return urls
+
+    def start(self):
+        for camera in self.cameras.values():
+            camera.start()
+        self._thread = threading.Thread(target=self._server.serve_forever, name="CameraFarm", daemon=True)
+        self._thread.start()
+        if self.publishers:
+            self._monitor = threading.Thread(target=self._watch_publishers, name="CameraFarmRtsp", daemon=True)
+            self._monitor.start()
+        return self
+
+    def _watch_publishers(self):
+        while not self.stopping:
+            for publisher in self.publishers:
+                publisher.poll_disconnect()
+            time.sleep(0.2)
+
+    def stop(self):
+        self.stopping = True
+        self._server.shutdown()
+        self._server.server_close()
+        for camera in self.cameras.values():
+            camera.stop()
+        for publisher in self.publishers:
+            publisher.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def build_farm(videos, count, faults=(), fault_period=None, stagger=0.0, host="127.0.0.1", port=DEFAULT_PORT):
+    """count 路摄像头轮流使用 videos，第 i 路的故障时间错开 i * stagger 秒"""
+    cameras = [SimulatedCamera(i, videos[i % len(videos)], faults, fault_period, offset=i * stagger)
+               for i in range(count)]
+    return CameraFarm(cameras, host=host, port=port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地摄像头模拟器（HTTP-MJPEG，可选推送RTSP）')
+    parser.add_argument('--videos', type=str, nargs='*', default=[], help='循环播放的录像')
+    parser.add_argument('--synthetic', action='store_true', help='没有录像时使用合成视频')
+    parser.add_argument('--count', type=int, default=None, help='模拟的路数，默认与视频数相同')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='监听端口')
+    parser.add_argument('--faults', type=str, default='', help='故障计划，如 "disconnect@30+5,stall@60+3,fps@90+30=5"')
+    parser.add_argument('--period', type=float, default=None, help='故障计划的重复周期(秒)')
+    parser.add_argument('--stagger', type=float, default=0.0, help='各路故障时间错开的秒数')
+    parser.add_argument('--rtsp', type=str, default=None, help='同时推送到外部RTSP服务器，如 rtsp://127.0.0.1:8554')
+    parser.add_argument('--duration', type=float, default=0, help='运行时长(秒)，0表示直到 Ctrl+C')
+    args = parser.parse_args()
+
+    videos = list(args.videos)
+    if args.synthetic or not videos:
+        cache = os.path.join(BENCH_DIR, ".cache")
+        videos += [generate_video(os.path.join(cache, f"farm_20250829_{i}.mp4"), seconds=30, seed=i) for i in (1, 2)]
+    farm = build_farm(videos, args.count or len(videos), parse_faults(args.faults), args.period, args.stagger,
+                      args.host, args.port)
+    rtsp_urls = farm.enable_rtsp(args.rtsp) if args.rtsp else {}
+    with farm:
+        for cam_id in farm.cameras:
+            extra = f"  {rtsp_urls[cam_id]}" if cam_id in rtsp_urls else ""
+            print(f"cam {cam_id}: {farm.url(cam_id)}{extra}")
+        print(f"状态: http://{farm.host}:{farm.port}/")
+        try:
+            t_end = time.time() + args.duration if args.duration else None
+            while t_end is None or time.time() < t_end:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
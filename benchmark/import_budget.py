@@ -0,0 +1,167 @@
+"""
+导入耗时预算报告：用 python -X importtime 在独立进程中测量各入口的导入耗时，按模块/按包汇总并与预算对比
+
+入口（见 import_budget.json）：
+- startup    main.py 启动时导入的模块（窗口显示前），不允许出现 cv2/numpy/torch/ultralytics
+- detection  检测模块（后台预加载的内容），只看总耗时
+另外测量 window：从进程启动到主窗口显示（offscreen平台，临时数据库）的耗时
+
+每次增减依赖后运行一次，超出预算或启动路径出现禁止的模块时返回非0：
+    python -m benchmark.import_budget
+    python -m benchmark.import_budget --entry startup --top 30
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_BUDGET = os.path.join(BENCH_DIR, "import_budget.json")
+
+# 进程启动到主窗口显示，与 main.py 的顺序一致
+WINDOW_PROBE = """
+import time
+t0 = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+from controller.main_controller import MainController
+from view.main_window import MainWindow
+app = QApplication([])
+window = MainWindow()
+controller = MainController(window, db_path=DB_PATH, log_dir=LOG_DIR)
+window.show()
+app.processEvents()
+print(round((time.perf_counter() - t0) * 1000, 1))
+controller.cleanup()
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def parse_importtime(text):
+    """解析 -X importtime 的输出，返回 [(模块名, 自身耗时ms, 累计耗时ms, 嵌套层级)]"""
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:       338 |      33437 |   controller.metrics"，名称前每层缩进2个空格
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us) / 1000.0, int(cum_us) / 1000.0, depth))
+    return rows
+
+
+def measure_imports(statement, python=sys.executable):
+    """在新进程中执行导入语句，返回解析后的导入耗时列表"""
+    proc = subprocess.run([python, "-X", "importtime", "-c", statement], cwd=ROOT_DIR, env=_env(),
+                          stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True, encoding="utf-8")
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入失败: {statement}\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def measure_window(python=sys.executable):
+    """进程启动到主窗口显示的耗时(ms)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        probe = f"DB_PATH = {os.path.join(tmp, 'monitor.db')!r}\nLOG_DIR = {os.path.join(tmp, 'logs')!r}\n" + WINDOW_PROBE
+        proc = subprocess.run([python, "-c", probe], cwd=ROOT_DIR, env=_env(),
+                              capture_output=True, text=True, encoding="utf-8")
+    if proc.returncode != 0:
+        raise RuntimeError(f"启动窗口失败:\n{proc.stderr[-2000:]}")
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def summarize(rows):
+    """汇总：总耗时、按顶层包累加的自身耗时、已导入的模块集合"""
+    total = sum(cum for _, _, cum, depth in rows if depth == 0)
+    packages = {}
+    for name, self_ms, _, _ in rows:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0.0) + self_ms
+    return {
+        "total_ms": round(total, 1),
+        "packages": {k: round(v, 1) for k, v in sorted(packages.items(), key=lambda kv: -kv[1])},
+        "modules": {name for name, _, _, _ in rows},
+    }
+
+
+def check_entry(name, spec, rows):
+    """按预算检查一个入口，返回超出项的说明列表"""
+    summary = summarize(rows)
+    problems = []
+    max_ms = spec.get("max_ms")
+    if max_ms is not None and summary["total_ms"] > max_ms:
+        problems.append(f"{name}: 导入耗时 {summary['total_ms']:.0f}ms 超出预算 {max_ms}ms")
+    for module in spec.get("forbidden", []):
+        if module in summary["modules"]:
+            problems.append(f"{name}: 不应导入 {module}")
+    return problems
+
+
+def print_report(name, rows, top):
+    summary = summarize(rows)
+    print(f"\n=== {name}: 共 {summary['total_ms']:.0f}ms，{len(rows)} 个模块 ===")
+    print(f"{'包':<24}{'自身耗时(ms)':>14}")
+    for package, ms in list(summary["packages"].items())[:top]:
+        print(f"{package:<24}{ms:>14.1f}")
+    print(f"\n{'模块':<48}{'自身(ms)':>10}{'累计(ms)':>10}")
+    for module, self_ms, cum_ms, _ in sorted(rows, key=lambda r: -r[1])[:top]:
+        print(f"{module:<48}{self_ms:>10.1f}{cum_ms:>10.1f}")
+
+
+def run_budget(budget, entries=None, repeat=3, window=True, top=15, python=sys.executable):
+    """测量各入口（取repeat次中总耗时最小的一次，减少磁盘缓存的影响），返回 (报告, 超出项)"""
+    report, problems = {}, []
+    for name, spec in budget.get("entries", {}).items():
+        if entries and name not in entries:
+            continue
+        runs = [measure_imports(spec["statement"], python) for _ in range(repeat)]
+        rows = min(runs, key=lambda r: summarize(r)["total_ms"])
+        print_report(name, rows, top)
+        summary = summarize(rows)
+        report[name] = {"total_ms": summary["total_ms"], "packages": summary["packages"]}
+        problems += check_entry(name, spec, rows)
+    if window and budget.get("window_ms") is not None and (not entries or "window" in entries):
+        window_ms = min(measure_window(python) for _ in range(repeat))
+        print(f"\n=== window: 启动到窗口显示 {window_ms:.0f}ms (预算 {budget['window_ms']}ms) ===")
+        report["window"] = {"total_ms": window_ms}
+        if window_ms > budget["window_ms"]:
+            problems.append(f"window: 启动到窗口显示 {window_ms:.0f}ms 超出预算 {budget['window_ms']}ms")
+    return report, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='导入耗时预算报告')
+    parser.add_argument('--budget', type=str, default=DEFAULT_BUDGET, help='预算文件')
+    parser.add_argument('--entry', type=str, nargs='*', default=None, help='只测量这些入口(含window)')
+    parser.add_argument('--repeat', type=int, default=3, help='每个入口测量次数，取最小值')
+    parser.add_argument('--top', type=int, default=15, help='列出耗时最多的包/模块数量')
+    parser.add_argument('--no-window', action='store_true', help='不测量启动到窗口显示的耗时')
+    parser.add_argument('--out', type=str, default=None, help='报告JSON输出路径')
+    args = parser.parse_args()
+
+    with open(args.budget, "r", encoding="utf-8") as f:
+        budget = json.load(f)
+    report, problems = run_budget(budget, args.entry, args.repeat, not args.no_window, args.top)
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"报告已写入: {args.out}")
+    if problems:
+        print("\n超出预算:\n  " + "\n  ".join(problems))
+        sys.exit(1)
+    print("\n全部在预算内")
+
+
+if __name__ == "__main__":
+    main()
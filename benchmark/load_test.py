@@ -0,0 +1,294 @@
+"""
+端到端多路压力测试（含Qt界面，offscreen平台无窗口运行）
+
+每个档位（路数）：在临时 monitor.db 中登记 N 路视频源，启动 MainWindow + MainController，
+用桩模型代替YOLO，点击"开始检测"同样的流程（start_detection），预热后测量：
+- processed_fps   每路检测帧率（送入检测的帧）
+- displayed_fps   每路界面实际显示的帧率
+- read_fps        每路读取帧率
+- dropped         读取失败/丢弃的帧数，backlog 为送帧邮箱中等待界面显示的帧数，display_dropped 为界面来不及显示被覆盖的帧数
+- gui_latency     界面事件循环延迟（定时器实际触发时间与预期的差，p50/p99/max）
+- rss_growth      测量期间进程内存增长（MB/分钟）
+
+视频源：synthetic 为合成视频文件（本地文件类型）；farm 为 camera_farm 模拟的实时流（可注入故障）
+结果写入 benchmark/results/load_test.json，可保存基线并对比（与 run_benchmark 相同的方式）
+
+用法：
+    python -m benchmark.load_test                                   # 1,2,4,8,16,32,64 路
+    python -m benchmark.load_test --streams 1,4,16 --duration 20 --source farm --faults "disconnect@10+3"
+    python -m benchmark.load_test --save-baseline release_1.2
+    python -m benchmark.load_test --compare release_1.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QElapsedTimer, QEventLoop, QTimer
+from PyQt6.QtWidgets import QApplication
+
+from benchmark.camera_farm import build_farm, parse_faults
+from benchmark.run_benchmark import BASELINE_DIR, CACHE_DIR, RESULTS_DIR, SYNTHETIC_VIDEOS, compare
+from benchmark.stub_model import StubYOLO
+from benchmark.synthetic_video import generate_video
+from controller.main_controller import MainController
+from model.db import Database, VideoSource
+from view.main_window import MainWindow
+
+SOURCE_KINDS = ("synthetic", "farm")
+
+
+def _rss_bytes():
+    """当前进程常驻内存（字节），取不到时返回None"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _spin(seconds):
+    """运行Qt事件循环 seconds 秒"""
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+
+
+class LoopLatencyProbe:
+    """定时器每 interval_ms 触发一次，记录实际间隔比预期多出的时间（界面线程被占用的程度）"""
+
+    def __init__(self, interval_ms=20):
+        self.interval_ms = interval_ms
+        self.samples = []
+        self._clock = QElapsedTimer()
+        self._timer = QTimer()
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._tick)
+
+    def start(self):
+        self._clock.start()
+        self._timer.start()
+
+    def reset(self):
+        self.samples = []
+
+    def stop(self):
+        self._timer.stop()
+
+    def _tick(self):
+        elapsed = self._clock.restart()
+        self.samples.append(max(0, elapsed - self.interval_ms))
+
+    def stats(self):
+        if not self.samples:
+            return {"p50": None, "p99": None, "max": None}
+        ms = sorted(self.samples)
+        return {"p50": statistics.median(ms), "p99": ms[min(len(ms) - 1, int(len(ms) * 0.99))], "max": ms[-1]}
+
+
+def _prepare_db(db_path, sources):
+    """临时数据库：一个场景，全部视频源选中"""
+    db = Database(db_path)
+    db.add_scene("load_test")
+    scene_id = db.get_all_scenes()[0].id
+    for i, (path, kind) in enumerate(sources):
+        db.add_video_source(VideoSource(id=0, name=f"load{i}", path=path, is_true=True, is_valid=True,
+                                        scene_id=scene_id, type=kind, alert_email=""))  # 空邮箱：不发报警邮件
+    db.close()
+
+
+def _snapshot(controller):
+    return {vid: (t.metrics.frames_read.value, t.metrics.frames_processed.value, t.metrics.frames_dropped.value,
+                  t.metrics.reconnects.value, t.metrics.display_dropped.value)
+            for vid, t in controller.detection_threads.items()}
+
+
+def run_level(n_streams, args, videos):
+    """运行一个档位，返回测量结果"""
+    tmp = tempfile.mkdtemp(prefix="glove_load_")
+    farm = None
+    try:
+        if args.source == "farm":
+            farm = build_farm([path for path, _ in videos], n_streams, parse_faults(args.faults), args.period,
+                              port=0).start()
+            sources = [(farm.url(i), 2) for i in range(n_streams)]
+        else:
+            sources = [(videos[i % len(videos)][0], 1) for i in range(n_streams)]
+        db_path = os.path.join(tmp, "monitor.db")
+        _prepare_db(db_path, sources)
+
+        # 桩模型按视频选择区域（让一部分框落在区域内，覆盖报警逻辑）
+        xml_by_path = dict(videos)
+
+        def detector_factory(video):
+            return StubYOLO(seed=video.id, latency=args.latency, xml_path=xml_by_path.get(video.path, videos[0][1]))
+
+        window = MainWindow()
+        controller = MainController(window, db_path=db_path, detector_factory=detector_factory,
+                                    log_dir=os.path.join(tmp, "logs"))
+        window.controller = controller
+        window.show()
+
+        displayed = {}
+        controller.video_frame_updated.connect(lambda vid, img: displayed.__setitem__(vid, displayed.get(vid, 0) + 1))
+        probe = LoopLatencyProbe()
+        probe.start()
+
+        controller.start_detection()
+        _spin(args.warmup)
+
+        probe.reset()
+        before = _snapshot(controller)
+        shown_before = dict(displayed)
+        rss_before = _rss_bytes()
+        t0 = time.perf_counter()
+        _spin(args.duration)
+        elapsed = time.perf_counter() - t0
+        after = _snapshot(controller)
+        rss_after = _rss_bytes()
+        backlog = sum(max(0, t.metrics.queue_depth.value) for t in controller.detection_threads.values())
+        probe.stop()
+
+        controller.cleanup()
+        window.close()
+
+        per_stream = []
+        for vid, (read1, proc1, drop1, rec1, shown_drop1) in after.items():
+            read0, proc0, drop0, rec0, shown_drop0 = before.get(vid, (0, 0, 0, 0, 0))
+            per_stream.append({
+                "read_fps": (read1 - read0) / elapsed,
+                "processed_fps": (proc1 - proc0) / elapsed,
+                "displayed_fps": (displayed.get(vid, 0) - shown_before.get(vid, 0)) / elapsed,
+                "dropped": drop1 - drop0,
+                "reconnects": rec1 - rec0,
+                "display_dropped": shown_drop1 - shown_drop0,
+            })
+        latency = probe.stats()
+        growth = None
+        if rss_before is not None and rss_after is not None:
+            growth = round((rss_after - rss_before) / 2 ** 20 / (elapsed / 60), 2)
+        processed = [s["processed_fps"] for s in per_stream]
+        return {
+            "streams": n_streams,
+            "threads": len(per_stream),
+            "processed_fps_total": round(sum(processed), 2),
+            "processed_fps_per_stream": round(statistics.mean(processed), 2) if processed else 0.0,
+            "processed_fps_min": round(min(processed), 2) if processed else 0.0,
+            "displayed_fps_per_stream": round(statistics.mean(s["displayed_fps"] for s in per_stream), 2)
+            if per_stream else 0.0,
+            "read_fps_per_stream": round(statistics.mean(s["read_fps"] for s in per_stream), 2) if per_stream else 0.0,
+            "dropped": sum(s["dropped"] for s in per_stream),
+            "reconnects": sum(s["reconnects"] for s in per_stream),
+            "backlog": backlog,
+            "display_dropped": sum(s["display_dropped"] for s in per_stream),
+            "gui_latency_ms": latency,
+            "rss_mb": round(rss_after / 2 ** 20, 1) if rss_after is not None else None,
+            "rss_growth_mb_per_min": growth,
+        }
+    finally:
+        if farm is not None:
+            farm.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def run_all(args):
+    videos = [(generate_video(os.path.join(CACHE_DIR, name), xml_path, seconds=args.video_seconds), xml_path)
+              for name, xml_path in SYNTHETIC_VIDEOS]
+    curve = []
+    for n in args.streams:
+        print(f"{n} 路 ...")
+        curve.append(run_level(n, args, videos))
+
+    # 与 run_benchmark 相同的结果格式，便于保存基线和对比
+    results = {}
+    for level in curve:
+        n = level["streams"]
+        results[f"gui_{n}streams"] = {"unit": "fps", "better": "higher", "mean": level["processed_fps_total"]}
+        if level["gui_latency_ms"]["p99"] is not None:
+            results[f"gui_latency_{n}streams"] = {"unit": "ms", "better": "lower",
+                                                  "mean": level["gui_latency_ms"]["p99"]}
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "source": args.source,
+            "faults": args.faults,
+            "latency": args.latency,
+            "duration": args.duration,
+        },
+        "curve": curve,
+        "results": results,
+    }
+
+
+def print_curve(curve):
+    print(f"{'路数':>4} {'检测fps/路':>10} {'最低':>6} {'显示fps/路':>10} {'读取fps/路':>10} {'丢帧':>6} {'重连':>5} "
+          f"{'积压':>5} {'界面p99(ms)':>11} {'内存MB':>8} {'增长MB/分':>9}")
+    for c in curve:
+        print(f"{c['streams']:>4} {c['processed_fps_per_stream']:>10} {c['processed_fps_min']:>6} "
+              f"{c['displayed_fps_per_stream']:>10} {c['read_fps_per_stream']:>10} {c['dropped']:>6} "
+              f"{c['reconnects']:>5} {c['backlog']:>5} {str(c['gui_latency_ms']['p99']):>11} "
+              f"{str(c['rss_mb']):>8} {str(c['rss_growth_mb_per_min']):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端多路压力测试（含界面）')
+    parser.add_argument('--streams', type=lambda s: [int(x) for x in s.split(",")], default=[1, 2, 4, 8, 16, 32, 64],
+                        help='测试的路数，逗号分隔')
+    parser.add_argument('--source', type=str, default='synthetic', choices=SOURCE_KINDS, help='视频源类型')
+    parser.add_argument('--faults', type=str, default='', help='farm 源的故障计划（见 camera_farm.py）')
+    parser.add_argument('--period', type=float, default=None, help='故障计划的重复周期(秒)')
+    parser.add_argument('--latency', type=float, default=0.0, help='桩模型每次推理模拟的耗时(秒)')
+    parser.add_argument('--warmup', type=float, default=3.0, help='每个档位的预热时长(秒)')
+    parser.add_argument('--duration', type=float, default=10.0, help='每个档位的测量时长(秒)')
+    parser.add_argument('--video_seconds', type=float, default=60.0, help='合成视频时长(秒)，需大于预热+测量时长')
+    parser.add_argument('--out', type=str, default=os.path.join(RESULTS_DIR, "load_test.json"), help='结果输出路径')
+    parser.add_argument('--save-baseline', type=str, default=None, help='保存为基线的名称')
+    parser.add_argument('--compare', type=str, default=None, help='对比的基线名称')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='允许的退化比例')
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)  # noqa: F841
+    report = run_all(args)
+    print_curve(report["curve"])
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入: {args.out}")
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"load_{args.save_baseline}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存: {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"load_{args.compare}.json"), "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"性能退化: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
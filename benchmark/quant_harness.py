@@ -0,0 +1,197 @@
+"""
+量化模型变体对比：速度 vs 报警一致性（以fp32为基准）
+
+在现场录像上按检测间隔逐帧运行完整的 DetectorWorker（跟踪 + 区域 + 时间窗口报警），统计：
+- infer_fps      纯推理帧率（推理阶段耗时）
+- pipeline_fps   检测帧率（推理+后处理+绘制）
+- alerts         报警次数
+- alert_recall   fp32 的报警中，该变体在 ±tolerance 秒内同一区域也报警的比例
+- alert_precision 该变体的报警中，fp32 也有对应报警的比例
+- hit_agreement  每个检测帧上各区域"有人未戴手套"的判断与fp32完全一致的比例
+
+用法：
+    python -m benchmark.quant_harness --videos D:\\videos\\20250829_1.mp4 D:\\videos\\20250829_2.mp4
+    python -m benchmark.quant_harness --videos a.mp4 --variants fp32,int8 --device cpu --out benchmark/results/quant.json
+先用 python -m model.quantize 生成量化模型。
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+import cv2
+import numpy as np
+from PyQt6.QtCore import QCoreApplication
+
+from controller.alert_evaluator import ZoneAlertEvaluator
+from controller.detector_worker import DetectorWorker
+from controller.inference import LeanDetector
+from controller.metrics import MetricsRegistry, StreamMetrics
+from controller.model_loader import MODEL_VARIANTS, load_model
+from controller.view_registry import get_registry
+from model.quantize import DEFAULT_MODEL
+
+
+class _RecordingEvaluator(ZoneAlertEvaluator):
+    """记录每次采样的区域命中情况和触发的报警"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.samples = []  # [(ts, 区域命中, 触发区域)]
+
+    def observe(self, ts, area_hits):
+        triggered = super().observe(ts, area_hits)
+        self.samples.append((ts, np.asarray(area_hits, dtype=bool).copy(), triggered))
+        return triggered
+
+
+class _HarnessWorker(DetectorWorker):
+    def _create_alert_evaluator(self, n_areas):
+        return _RecordingEvaluator(n_areas,
+                                   window_seconds=self.ALERT_DANGER_SECONDS,
+                                   hit_ratio=self.ALERT_HIT_RATIO,
+                                   cooldown_seconds=self.ALERT_DISPLAY_SECONDS)
+
+
+def run_clip(detector, variant, video_path, interval, max_seconds):
+    """按 DetectionThread 的方式处理一个视频，返回采样记录和耗时"""
+    view_index = get_registry().resolve(video_path)
+    worker = _HarnessWorker(None, os.path.basename(video_path), view_index, None,
+                            stream_id=f"quant_{variant}", model=detector, record_clips=False)
+    worker.show_ui = False
+    # 每个视频单独的指标（全局 REGISTRY 中同名的指标会跨视频累计）
+    worker.metrics = StreamMetrics(worker.stream_id, MetricsRegistry())
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"无法打开视频: {video_path}")
+    frame_count = 0
+    elapsed = 0.0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            ts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            if max_seconds and ts > max_seconds:
+                break
+            frame_count += 1
+            if frame_count % interval == 0:
+                t0 = time.perf_counter()
+                worker.process_frame(frame, ts=ts)
+                elapsed += time.perf_counter() - t0
+            else:
+                worker.advance_tracks()
+    finally:
+        cap.release()
+
+    inference = worker.metrics.inference_seconds
+    return {
+        "samples": worker.alert_evaluator.samples,
+        "processed": inference.count,
+        "elapsed": elapsed,
+        "inference_sum": inference.sum,
+    }
+
+
+def _alert_events(samples):
+    return [(ts, area) for ts, _, triggered in samples for area in triggered]
+
+
+def _match_events(reference, candidate, tolerance):
+    """同一区域、时间差不超过 tolerance 的报警视为一致（一对一匹配），返回匹配数"""
+    used = set()
+    matched = 0
+    for ts, area in reference:
+        for j, (cts, carea) in enumerate(candidate):
+            if j not in used and carea == area and abs(cts - ts) <= tolerance:
+                used.add(j)
+                matched += 1
+                break
+    return matched
+
+
+def compare_to_reference(ref_clips, clips, tolerance):
+    ref_events, events = [], []
+    agree = total = 0
+    for ref, cur in zip(ref_clips, clips):
+        ref_events.append(_alert_events(ref["samples"]))
+        events.append(_alert_events(cur["samples"]))
+        # 同一视频、同一检测间隔，采样时间一一对应
+        for (_, ref_hits, _), (_, hits, _) in zip(ref["samples"], cur["samples"]):
+            agree += int(np.array_equal(ref_hits, hits))
+            total += 1
+    matched_ref = sum(_match_events(r, c, tolerance) for r, c in zip(ref_events, events))
+    n_ref = sum(len(r) for r in ref_events)
+    n_cur = sum(len(c) for c in events)
+    return {
+        "alert_recall": round(matched_ref / n_ref, 4) if n_ref else None,
+        "alert_precision": round(matched_ref / n_cur, 4) if n_cur else None,
+        "hit_agreement": round(agree / total, 4) if total else None,
+    }
+
+
+def run(args):
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)  # noqa: F841  信号需要Qt事件系统
+    results = {}
+    clips_by_variant = {}
+    for variant in args.variants:
+        loaded = load_model(args.model, variant=variant, device=args.device)
+        if loaded.variant != variant:
+            print(f"跳过 {variant}: {loaded.note}")
+            continue
+        print(f"{variant}: {os.path.basename(loaded.path)} ({loaded.device}) ...")
+        detector = LeanDetector.from_loaded(loaded)  # 与检测时相同的精简推理路径
+        clips = [run_clip(detector, variant, path, args.interval, args.max_seconds) for path in args.videos]
+        clips_by_variant[variant] = clips
+        processed = sum(c["processed"] for c in clips)
+        results[variant] = {
+            "model": os.path.basename(loaded.path),
+            "device": loaded.device,
+            "processed_frames": processed,
+            "infer_fps": round(processed / max(sum(c["inference_sum"] for c in clips), 1e-9), 2),
+            "pipeline_fps": round(processed / max(sum(c["elapsed"] for c in clips), 1e-9), 2),
+            "alerts": sum(len(_alert_events(c["samples"])) for c in clips),
+        }
+
+    reference = clips_by_variant.get("fp32")
+    for variant, clips in clips_by_variant.items():
+        if reference is not None:
+            results[variant].update(compare_to_reference(reference, clips, args.tolerance))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='量化模型变体速度与报警一致性对比')
+    parser.add_argument('--videos', type=str, nargs='+', required=True, help='现场录像')
+    parser.add_argument('--model', type=str, default=DEFAULT_MODEL, help='fp32 权重路径')
+    parser.add_argument('--variants', type=lambda s: s.split(","), default=list(MODEL_VARIANTS),
+                        help='对比的变体，逗号分隔（fp32为基准）')
+    parser.add_argument('--device', type=str, default=None, help='cuda/cpu，默认自动选择')
+    parser.add_argument('--interval', type=int, default=3, help='检测间隔（每隔几帧检测一次）')
+    parser.add_argument('--max_seconds', type=float, default=0, help='每个视频最多处理的时长(秒)，0表示全部')
+    parser.add_argument('--tolerance', type=float, default=1.0, help='报警时间允许的偏差(秒)')
+    parser.add_argument('--out', type=str, default=None, help='结果输出路径(JSON)')
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"{'变体':>6} {'推理fps':>9} {'检测fps':>9} {'报警数':>6} {'报警召回':>8} {'报警精确':>8} {'命中一致':>8}")
+    for variant, r in results.items():
+        print(f"{variant:>6} {r['infer_fps']:>9} {r['pipeline_fps']:>9} {r['alerts']:>6} "
+              f"{str(r.get('alert_recall')):>8} {str(r.get('alert_precision')):>8} {str(r.get('hit_agreement')):>8}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "videos": args.videos,
+                       "interval": args.interval, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+吞吐量基准测试（纯CPU可运行，使用合成视频和桩模型）
+
+测试项：
+- process_frame   DetectorWorker._process_frame（推理+区域判断+报警+绘制）
+- draw            DetectorWorker._draw_detections
+- qimage_handoff  BGR->RGB + QImage 构造 + 拷贝（与 process_frame 中发送给界面的代码一致）
+- loop_Nstreams   完整的 DetectionThread 循环，N 路同时运行时的读取/检测帧率
+
+用法：
+    python -m benchmark.run_benchmark                          # 运行并写入 benchmark/results/latest.json
+    python -m benchmark.run_benchmark --save-baseline cpu_box  # 同时保存为基线
+    python -m benchmark.run_benchmark --compare cpu_box        # 与基线对比，超过容差返回非0
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+import cv2
+from PyQt6.QtCore import QCoreApplication
+from PyQt6.QtGui import QImage
+
+from benchmark.stub_model import StubYOLO
+from benchmark.synthetic_video import generate_video, read_frames
+from controller.detector_worker import DetectorWorker
+from controller.main_controller import DetectionThread
+from model.db import VideoSource
+
+AREA_DIR = os.path.join(os.path.dirname(BENCH_DIR), "area")
+CACHE_DIR = os.path.join(BENCH_DIR, ".cache")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+
+# 合成视频: 文件名包含视角关键字，让 video_view_mapping 选中对应的区域文件
+SYNTHETIC_VIDEOS = [
+    ("bench_20250829_1.mp4", os.path.join(AREA_DIR, "0911_1_frame00000.xml")),
+    ("bench_20250829_2.mp4", os.path.join(AREA_DIR, "0911_2_frame00000.xml")),
+]
+
+
+def _timing_stats(samples):
+    """耗时样本（秒）-> 统计值（毫秒）"""
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "unit": "ms", "better": "lower",
+        "mean": round(statistics.mean(ms), 3),
+        "median": round(statistics.median(ms), 3),
+        "p90": round(ms[int(len(ms) * 0.9) - 1], 3),
+        "min": round(ms[0], 3),
+        "samples": len(ms),
+    }
+
+
+def _make_worker(xml_path, seed=0):
+    worker = DetectorWorker(None, "bench", 0, None, stream_id=f"bench_{seed}",
+                            model=StubYOLO(seed=seed, xml_path=xml_path))
+    worker.xml_paths = [xml_path, xml_path]
+    return worker
+
+
+def bench_process_frame(frames, xml_path):
+    worker = _make_worker(xml_path)
+    worker._process_frame(frames[0])  # 预热（首帧会加载区域）
+    samples = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        worker._process_frame(frame)
+        samples.append(time.perf_counter() - t0)
+    return _timing_stats(samples)
+
+
+def bench_draw(frames, xml_path):
+    worker = _make_worker(xml_path)
+    worker._process_frame(frames[0])
+    model = StubYOLO(seed=1, xml_path=xml_path)
+    samples = []
+    for frame in frames:
+        boxes = list(model(frame)[0].boxes.xyxy.cpu().numpy())
+        canvas = frame.copy()
+        t0 = time.perf_counter()
+        worker._draw_detections(canvas, boxes, boxes[:1])
+        samples.append(time.perf_counter() - t0)
+    return _timing_stats(samples)
+
+
+def bench_qimage_handoff(frames):
+    samples = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w, ch = rgb_frame.shape
+        q_img = QImage(rgb_frame.data, w, h, ch * w, QImage.Format.Format_RGB888)
+        q_img.copy()
+        samples.append(time.perf_counter() - t0)
+    return _timing_stats(samples)
+
+
+def bench_thread_loop(n_streams, duration, videos):
+    """N 路 DetectionThread 同时运行 duration 秒，统计读取帧率和检测帧率"""
+    interval = min(5, max(3, n_streams // 2))  # 与 MainController.start_detection 一致
+    threads = []
+    for i in range(n_streams):
+        path, xml_path = videos[i % len(videos)]
+        source = VideoSource(id=900000 + n_streams * 100 + i, name=f"bench{i}", path=path,
+                             is_true=True, is_valid=True, scene_id=0, type=1)
+        # 没有界面消费帧，画面留在送帧邮箱里（只保留最新一帧）
+        thread = DetectionThread(source, None, interval, model=StubYOLO(seed=i, xml_path=xml_path))
+        threads.append(thread)
+
+    for thread in threads:
+        thread.start()
+    time.sleep(2.0)  # 跳过首次连接的1秒等待和预热
+    read0 = [t.metrics.frames_read.value for t in threads]
+    proc0 = [t.metrics.frames_processed.value for t in threads]
+    t0 = time.perf_counter()
+    time.sleep(duration)
+    elapsed = time.perf_counter() - t0
+    read = [t.metrics.frames_read.value - r for t, r in zip(threads, read0)]
+    proc = [t.metrics.frames_processed.value - p for t, p in zip(threads, proc0)]
+    for thread in threads:
+        thread.stop()
+
+    return {
+        "unit": "fps", "better": "higher",
+        "mean": round(sum(proc) / elapsed, 2),  # 全部流合计检测帧率（用于对比）
+        "read_fps_total": round(sum(read) / elapsed, 2),
+        "read_fps_per_stream": round(sum(read) / elapsed / n_streams, 2),
+        "processed_fps_per_stream": round(sum(proc) / elapsed / n_streams, 2),
+        "interval": interval,
+        "streams": n_streams,
+    }
+
+
+def run_all(args):
+    videos = []
+    for name, xml_path in SYNTHETIC_VIDEOS:
+        path = generate_video(os.path.join(CACHE_DIR, name), xml_path, seconds=args.video_seconds)
+        videos.append((path, xml_path))
+    frames = read_frames(videos[0][0], limit=args.frames)
+
+    results = {}
+    print("process_frame ...")
+    results["process_frame"] = bench_process_frame(frames, videos[0][1])
+    print("draw ...")
+    results["draw"] = bench_draw(frames, videos[0][1])
+    print("qimage_handoff ...")
+    results["qimage_handoff"] = bench_qimage_handoff(frames)
+    for n in args.streams:
+        print(f"loop_{n}streams ...")
+        results[f"loop_{n}streams"] = bench_thread_loop(n, args.duration, videos)
+
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "frames": len(frames),
+            "duration": args.duration,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """
+    与基线对比
+    Returns:
+        list: 退化超过容差的测试项名称
+    """
+    regressions = []
+    print(f"{'测试项':<20}{'基线':>12}{'当前':>12}{'变化':>10}")
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:<20}{'-':>12}{cur['mean']:>12}{'新增':>10}")
+            continue
+        change = (cur["mean"] - base["mean"]) / base["mean"] if base["mean"] else 0.0
+        worse = change > tolerance if cur["better"] == "lower" else change < -tolerance
+        flag = "  <-- 退化" if worse else ""
+        print(f"{name:<20}{base['mean']:>12}{cur['mean']:>12}{change:>+10.1%}{flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='吞吐量基准测试')
+    parser.add_argument('--streams', type=lambda s: [int(x) for x in s.split(",")], default=[1, 4, 16],
+                        help='完整循环测试的并发路数，逗号分隔')
+    parser.add_argument('--duration', type=float, default=10.0, help='每个并发档位的测量时长(秒)')
+    parser.add_argument('--frames', type=int, default=200, help='单项测试使用的帧数')
+    parser.add_argument('--video_seconds', type=float, default=60.0,
+                        help='合成视频时长(秒)，需大于测量时长，避免文件读完后的重连等待计入结果')
+    parser.add_argument('--out', type=str, default=os.path.join(RESULTS_DIR, "latest.json"), help='结果输出路径')
+    parser.add_argument('--save-baseline', type=str, default=None, help='保存为基线的名称')
+    parser.add_argument('--compare', type=str, default=None, help='对比的基线名称')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='允许的退化比例')
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)  # 检测线程的信号需要Qt事件系统
+    report = run_all(args)
+    del app  # 测量期间保持引用
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入: {args.out}")
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存: {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json"), "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"性能退化: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
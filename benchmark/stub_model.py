@@ -0,0 +1,127 @@
+"""
+确定性桩模型：接口与 ultralytics YOLO 的调用方式及精简推理路径(detect_bare)一致，不依赖 torch/GPU
+每次调用按 (种子, 调用序号) 生成固定的检测框，部分 bare 框落在区域内以覆盖报警逻辑
+"""
+
+import random
+import time
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from controller.inference import resolve_class_id
+
+STUB_NAMES = {0: 'glove', 1: 'bare'}
+
+
+def load_xml_boxes(xml_path):
+    """读取VOC XML中的area框，返回 (原始宽, 原始高, [[x1, y1, x2, y2], ...])"""
+    root = ET.parse(xml_path).getroot()
+    size = root.find("size")
+    w = int(size.find("width").text)
+    h = int(size.find("height").text)
+    boxes = []
+    for obj in root.findall("object"):
+        if obj.find("name").text == "area":
+            b = obj.find("bndbox")
+            boxes.append([float(b.find(k).text) for k in ("xmin", "ymin", "xmax", "ymax")])
+    return w, h, boxes
+
+
+class _Array:
+    """模拟 torch.Tensor 的 .cpu().numpy()"""
+
+    def __init__(self, array):
+        self._array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._array
+
+    def __iter__(self):
+        return iter(self._array)
+
+    def __len__(self):
+        return len(self._array)
+
+
+class StubBoxes:
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = _Array(xyxy)
+        self.conf = _Array(conf)
+        self.cls = _Array(cls)
+
+
+class StubResult:
+    def __init__(self, boxes, names):
+        self.boxes = boxes
+        self.names = names
+
+
+class StubYOLO:
+    """
+    桩模型
+    Args:
+        seed: 随机种子，同一种子同一调用序号输出相同
+        latency: 每次调用额外消耗的时间（秒），用于模拟推理耗时，0表示不模拟
+        xml_path: 区域XML，bare框会有一部分放在这些区域内
+        boxes_per_frame: 每帧生成的框数量
+    """
+
+    names = STUB_NAMES
+
+    def __init__(self, seed=0, latency=0.0, xml_path=None, boxes_per_frame=4):
+        self.seed = seed
+        self.latency = latency
+        self.boxes_per_frame = boxes_per_frame
+        self.calls = 0
+        self.zones = load_xml_boxes(xml_path) if xml_path else None
+        self.bare_id = resolve_class_id(self.names)
+
+    def _make_boxes(self, w, h, index):
+        rng = random.Random(self.seed * 1000003 + index)
+        zones = []
+        if self.zones:
+            zw, zh, raw = self.zones
+            zones = [[x1 * w / zw, y1 * h / zh, x2 * w / zw, y2 * h / zh] for x1, y1, x2, y2 in raw]
+        xyxy, conf, cls = [], [], []
+        for _ in range(self.boxes_per_frame):
+            bw, bh = rng.uniform(40, 120), rng.uniform(40, 120)
+            if zones and rng.random() < 0.5:
+                # 放在某个区域内部
+                zx1, zy1, zx2, zy2 = rng.choice(zones)
+                x1 = rng.uniform(zx1, max(zx1, zx2 - bw))
+                y1 = rng.uniform(zy1, max(zy1, zy2 - bh))
+            else:
+                x1 = rng.uniform(0, w - bw)
+                y1 = rng.uniform(0, h - bh)
+            xyxy.append([x1, y1, min(w - 1, x1 + bw), min(h - 1, y1 + bh)])
+            conf.append(rng.uniform(0.5, 0.99))
+            cls.append(1 if rng.random() < 0.7 else 0)
+        return (np.array(xyxy, dtype=np.float32).reshape(-1, 4),
+                np.array(conf, dtype=np.float32),
+                np.array(cls, dtype=np.float32))
+
+    def __call__(self, frame, conf=0.25, verbose=False, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        h, w = frame.shape[:2]
+        xyxy, scores, cls = self._make_boxes(w, h, self.calls)
+        self.calls += 1
+        keep = scores >= conf
+        return [StubResult(StubBoxes(xyxy[keep], scores[keep], cls[keep]), self.names)]
+
+    def detect_bare(self, frame, conf):
+        """与 controller.inference.LeanDetector 相同的接口：返回 bare 框 (N, 5) float32 [x1, y1, x2, y2, score]"""
+        if self.latency:
+            time.sleep(self.latency)
+        h, w = frame.shape[:2]
+        xyxy, scores, cls = self._make_boxes(w, h, self.calls)
+        self.calls += 1
+        keep = (scores >= conf) & (cls == self.bare_id)
+        return np.concatenate([xyxy[keep], scores[keep, None]], axis=1).astype(np.float32)
+
+    def detect_bare_batch(self, frames, conf):
+        return [self.detect_bare(frame, conf) for frame in frames]
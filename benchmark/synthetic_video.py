@@ -0,0 +1,60 @@
+"""
+生成基准测试用的合成视频：与现场一致的分辨率，画面中画出XML中的区域并有移动的色块
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+from benchmark.stub_model import load_xml_boxes
+
+
+def generate_video(path, xml_path=None, width=1860, height=1080, fps=25, seconds=60, seed=0):
+    """
+    生成合成视频（已存在则直接返回）
+    Returns:
+        str: 视频路径
+    """
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    # 固定背景纹理，让编码器有真实的工作量
+    background = rng.integers(40, 200, size=(height // 8, width // 8, 3), dtype=np.uint8)
+    background = cv2.resize(background, (width, height), interpolation=cv2.INTER_LINEAR)
+    if xml_path:
+        zw, zh, boxes = load_xml_boxes(xml_path)
+        for x1, y1, x2, y2 in boxes:
+            cv2.rectangle(background,
+                          (int(x1 * width / zw), int(y1 * height / zh)),
+                          (int(x2 * width / zw), int(y2 * height / zh)), (0, 200, 200), 3)
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise Exception(f"无法打开视频写入器: {path}")
+    blobs = rng.uniform([0, 0, -12, -12], [width, height, 12, 12], size=(6, 4))
+    for _ in range(int(fps * seconds)):
+        frame = background.copy()
+        for blob in blobs:
+            blob[0] = (blob[0] + blob[2]) % width
+            blob[1] = (blob[1] + blob[3]) % height
+            x, y = int(blob[0]), int(blob[1])
+            cv2.rectangle(frame, (x, y), (x + 90, y + 90), (180, 120, 90), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def read_frames(path, limit=None):
+    """把视频解码到内存（用于不含解码开销的单项测试）"""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while limit is None or len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
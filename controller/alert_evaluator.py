@@ -0,0 +1,176 @@
+"""
+基于时间的分区域报警判断（与采样间隔无关）
+- 每个视频源一个实例，每个区域一个滑动时间窗口
+- 所有区域共用一个时间戳环形数组，命中情况存为 (容量, 区域数) 的uint8数组
+- 某区域在最近 window_seconds 秒内的采样中，命中比例达到 hit_ratio 即触发报警
+  （危险从无到有时，约持续 window_seconds * hit_ratio 秒后触发）
+- 触发后该区域冷却 cooldown_seconds 秒，冷却结束后需要重新积累满一个窗口才会再次报警
+
+AlertAnalyzer 是完整的报警流程（跟踪 -> 区域判断 -> 时间窗口报警，同一轨迹只报一次），
+界面检测（DetectorWorker）、离线检测和服务模式都用它，报警参数也只在这里定义
+"""
+
+import os
+
+import numpy as np
+
+from controller.tracker import ByteTracker
+from controller.zones import ZoneSet, load_zone_set
+
+ALERT_DANGER_SECONDS = 1.5  # 危险持续多少秒才触发报警（原10个采样帧，按3~5帧间隔、25fps约1.2~2秒）
+ALERT_HIT_RATIO = 0.8  # 窗口内命中采样的最低比例，容忍偶发漏检
+ALERT_COOLDOWN_SECONDS = 5  # 同一区域的报警冷却时间（秒），界面上同时作为报警显示时间
+
+
+class ZoneAlertEvaluator:
+    """
+    Args:
+        n_areas: 区域数量
+        window_seconds: 危险需要持续的时间（秒）
+        hit_ratio: 窗口内命中采样的最低比例（容忍偶发漏检）
+        cooldown_seconds: 报警后该区域的冷却时间（秒）
+        min_samples: 窗口内最少采样数，避免采样太稀时凭一两帧报警
+        capacity: 环形数组容量，需大于窗口内可能的最多采样数
+    """
+
+    def __init__(self, n_areas, window_seconds=1.5, hit_ratio=0.8, cooldown_seconds=5.0,
+                 min_samples=3, capacity=128):
+        self.n_areas = n_areas
+        self.window_seconds = window_seconds
+        self.hit_ratio = hit_ratio
+        self.cooldown_seconds = cooldown_seconds
+        self.min_samples = min_samples
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        """清空历史（视频重新开始、区域重新加载时调用）"""
+        self._ts = np.full(self.capacity, -np.inf)
+        self._hits = np.zeros((self.capacity, self.n_areas), dtype=np.uint8)
+        self._head = 0  # 下一个写入位置
+        self._count = 0
+        self._cooldown_until = np.full(self.n_areas, -np.inf)  # 各区域冷却结束时间
+        self._last_ts = -np.inf
+
+    def observe(self, ts, area_hits):
+        """
+        记录一次采样并判断报警
+        Args:
+            ts: 采样时间戳（秒）。本地视频用视频内时间，实时流用系统时间
+            area_hits: 长度为 n_areas 的布尔数组，各区域本次是否有人未戴手套
+        Returns:
+            list: 本次新触发报警的区域索引
+        """
+        if ts < self._last_ts:
+            self.reset()  # 时间倒退（本地视频循环播放/重连）
+        self._last_ts = ts
+
+        self._ts[self._head] = ts
+        self._hits[self._head] = area_hits
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+        hits_now = np.asarray(area_hits, dtype=bool)
+        if not hits_now.any():
+            return []
+
+        window_start = ts - self.window_seconds
+        # 历史还不够一个窗口时不判断（环形数组已满说明采样足够密，不再要求覆盖整个窗口）
+        if self._count < self.capacity and self._ts[0] > window_start:
+            return []
+
+        in_window = self._ts >= window_start
+        samples = int(in_window.sum())
+        if samples < self.min_samples:
+            return []
+        ratio = self._hits[in_window].sum(axis=0) / samples
+
+        # 冷却结束时刻必须早于窗口起点，保证冷却后重新积累满一个窗口
+        ready = self._cooldown_until <= window_start
+        triggered = np.flatnonzero(hits_now & ready & (ratio >= self.hit_ratio))
+        self._cooldown_until[triggered] = ts + self.cooldown_seconds
+        return triggered.tolist()
+
+    def pending_areas(self):
+        """最近一次采样中有命中、正在积累的区域（用于界面/调度判断风险）"""
+        if self._count == 0:
+            return []
+        last = (self._head - 1) % self.capacity
+        return np.flatnonzero(self._hits[last]).tolist()
+
+
+def create_evaluator(n_areas):
+    """按统一的报警参数创建区域报警判断"""
+    return ZoneAlertEvaluator(n_areas, window_seconds=ALERT_DANGER_SECONDS, hit_ratio=ALERT_HIT_RATIO,
+                              cooldown_seconds=ALERT_COOLDOWN_SECONDS)
+
+
+class AlertAnalyzer:
+    """
+    跟踪 + 区域判断 + 时间窗口报警（不依赖Qt）
+    Args:
+        zone_path: 区域文件，set_frame_size 时按视频尺寸加载；为None时由调用方用 set_zones 设置
+        evaluator_factory: evaluator_factory(区域数) 返回 ZoneAlertEvaluator，默认 create_evaluator
+    """
+
+    def __init__(self, zone_path=None, evaluator_factory=None):
+        self.zone_path = zone_path
+        self.evaluator_factory = evaluator_factory or create_evaluator
+        self.tracker = ByteTracker(high_thresh=0.8)  # 高分阈值与原来的置信度阈值一致
+        self.zone_set = ZoneSet([], (None, None), (0, 0))
+        self.evaluator = self.evaluator_factory(0)
+        self.frame_size = None
+
+    @property
+    def low_thresh(self):
+        return self.tracker.low_thresh
+
+    def set_frame_size(self, w, h):
+        """视频尺寸确定（或变化）时从 zone_path 加载并缩放区域"""
+        if self.frame_size == (w, h):
+            return
+        if self.zone_path and os.path.exists(self.zone_path):
+            zone_set = load_zone_set(self.zone_path, (w, h))[0]
+        else:
+            zone_set = ZoneSet([], (None, None), (w, h))
+        self.set_zones(zone_set, (w, h))
+
+    def set_zones(self, zone_set, frame_size):
+        """设置已缩放到 frame_size 的区域，报警历史随之重建"""
+        self.frame_size = tuple(frame_size)
+        self.zone_set = zone_set
+        self.evaluator = self.evaluator_factory(len(zone_set))
+
+    def advance(self, n=1):
+        """跳过的帧：轨迹外推"""
+        for _ in range(n):
+            self.tracker.predict()
+
+    def reset_tracks(self):
+        self.tracker.reset()
+
+    def update(self, detections, ts):
+        """
+        处理一个检测帧
+        Args:
+            detections: (N, 5) [x1, y1, x2, y2, score]
+            ts: 帧时间戳（秒）
+        Returns:
+            (本帧更新的轨迹, 报警区域, 报警轨迹)
+        """
+        self.tracker.predict()
+        updated = self.tracker.update(detections)
+        for track in updated:
+            track.zones = self.zone_set.zones_containing(track.box)
+        # 已报过警的人（轨迹）不再计入，同一个人只报一次
+        area_hits = np.zeros(len(self.zone_set), dtype=bool)
+        for track in updated:
+            if not track.alerted:
+                area_hits[track.zones] = True
+        alert_areas = self.evaluator.observe(ts, area_hits)
+        alert_tracks = []
+        if alert_areas:
+            alert_tracks = [t for t in updated if not t.alerted and set(t.zones) & set(alert_areas)]
+            for track in alert_tracks:
+                track.alerted = True
+        return updated, alert_areas, alert_tracks
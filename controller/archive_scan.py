@@ -0,0 +1,303 @@
+"""
+归档录像快速审计（扫描模式），基于离线批处理（offline_detector.py）
+
+绝大部分录像是合规的，逐帧全量检测大部分时间都花在没人违规的画面上。扫描模式分两遍：
+1. 粗扫：每个文件按 1fps 采样（或只解码关键帧，需要 PyAV），用较低的推理分辨率检测，
+   有 bare 框落在区域内的采样时刻记为候选
+2. 确认：候选时刻前后的时间段（相邻的合并）按实时检测的帧间隔重新解码，
+   走完整的跟踪 -> 区域 -> 时间窗口报警，报警结果与全量处理同一口径
+
+报警需要危险持续约1.5秒，粗扫间隔不超过1秒时持续的危险至少被采样到一次；
+确认时间段在候选时刻前后各留出 采样间隔 + 报警窗口 + 余量，保证跟踪和时间窗口能完整建立。
+
+输出（输出目录）：
+  scan_alerts.jsonl   确认的报警事件
+  scan_summary.json   每个文件的粗扫/确认耗时、重新解码时长占比；--verify 时还有全量处理耗时、加速比和报警召回率
+
+用法：
+    python -m controller.archive_scan --input D:\\archive\\202509 --output D:\\audit\\202509 --workers 4
+    python -m controller.archive_scan --input D:\\archive\\0911 --output out --sample keyframes --verify
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from controller.alert_evaluator import ALERT_DANGER_SECONDS
+from controller.offline_detector import analyze_video, find_videos, iter_frames, run_pool
+from controller.view_registry import get_registry
+from controller.zones import ZoneSet, load_zone_set
+
+SAMPLE_MODES = ('fps', 'keyframes')
+DEFAULT_SCAN_IMGSZ = 416
+
+
+def load_scan_detectors(model_path, variant=None, device=None, scan_imgsz=DEFAULT_SCAN_IMGSZ, imgsz=None):
+    """加载一次模型，返回 (粗扫检测器, 确认检测器)，两者只是推理分辨率不同"""
+    from controller.inference import LeanDetector
+    from controller.model_loader import load_model
+
+    loaded = load_model(model_path, variant=variant, device=device)
+    if loaded.note:
+        print(f"模型变体: {loaded.note}")
+    return LeanDetector.from_loaded(loaded, scan_imgsz), LeanDetector.from_loaded(loaded, imgsz)
+
+
+def iter_keyframes(video_path):
+    """只解码关键帧（PyAV 跳过非关键帧的解码），产出 (帧号, 时间, 帧)"""
+    import av
+
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        stream.codec_context.skip_frame = "NONKEY"
+        fps = float(stream.average_rate or 25)
+        for frame in container.decode(stream):
+            ts = float(frame.pts * stream.time_base) if frame.pts is not None else frame.index / fps
+            yield int(round(ts * fps)), ts, frame.to_ndarray(format="bgr24")
+
+
+def _batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def coarse_scan(video_path, detector, zone_path, sample='fps', scan_fps=1.0, conf=0.5, batch=8):
+    """
+    粗扫：采样帧上有 bare 框（分数 >= conf）落在区域内即为候选
+    Returns:
+        dict: 候选时刻、采样帧数、最大采样间隔（秒）、耗时
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"无法打开视频: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    if sample == 'keyframes':
+        cap.release()
+        frames = iter_keyframes(video_path)
+    else:
+        frames = iter_frames(cap, interval=max(1, int(round(fps / scan_fps))), fps=fps)
+
+    t0 = time.perf_counter()
+    zone_set = None
+    hits, sampled_ts = [], []
+    try:
+        for items in _batched(frames, batch):
+            results = detector.detect_bare_batch([frame for _, _, frame in items], conf)
+            for (_, ts, frame), detections in zip(items, results):
+                h, w = frame.shape[:2]
+                if zone_set is None or (zone_set.width, zone_set.height) != (w, h):
+                    zone_set = (load_zone_set(zone_path, (w, h))[0] if zone_path and os.path.exists(zone_path)
+                                else ZoneSet([], (None, None), (w, h)))
+                sampled_ts.append(ts)
+                if any(zone_set.zones_containing(box[:4]) for box in detections):
+                    hits.append(ts)
+    finally:
+        frames.close()  # 先停止解码线程再释放
+        cap.release()
+    gaps = np.diff([0.0] + sampled_ts + [total_frames / fps])
+    return {
+        "fps": fps,
+        "total_frames": total_frames,
+        "duration": total_frames / fps,
+        "sampled": len(sampled_ts),
+        "max_gap": float(gaps.max()) if gaps.size else 0.0,
+        "hits": hits,
+        "elapsed": time.perf_counter() - t0,
+    }
+
+
+def candidate_windows(hits, margin, duration):
+    """候选时刻 -> 确认时间段 [(开始, 结束)]，前后各扩展 margin 秒，重叠或相接的合并"""
+    windows = []
+    for ts in sorted(hits):
+        start, end = max(0.0, ts - margin), min(duration, ts + margin)
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], end)
+        else:
+            windows.append([start, end])
+    return [tuple(w) for w in windows]
+
+
+def match_alerts(reference, candidate, tolerance):
+    """同一区域、时间差不超过 tolerance 秒的报警视为同一报警（一对一），返回匹配数"""
+    ref_events = [(ts, area) for _, ts, areas, _ in reference for area in areas]
+    events = [(ts, area) for _, ts, areas, _ in candidate for area in areas]
+    used = set()
+    matched = 0
+    for ts, area in ref_events:
+        for j, (cts, carea) in enumerate(events):
+            if j not in used and carea == area and abs(cts - ts) <= tolerance:
+                used.add(j)
+                matched += 1
+                break
+    return matched, len(ref_events), len(events)
+
+
+def scan_file(detectors, video_path, options):
+    """进程池任务：粗扫 + 确认（+ 全量对照）一个文件"""
+    coarse_detector, detector = detectors
+    registry = get_registry()
+    zone_path = registry.area_path(registry.resolve(video_path))
+
+    coarse = coarse_scan(video_path, coarse_detector, zone_path, sample=options["sample"],
+                         scan_fps=options["scan_fps"], conf=options["conf"], batch=options["batch"])
+    # 采样间隔内危险可能已开始，窗口需覆盖一个完整的报警时间窗口再加余量
+    margin = coarse["max_gap"] + ALERT_DANGER_SECONDS + options["margin"]
+    windows = candidate_windows(coarse["hits"], margin, coarse["duration"])
+
+    t0 = time.perf_counter()
+    alerts, confirm_processed = [], 0
+    for start, end in windows:
+        result = analyze_video(video_path, detector, interval=options["interval"], batch=options["batch"],
+                               start_s=start, end_s=end, zone_path=zone_path)
+        alerts.extend(result["alerts"])
+        confirm_processed += result["processed"]
+    confirm_elapsed = time.perf_counter() - t0
+
+    result = {
+        "video": video_path,
+        "duration": coarse["duration"],
+        "sampled": coarse["sampled"],
+        "candidates": len(coarse["hits"]),
+        "windows": windows,
+        "rescanned_seconds": sum(end - start for start, end in windows),
+        "coarse_elapsed": coarse["elapsed"],
+        "confirm_elapsed": confirm_elapsed,
+        "confirm_processed": confirm_processed,
+        "elapsed": coarse["elapsed"] + confirm_elapsed,
+        "alerts": alerts,
+    }
+    if options["verify"]:
+        full = analyze_video(video_path, detector, interval=options["interval"], batch=options["batch"],
+                             zone_path=zone_path)
+        matched, n_full, _ = match_alerts(full["alerts"], alerts, options["tolerance"])
+        result.update({"full_elapsed": full["elapsed"], "full_processed": full["processed"],
+                       "full_alerts": n_full, "matched_alerts": matched})
+    return result
+
+
+def run_scan(videos, output, detector_factory, workers=1, sample='fps', scan_fps=1.0, conf=0.5, interval=1,
+             batch=8, margin=1.0, verify=False, tolerance=1.0, log=print):
+    """
+    扫描一组视频，返回汇总（同时写入 output/scan_summary.json 和 scan_alerts.jsonl）
+    Args:
+        detector_factory: 无参可调用对象（需可pickle），返回 (粗扫检测器, 确认检测器)
+    """
+    os.makedirs(output, exist_ok=True)
+    options = {"sample": sample, "scan_fps": scan_fps, "conf": conf, "interval": interval, "batch": batch,
+               "margin": margin, "verify": verify, "tolerance": tolerance}
+    results, failures, wall = run_pool(scan_file, [(path, options) for path in videos], detector_factory,
+                                       workers, log)
+    results.sort(key=lambda r: r["video"])
+
+    with open(os.path.join(output, "scan_alerts.jsonl"), "w", encoding="utf-8") as f:
+        for r in results:
+            for frame_idx, ts, areas, track_ids in r["alerts"]:
+                f.write(json.dumps({"video": r["video"], "frame": frame_idx, "ts": round(ts, 3),
+                                    "areas": [int(a) for a in areas], "track_ids": track_ids},
+                                   ensure_ascii=False) + "\n")
+
+    duration = sum(r["duration"] for r in results)
+    rescanned = sum(r["rescanned_seconds"] for r in results)
+    summary = {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "workers": workers,
+        "sample": sample,
+        "scan_fps": scan_fps if sample == 'fps' else None,
+        "interval": interval,
+        "files": len(results),
+        "failed": failures,
+        "video_seconds": round(duration, 2),
+        "rescanned_seconds": round(rescanned, 2),
+        "rescanned_ratio": round(rescanned / duration, 4) if duration else None,
+        "wall_seconds": round(wall, 2),
+        "alerts": sum(len(r["alerts"]) for r in results),
+    }
+    if verify and results:
+        scan_elapsed = sum(r["elapsed"] for r in results)
+        full_elapsed = sum(r["full_elapsed"] for r in results)
+        n_full = sum(r["full_alerts"] for r in results)
+        summary.update({
+            "scan_seconds": round(scan_elapsed, 2),
+            "full_seconds": round(full_elapsed, 2),
+            "speedup": round(full_elapsed / scan_elapsed, 2) if scan_elapsed > 0 else None,
+            "full_alerts": n_full,
+            "alert_recall": round(sum(r["matched_alerts"] for r in results) / n_full, 4) if n_full else None,
+        })
+    summary["videos"] = [{
+        "video": r["video"],
+        "duration": round(r["duration"], 2),
+        "sampled": r["sampled"],
+        "candidates": r["candidates"],
+        "windows": [[round(s, 2), round(e, 2)] for s, e in r["windows"]],
+        "coarse_elapsed": round(r["coarse_elapsed"], 2),
+        "confirm_elapsed": round(r["confirm_elapsed"], 2),
+        "alerts": len(r["alerts"]),
+        **({"full_elapsed": round(r["full_elapsed"], 2), "full_alerts": r["full_alerts"],
+            "matched_alerts": r["matched_alerts"]} if verify else {}),
+    } for r in results]
+    with open(os.path.join(output, "scan_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='归档录像快速审计：低分辨率粗扫 + 候选时间段全帧率确认')
+    parser.add_argument('--input', type=str, required=True, help='视频文件或目录')
+    parser.add_argument('--output', type=str, required=True, help='结果输出目录')
+    parser.add_argument('--model', type=str, default='model/best.pt', help='模型路径')
+    parser.add_argument('--variant', type=str, default=None, help='精度变体 fp32/fp16/int8，默认读环境变量')
+    parser.add_argument('--device', type=str, default=None, help='cuda/cpu，默认自动选择')
+    parser.add_argument('--sample', type=str, default='fps', choices=SAMPLE_MODES,
+                        help='粗扫采样方式：fps 按固定帧率；keyframes 只解码关键帧（需要 PyAV）')
+    parser.add_argument('--scan_fps', type=float, default=1.0, help='粗扫采样帧率')
+    parser.add_argument('--scan_imgsz', type=int, default=DEFAULT_SCAN_IMGSZ, help='粗扫推理分辨率')
+    parser.add_argument('--imgsz', type=int, default=None, help='确认时的推理分辨率，默认640')
+    parser.add_argument('--conf', type=float, default=0.5, help='粗扫候选的分数阈值（低于报警阈值，保证召回）')
+    parser.add_argument('--interval', type=int, default=1, help='确认时每隔几帧检测一次')
+    parser.add_argument('--margin', type=float, default=1.0, help='确认时间段额外的前后余量（秒）')
+    parser.add_argument('--workers', type=int, default=max(1, min(4, (os.cpu_count() or 2) // 2)), help='进程数')
+    parser.add_argument('--batch', type=int, default=8, help='推理批大小')
+    parser.add_argument('--verify', action='store_true', help='同时全量处理，报告实测加速比和报警召回率')
+    parser.add_argument('--tolerance', type=float, default=1.0, help='与全量处理对比时报警时间允许的偏差(秒)')
+    args = parser.parse_args()
+
+    if args.sample == 'keyframes':
+        try:
+            import av  # noqa: F401
+        except ImportError:
+            parser.error("关键帧采样需要安装 PyAV (pip install av)")
+    videos = find_videos(args.input)
+    if not videos:
+        parser.error(f"没有找到视频文件: {args.input}")
+
+    factory = functools.partial(load_scan_detectors, args.model, args.variant, args.device, args.scan_imgsz,
+                                args.imgsz)
+    s = run_scan(videos, args.output, factory, workers=args.workers, sample=args.sample, scan_fps=args.scan_fps,
+                 conf=args.conf, interval=args.interval, batch=args.batch, margin=args.margin,
+                 verify=args.verify, tolerance=args.tolerance)
+    print(f"视频总时长 {s['video_seconds']:.0f}s，重新解码 {s['rescanned_seconds']:.0f}s "
+          f"({(s['rescanned_ratio'] or 0) * 100:.1f}%)，耗时 {s['wall_seconds']:.1f}s，报警 {s['alerts']} 次")
+    if args.verify:
+        print(f"全量处理 {s.get('full_seconds')}s vs 扫描 {s.get('scan_seconds')}s，加速比 {s.get('speedup')}x，"
+              f"报警召回 {s.get('alert_recall')}（全量 {s.get('full_alerts')} 次）")
+    print(f"汇总: {os.path.join(args.output, 'scan_summary.json')}")
+
+
+if __name__ == '__main__':
+    main()
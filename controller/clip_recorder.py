@@ -0,0 +1,220 @@
+"""
+报警录像：每路视频保留最近几秒的JPEG压缩帧（固定内存上限），报警时后台写出报警前后的MP4片段
+
+- push(frame, ts) 只把帧放入有界队列（满了丢弃），JPEG压缩、缓存、写文件都在后台线程，不阻塞检测循环
+- trigger(ts, message) 立即返回录像文件路径（用于日志/报警关联）。触发请求走单独的无界队列，不会丢也不会阻塞；
+  报警后 post_seconds 秒的帧（按时间戳判断）到齐或等待超时后，把 [ts - pre_seconds, ts + post_seconds] 的帧交给编码线程写成MP4
+- close(timeout) 最多等待 timeout 秒（0 表示不等待），没写完的录像由后台线程继续交给编码线程写完
+"""
+
+import collections
+import concurrent.futures
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+
+def get_default_clip_dir():
+    """默认录像目录：打包后放在exe旁边，开发环境放在项目根目录"""
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_path, "clips")
+
+
+class FrameRingBuffer:
+    """按时间顺序保存 (时间戳, JPEG字节) ，总字节数和时间跨度超过上限时淘汰最旧的帧"""
+
+    def __init__(self, budget_bytes, max_seconds):
+        self.budget_bytes = budget_bytes
+        self.max_seconds = max_seconds
+        self.nbytes = 0
+        self._frames = collections.deque()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def append(self, ts, data):
+        if self._frames and ts < self._frames[-1][0]:
+            self.clear()  # 时间倒退（本地视频循环播放）
+        self._frames.append((ts, data))
+        self.nbytes += len(data)
+        while self._frames and (self.nbytes > self.budget_bytes or ts - self._frames[0][0] > self.max_seconds):
+            self.nbytes -= len(self._frames.popleft()[1])
+
+    def clear(self):
+        self._frames.clear()
+        self.nbytes = 0
+
+    def last_ts(self):
+        return self._frames[-1][0] if self._frames else None
+
+    def between(self, start, end):
+        return [(ts, data) for ts, data in self._frames if start <= ts <= end]
+
+
+class ClipRecorder:
+    """
+    Args:
+        stream_id: 视频源ID（用于文件名）
+        clip_dir: 录像目录
+        pre_seconds / post_seconds: 报警前/后录制的秒数
+        budget_bytes: 缓存的内存上限（字节）
+        jpeg_quality: JPEG质量
+        max_width: 缓存前把帧缩小到该宽度以内（0表示不缩放）
+        queue_size: 待压缩帧队列长度，满了直接丢帧
+        on_saved: 录像写完后的回调 on_saved(路径, 帧数)，在编码线程中调用
+    """
+
+    def __init__(self, stream_id, clip_dir=None, pre_seconds=5.0, post_seconds=5.0, budget_bytes=32 * 1024 * 1024,
+                 jpeg_quality=80, max_width=960, queue_size=16, on_saved=None):
+        self.stream_id = stream_id
+        self.clip_dir = clip_dir or get_default_clip_dir()
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.jpeg_quality = jpeg_quality
+        self.max_width = max_width
+        self.on_saved = on_saved
+        self.dropped = 0  # 队列满时丢弃的帧数
+
+        self.buffer = FrameRingBuffer(budget_bytes, pre_seconds + post_seconds + 1.0)
+        self._pending = []  # 等待报警后帧到齐的录像 [(ts, 路径, 说明, 截止系统时间)]
+        self._clip_seq = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._triggers = queue.SimpleQueue()  # 触发请求（无界，不阻塞检测线程）
+        self._stopping = threading.Event()
+        self._futures = []  # 已提交的录像写出任务
+        self._encoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"ClipEncoder-{stream_id}")
+        self._thread = threading.Thread(target=self._run, name=f"ClipRecorder-{stream_id}", daemon=True)
+        self._thread.start()
+
+    def push(self, frame, ts=None):
+        """缓存一帧（调用后不要再修改 frame）"""
+        try:
+            self._queue.put_nowait((ts if ts is not None else time.time(), frame))
+        except queue.Full:
+            self.dropped += 1
+
+    def trigger(self, ts=None, message=""):
+        """
+        报警触发，安排录制报警前后的片段
+        Returns:
+            str: 录像文件路径（后台写完后才存在）
+        """
+        ts = ts if ts is not None else time.time()
+        self._clip_seq += 1
+        name = f"alert_{self.stream_id}_{time.strftime('%Y%m%d_%H%M%S')}_{self._clip_seq:03d}.mp4"
+        path = os.path.join(self.clip_dir, name)
+        # 触发请求不进帧队列：帧队列满或后台线程异常退出时也不阻塞；是否到齐按时间戳判断，与队列顺序无关
+        self._triggers.put((ts, path, message))
+        return path
+
+    def close(self, timeout=10.0):
+        """
+        停止缓存，已触发的录像由后台线程交给编码线程，最多等待 timeout 秒（超时后在后台继续写完）
+        Returns:
+            bool: 是否在超时前全部写完
+        """
+        deadline = time.monotonic() + timeout
+        self._stopping.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return False
+        _, not_done = concurrent.futures.wait(self._futures, timeout=max(0.0, deadline - time.monotonic()))
+        return not not_done
+
+    # ---------------------- 后台线程 ----------------------
+    def _run(self):
+        while not self._stopping.is_set():
+            self._take_triggers()
+            try:
+                item = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                item = None
+            if item is not None:
+                self._append_safe(*item)
+            self._flush_pending()
+        # 停止：处理队列中剩余的帧（报警后的帧到齐就写出，避免被后面的帧挤出缓存），再写出所有已触发的录像
+        self._take_triggers()
+        while True:
+            try:
+                self._append_safe(*self._queue.get_nowait())
+            except queue.Empty:
+                break
+            self._flush_pending()
+        self._flush_pending(force=True)
+        self._encoder.shutdown(wait=False)  # 已提交的录像继续写完（进程退出前也会等它们写完）
+
+    def _take_triggers(self):
+        while True:
+            try:
+                ts, path, message = self._triggers.get_nowait()
+            except queue.Empty:
+                return
+            # 实时流断开时不会再有新帧，最多等待 post_seconds 的2倍
+            self._pending.append((ts, path, message, time.time() + self.post_seconds * 2 + 1.0))
+
+    def _append_safe(self, ts, frame):
+        try:
+            self._append(ts, frame)
+        except Exception as e:
+            print(f"报警录像缓存失败: {str(e)}")
+
+    def _append(self, ts, frame):
+        h, w = frame.shape[:2]
+        if self.max_width and w > self.max_width:
+            frame = cv2.resize(frame, (self.max_width, int(h * self.max_width / w)), interpolation=cv2.INTER_AREA)
+        ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if ok:
+            self.buffer.append(ts, data.tobytes())
+
+    def _flush_pending(self, force=False):
+        """报警后的帧已到齐（或超时）的录像交给编码线程"""
+        last_ts = self.buffer.last_ts()
+        remaining = []
+        for ts, path, message, deadline in self._pending:
+            ready = last_ts is not None and last_ts >= ts + self.post_seconds
+            if force or ready or time.time() >= deadline:
+                frames = self.buffer.between(ts - self.pre_seconds, ts + self.post_seconds)
+                self._futures = [f for f in self._futures if not f.done()]
+                self._futures.append(self._encoder.submit(self._write_clip, path, frames, ts, message))
+            else:
+                remaining.append((ts, path, message, deadline))
+        self._pending = remaining
+
+    def _write_clip(self, path, frames, alert_ts, message):
+        if not frames:
+            print(f"报警录像没有可用的帧: {path}")
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            first = cv2.imdecode(np.frombuffer(frames[0][1], dtype=np.uint8), cv2.IMREAD_COLOR)
+            h, w = first.shape[:2]
+            duration = frames[-1][0] - frames[0][0]
+            fps = (len(frames) - 1) / duration if duration > 0 else 10.0
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), max(1.0, min(fps, 30.0)), (w, h))
+            try:
+                for i, (_, data) in enumerate(frames):
+                    img = first if i == 0 else cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                    if img.shape[:2] != (h, w):
+                        img = cv2.resize(img, (w, h))
+                    writer.write(img)
+            finally:
+                writer.release()
+            # 录像说明：报警时间、报警内容，与日志中的报警记录对应
+            with open(os.path.splitext(path)[0] + ".json", "w", encoding="utf-8") as f:
+                json.dump({"stream": self.stream_id, "alert_ts": alert_ts, "message": message,
+                           "start_ts": frames[0][0], "end_ts": frames[-1][0], "frames": len(frames)},
+                          f, ensure_ascii=False, indent=2)
+            if self.on_saved:
+                self.on_saved(path, len(frames))
+        except Exception as e:
+            print(f"报警录像写入失败: {path} - {str(e)}")
@@ -0,0 +1,180 @@
+"""
+检测调度：统一管理推理槽位（同时推理的路数），按风险优先级分给各路视频
+
+原来每路按固定间隔推理，画面里有没有人都分到一样多的计算。调度后：
+- 每路读到新帧时申请槽位（不阻塞，申请不到就跳过这一帧，下一帧更新鲜）
+- 同时申请的路按 权重 x 距上次推理的时间 排序，风险越高权重越大：
+  正在累计报警 > 区域附近有bare > 空闲；断流的路不参与
+- 最低速率保证：距上次推理超过 1/min_fps 的路排在最前面，空闲摄像头也不会饿死
+- 空闲的路有最高速率限制，空出来的槽位留给高风险的路
+"""
+
+import os
+import threading
+import time
+
+# 风险等级（由 DetectorWorker 每次推理后给出）
+RISK_DISCONNECTED = -1  # 断流/暂停，不参与调度
+RISK_IDLE = 0  # 画面中没有bare，或都离区域较远
+RISK_NEAR = 1  # 区域附近有bare
+RISK_ALERTING = 2  # 有区域正在累计报警
+
+RISK_WEIGHTS = {RISK_DISCONNECTED: 0.0, RISK_IDLE: 1.0, RISK_NEAR: 4.0, RISK_ALERTING: 8.0}
+RISK_MAX_FPS = {RISK_IDLE: 5.0}  # 各风险等级的最高推理帧率，未列出的不限制
+DEFAULT_MIN_FPS = 2.0  # 报警判断至少需要1.5秒内3个采样
+PENDING_SECONDS = 0.2  # 这段时间内申请过的路视为正在等待
+SLOTS_ENV = "GLOVE_INFERENCE_SLOTS"  # 手动指定推理槽位数
+NEAR_ZONE_MARGIN = 0.1  # bare框与区域外接矩形的距离小于画面长边的这个比例时视为"区域附近"
+
+
+def assess_risk(evaluator, bare_boxes, zone_bboxes, frame_size, margin=NEAR_ZONE_MARGIN):
+    """
+    一次推理后的风险等级：有区域正在累计报警 > 区域附近有bare > 空闲
+    Args:
+        evaluator: ZoneAlertEvaluator
+        bare_boxes: 当前的bare轨迹框 [[x1, y1, x2, y2], ...]
+        zone_bboxes: 区域外接矩形 [[x1, y1, x2, y2], ...]
+        frame_size: (宽, 高)
+    """
+    if evaluator.pending_areas():
+        return RISK_ALERTING
+    if len(bare_boxes) and len(zone_bboxes):
+        import numpy as np  # 界面启动路径会导入本模块，numpy在第一次推理时才需要
+        pad = margin * max(frame_size)
+        boxes = np.asarray(bare_boxes, dtype=np.float32)[:, None, :4]
+        zones = np.asarray(zone_bboxes, dtype=np.float32)[None, :, :]
+        near = ((boxes[..., 0] < zones[..., 2] + pad) & (boxes[..., 2] > zones[..., 0] - pad) &
+                (boxes[..., 1] < zones[..., 3] + pad) & (boxes[..., 3] > zones[..., 1] - pad))
+        if near.any():
+            return RISK_NEAR
+    return RISK_IDLE
+
+
+def slots_for_plan(plan):
+    """推理槽位数：环境变量 GLOVE_INFERENCE_SLOTS 优先，否则为 推理核数 / 每路推理线程数"""
+    slots = int(os.environ.get(SLOTS_ENV, 0))
+    if slots:
+        return slots
+    return max(1, plan.inference_cores // plan.inference_threads)
+
+
+class _Stream:
+    def __init__(self, min_fps, now):
+        # 提前1/4进入保证，留出等待槽位空出来的时间
+        self.min_interval = 0.75 / min_fps if min_fps else float("inf")
+        self.risk = RISK_IDLE
+        self.last_served = now
+        self.last_request = None
+        self.waiting_since = None
+        self.in_slot = False
+        self.served = 0
+        self.skipped = 0
+
+
+class DetectionScheduler:
+    """
+    Args:
+        slots: 推理槽位数（同时推理的最多路数），一般为推理核数 / 每路推理线程数
+        min_fps: 每路保证的最低推理帧率
+        weights: {风险等级: 权重}
+        max_fps: {风险等级: 最高推理帧率}
+        clock: 时间函数（测试用）
+    """
+
+    def __init__(self, slots=1, min_fps=DEFAULT_MIN_FPS, weights=None, max_fps=None, clock=time.monotonic):
+        if slots < 1:
+            raise ValueError(f"推理槽位至少为1: {slots}")
+        self.slots = slots
+        self.min_fps = min_fps
+        self.weights = dict(RISK_WEIGHTS if weights is None else weights)
+        self.max_fps = dict(RISK_MAX_FPS if max_fps is None else max_fps)
+        self.clock = clock
+        self._streams = {}
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def register(self, stream_id, min_fps=None):
+        with self._lock:
+            self._streams[stream_id] = _Stream(self.min_fps if min_fps is None else min_fps, self.clock())
+
+    def unregister(self, stream_id):
+        with self._lock:
+            stream = self._streams.pop(stream_id, None)
+            if stream is not None and stream.in_slot:
+                self._busy -= 1
+
+    def _score(self, stream, now):
+        waited = now - stream.last_served
+        if waited >= stream.min_interval:
+            return 1e6 + waited  # 低于最低速率：最先服务，等得越久越靠前
+        return self.weights.get(stream.risk, 1.0) * waited
+
+    def try_acquire(self, stream_id):
+        """
+        申请一个推理槽位（不阻塞）
+        Returns:
+            bool: True 表示可以推理这一帧，推理完必须调用 release
+        """
+        now = self.clock()
+        with self._lock:
+            stream = self._streams[stream_id]
+            if stream.risk == RISK_DISCONNECTED:
+                stream.risk = RISK_IDLE  # 又读到帧了，恢复参与调度
+            cap = self.max_fps.get(stream.risk)
+            if cap and now - stream.last_served < 1.0 / cap:
+                stream.skipped += 1  # 超过该风险等级的最高帧率，不算在等待
+                return False
+
+            stream.last_request = now
+            if stream.waiting_since is None:
+                stream.waiting_since = now
+            if self._busy >= self.slots:
+                stream.skipped += 1
+                return False
+
+            # 正在等待的路中，排在自己前面的不能多于空闲槽位
+            mine = (self._score(stream, now), -stream.waiting_since)
+            ahead = 0
+            for other in self._streams.values():
+                if other is stream or other.in_slot or other.waiting_since is None:
+                    continue
+                if other.last_request is None or now - other.last_request > PENDING_SECONDS:
+                    continue
+                if (self._score(other, now), -other.waiting_since) > mine:
+                    ahead += 1
+            if ahead >= self.slots - self._busy:
+                stream.skipped += 1
+                return False
+
+            self._busy += 1
+            stream.in_slot = True
+            stream.last_served = now
+            stream.waiting_since = None
+            stream.served += 1
+            return True
+
+    def release(self, stream_id, risk=None):
+        """推理完成，归还槽位，risk 为这次推理后的风险等级"""
+        with self._lock:
+            stream = self._streams.get(stream_id)
+            if stream is None or not stream.in_slot:
+                return
+            stream.in_slot = False
+            self._busy -= 1
+            if risk is not None:
+                stream.risk = risk
+
+    def mark_disconnected(self, stream_id):
+        """断流/暂停：不再参与排序，也不占用最低速率"""
+        with self._lock:
+            stream = self._streams.get(stream_id)
+            if stream is not None:
+                stream.risk = RISK_DISCONNECTED
+                stream.waiting_since = None
+                stream.last_request = None
+
+    def snapshot(self):
+        """各路的调度状态 {stream_id: {"risk", "served", "skipped"}}"""
+        with self._lock:
+            return {sid: {"risk": s.risk, "served": s.served, "skipped": s.skipped}
+                    for sid, s in self._streams.items()}
@@ -5,15 +5,25 @@
 import math
 import time
 import os
-import xml.etree.ElementTree as ET
 from collections import deque
 
 import cv2
 import numpy as np
 from PyQt6.QtCore import QObject, pyqtSignal, QMutex
 from PyQt6.QtGui import QImage
-from ultralytics import YOLO
 
+from controller.alert_evaluator import (ALERT_COOLDOWN_SECONDS, ALERT_DANGER_SECONDS, ALERT_HIT_RATIO, AlertAnalyzer,
+                                        ZoneAlertEvaluator)
+from controller.clip_recorder import ClipRecorder
+from controller.detection_scheduler import RISK_IDLE, assess_risk
+from controller.event_bus import BUS, TOPIC_ALERT, TOPIC_DETECTION, make_event, track_summary
+from controller.inference import LeanDetector
+from controller.metrics import StreamMetrics
+from controller.mjpeg_server import HUB
+from controller.model_loader import load_model
+from controller.tracing import TRACER
+from controller.view_registry import get_registry
+from controller.zones import ZoneSet, load_zone_set
 from model.email_sender import EmailSender
 
 
@@ -22,36 +32,48 @@ class DetectorWorker(QObject):
     log_message = pyqtSignal(str)  # 日志信号
     alert_message = pyqtSignal(str)  # 报警信号
 
-    # 报警参数配置
-    ALERT_FRAME_THRESHOLD = 10  # 连续多少帧危险才触发报警
-    ALERT_DISPLAY_SECONDS = 5  # 报警持续显示时间（秒）
+    # 报警参数配置（定义在 alert_evaluator，离线检测和服务模式共用）
+    ALERT_DANGER_SECONDS = ALERT_DANGER_SECONDS
+    ALERT_HIT_RATIO = ALERT_HIT_RATIO
+    ALERT_DISPLAY_SECONDS = ALERT_COOLDOWN_SECONDS  # 报警持续显示时间（秒），同时作为同一区域的报警冷却时间
+    ALERT_CLIP_PRE_SECONDS = 5  # 报警录像包含报警前的秒数
+    ALERT_CLIP_POST_SECONDS = 5  # 报警录像包含报警后的秒数
 
     # 修改 __init__ 方法
-    def __init__(self, model_path, video_name, view_index, alert_email, parent=None):
+    def __init__(self, model_path, video_name, view_index, alert_email, parent=None, stream_id=None, model=None,
+                 imgsz=None, record_clips=True):
         super().__init__(parent)
-        self.model = YOLO(model_path)
-        device = 'cuda'
-        self.model.to(device)
-        self.log_message.emit(f"模型运行设备: {device}")
+        if model is not None:
+            # 外部传入的检测器（基准测试用的桩模型、对比测试用的量化模型等），需实现 detect_bare(frame, conf)
+            self.model = model
+        else:
+            loaded = load_model(model_path)  # 精度变体由环境变量 GLOVE_MODEL_VARIANT 选择
+            if loaded.note:
+                self.log_message.emit(f"模型变体: {loaded.note}")
+            self.log_message.emit(f"模型: {os.path.basename(loaded.path)} ({loaded.variant}), 运行设备: {loaded.device}")
+            fixed_imgsz = loaded.predict_kwargs.get("imgsz")
+            if fixed_imgsz and imgsz and imgsz != fixed_imgsz:
+                self.log_message.emit(f"模型输入尺寸固定为 {fixed_imgsz}，忽略视频源设置的推理分辨率 {imgsz}")
+            self.model = LeanDetector.from_loaded(loaded, imgsz)
         
         # 线程安全锁
         self._mutex = QMutex()
     
         # 报警控制变量
-        self.consecutive_danger_frames = 0
+        self.risk = RISK_IDLE  # 最近一次推理后的风险等级（检测调度用）
+        # 跟踪 + 区域判断 + 时间窗口报警（与离线检测、服务模式同一实现），加载区域后按区域数重建报警判断
+        self.analyzer = AlertAnalyzer(evaluator_factory=self._create_alert_evaluator)
         self.alert_active = False  # 当前是否在报警中
         self.alert_start_time = 0  # 报警开始时间戳
         self.show_ui = True
     
         # 区域检测相关变量
-        self.area_boxes = []
         self.current_view = view_index  # 直接使用传入的视角索引
-        self.view_names = ["视角1", "视角2"]
-        # 确保XML路径正确
-        self.xml_paths = [
-            os.path.join(os.path.dirname(__file__), "..", "area", "0911_1_frame00000.xml"), 
-            os.path.join(os.path.dirname(__file__), "..", "area", "0911_2_frame00000.xml") 
-        ]
+        # 视角名称和区域文件来自视角注册表（area/views.json）
+        registry = get_registry()
+        self.view_names = list(registry.names)
+        self.xml_paths = list(registry.area_paths)
+        self.view_name = registry.view_name(view_index)
     
         # 视频名称和报警邮箱
         self.video_name = video_name
@@ -60,23 +82,54 @@ class DetectorWorker(QObject):
     
         # 保存报警帧
         self.processed_alert_frame = None
+
+        # 运行指标（按视频源ID区分，未指定时用视频名称）
+        self.stream_id = stream_id if stream_id is not None else video_name
+        self.metrics = StreamMetrics(self.stream_id)
+        self._trace_seq = None  # 当前处理帧的序号（追踪用）
+
+        # 报警录像：缓存最近的检测画面（JPEG，固定内存上限），报警时后台写出报警前后的片段
+        self.clip_recorder = None
+        if record_clips:
+            self.clip_recorder = ClipRecorder(
+                self.stream_id,
+                pre_seconds=self.ALERT_CLIP_PRE_SECONDS,
+                post_seconds=self.ALERT_CLIP_POST_SECONDS,
+                on_saved=lambda path, n: self.log_message.emit(f"[报警录像] 已保存 {path}（{n}帧）"))
+        # 远程观看（MJPEG）：没有客户端时发布不做任何事
+        HUB.open(self.stream_id, video_name)
     
         # 直接加载区域配置
-        # self.area_boxes = self.load_area_from_xml(self.xml_paths[self.current_view])
+        # self.zone_set = self.load_areas(self.xml_paths[self.current_view])
         # self.log_message.emit(f"已加载 {self.view_names[self.current_view]} 对应的区域配置")
 
-    def process_frame(self, frame: np.ndarray):
-        """主入口：处理帧（线程安全）"""
+    def process_frame(self, frame: np.ndarray, seq=None, ts=None):
+        """
+        主入口：处理帧（线程安全）
+        Args:
+            seq: 帧序号，用于追踪
+            ts: 帧时间戳（秒），用于报警判断；本地视频传视频内时间，None表示用当前系统时间
+        """
 
         self._mutex.lock()
         try:
-            annotated_frame = self._process_frame(frame)
+            self._trace_seq = seq
+            annotated_frame = self._process_frame(frame, ts)
+            if self.clip_recorder is not None:
+                self.clip_recorder.push(annotated_frame, ts)
+            HUB.publish(self.stream_id, annotated_frame)
             # 转换并发送处理后的帧
             if self.show_ui:
-                rgb_frame = cv2.cvtColor(annotated_frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = rgb_frame.shape
-                q_img = QImage(rgb_frame.data, w, h, ch * w, QImage.Format.Format_RGB888)
-                self.proc_frame_ready.emit(q_img.copy())  # 发送副本避免线程冲突
+                with TRACER.span("emit", self.stream_id, seq):
+                    rgb_frame = cv2.cvtColor(annotated_frame, cv2.COLOR_BGR2RGB)
+                    h, w, ch = rgb_frame.shape
+                    q_img = QImage(rgb_frame.data, w, h, ch * w, QImage.Format.Format_RGB888).copy()  # 发送副本避免线程冲突
+                    if TRACER.enabled:
+                        # 帧序号和发送时间随图像带到界面线程
+                        q_img.setText("seq", str(seq))
+                        q_img.setText("emit_ns", str(TRACER.now()))
+                        TRACER.flow("s", self.stream_id, seq)
+                    self.proc_frame_ready.emit(q_img)
         except Exception as e:
             self.log_message.emit(f"帧处理错误: {str(e)}")
             import traceback
@@ -84,7 +137,7 @@ class DetectorWorker(QObject):
         finally:
             self._mutex.unlock()
 
-    def _process_frame(self, frame):
+    def _process_frame(self, frame, ts=None):
         """核心检测逻辑"""
         # 获取视频帧尺寸
         h, w = frame.shape[:2]
@@ -94,73 +147,116 @@ class DetectorWorker(QObject):
             self.width = w
             self.height = h
             # 重新加载并缩放检测区域
-            self.area_boxes = self.load_area_from_xml(self.xml_paths[self.current_view])
+            self.analyzer.set_zones(self.load_areas(self.xml_paths[self.current_view]), (w, h))
             self.log_message.emit(f"已根据视频尺寸 {w}x{h} 重新加载并缩放检测区域")
         
-        # 1. 模型推理
-        results = self.model(frame, conf=0.8, verbose=False)[0]
+        # 1. 模型推理，得到bare检测框（用跟踪器的低分阈值，低分框只用于延续已有轨迹）
+        t0 = time.perf_counter_ns()
+        detections = self.model.detect_bare(frame, self.analyzer.low_thresh)  # (N, 5) [x1, y1, x2, y2, score]
+        t1 = self._observe_stage("inference", self.metrics.inference_seconds, t0)
         annotated_frame = frame.copy()
-        danger_detected = False
-        bare_boxes = []
-        danger_boxes = []
-        detected_area_indices = []  # 记录检测到危险的区域索引
-
-        # 2. 提取检测框
-        for box, cls in zip(results.boxes.xyxy.cpu().numpy(), results.boxes.cls):
-            cls_name = results.names[int(cls)]
-            if cls_name == 'bare':
-                bare_boxes.append(box)
-
-        # 3. 报警状态检查
+
+        # 2. 跟踪 + 按区域的时间窗口报警判断：给bare框分配稳定ID，已报过警的人（轨迹）不再计入，同一个人只报一次
         current_time = time.time()
+        frame_ts = current_time if ts is None else ts
+        _, alert_areas, alert_tracks = self.analyzer.update(detections, frame_ts)
+        tracks = self.tracker.active_tracks()
+        bare_boxes = [t.box for t in tracks]
+        track_ids = [t.id for t in tracks]
+        danger_tracks = [t for t in tracks if t.zones]
+        danger_boxes = [t.box for t in danger_tracks]
 
-        # 情况A：如果正在报警中，检查是否应该结束
-        if self.alert_active:
-            if current_time - self.alert_start_time > self.ALERT_DISPLAY_SECONDS:
-                self.alert_active = False
-                self.consecutive_danger_frames = 0
-                self.log_message.emit(f"报警状态已重置")
-            # 直接返回当前帧（报警期间不处理新检测）
-            return self._draw_detections(annotated_frame, bare_boxes, danger_boxes)
-
-        # 情况B：正常检测危险
-        # 3.1 判断是否有危险（未戴手套的手完全进入危险区域）
-        for bare_box_idx, bare_box in enumerate(bare_boxes):
-            for area_idx, area_box in enumerate(self.area_boxes):
-                if self.box_fully_contains(area_box, bare_box):
-                    danger_detected = True
-                    danger_boxes.append(bare_box)
-                    detected_area_indices.append(area_idx)
-                    break
-
-        # 3.2 记录危险状态
-        if danger_detected:
-            self.consecutive_danger_frames += 1
-            unique_areas = set(detected_area_indices)
-            area_info = f"区域{', '.join(map(str, unique_areas))}"
-            # self.log_message.emit(f"检测到未佩戴手套 (区域: {area_info}, 连续危险帧: {self.consecutive_danger_frames})")
-        else:
-            if self.consecutive_danger_frames > 0:
-                pass
-                # self.log_message.emit(f"未检测到危险，重置连续危险帧计数 (之前计数: {self.consecutive_danger_frames})")
-            self.consecutive_danger_frames = 0
+        # 3. 报警显示时间到后恢复SAFE
+        if self.alert_active and current_time - self.alert_start_time > self.ALERT_DISPLAY_SECONDS:
+            self.alert_active = False
+            self.log_message.emit(f"报警状态已重置")
 
-        # 3.3 检查是否满足报警条件
-        if self.consecutive_danger_frames >= self.ALERT_FRAME_THRESHOLD and not self.alert_active:
+        if alert_areas:
             self.alert_active = True
             self.alert_start_time = current_time
-            alert_msg = "检测到未佩戴手套操作！"
+            alert_msg = (f"检测到未佩戴手套操作！(目标ID: {', '.join(str(t.id) for t in alert_tracks)}, "
+                         f"区域{', '.join(map(str, alert_areas))})")
             self.alert_message.emit(alert_msg)
             self.log_message.emit(f"[报警] {alert_msg}")
+            self.metrics.alerts.inc()
+            clip_path = None
+            if self.clip_recorder is not None:
+                clip_path = self.clip_recorder.trigger(frame_ts, alert_msg)
+                self.log_message.emit(f"[报警录像] 报警前{self.ALERT_CLIP_PRE_SECONDS}秒至报警后"
+                                      f"{self.ALERT_CLIP_POST_SECONDS}秒 -> {clip_path}")
             # 绘制检测结果
-            self.processed_alert_frame = self._draw_detections(annotated_frame, bare_boxes, danger_boxes)
+            self.processed_alert_frame = self._draw_detections(annotated_frame.copy(), bare_boxes, danger_boxes, track_ids)
             # 发送报警邮件
             self.send_alert_email(alert_msg)
-            self.consecutive_danger_frames = 0  # 触发报警后重置计数
+            # 推送报警事件（没有订阅者时直接返回）
+            BUS.publish(TOPIC_ALERT, make_event(
+                TOPIC_ALERT, self.stream_id, self.video_name, self.view_name, frame_ts,
+                areas=[int(a) for a in alert_areas], tracks=track_summary(alert_tracks), message=alert_msg,
+                clip=clip_path))
+
+        if BUS.has_subscribers(TOPIC_DETECTION):
+            BUS.publish(TOPIC_DETECTION, make_event(
+                TOPIC_DETECTION, self.stream_id, self.video_name, self.view_name, frame_ts,
+                seq=self._trace_seq, tracks=track_summary(tracks)))
+        self.risk = assess_risk(self.alert_evaluator, bare_boxes, self.area_boxes, (w, h))
+        self._observe_stage("postprocess", self.metrics.postprocess_seconds, t1)
+        return self._draw_detections(annotated_frame, bare_boxes, danger_boxes, track_ids)
 
-        return self._draw_detections(annotated_frame, bare_boxes, danger_boxes)
+    # 跟踪器、区域、报警判断都在 analyzer 中
+    @property
+    def tracker(self):
+        return self.analyzer.tracker
+
+    @property
+    def zone_set(self):
+        return self.analyzer.zone_set
+
+    @property
+    def area_boxes(self):
+        """各区域外接矩形"""
+        return self.analyzer.zone_set.bboxes
+
+    @property
+    def alert_evaluator(self):
+        return self.analyzer.evaluator
+
+    def _create_alert_evaluator(self, n_areas):
+        return ZoneAlertEvaluator(n_areas,
+                                  window_seconds=self.ALERT_DANGER_SECONDS,
+                                  hit_ratio=self.ALERT_HIT_RATIO,
+                                  cooldown_seconds=self.ALERT_DISPLAY_SECONDS)
+
+    def close(self):
+        """检测线程结束时调用：已触发的报警录像交给录像线程在后台写完（界面线程在等，不等待），断开远程观看的客户端"""
+        if self.clip_recorder is not None:
+            self.clip_recorder.close(timeout=0)
+        HUB.close(self.stream_id)
+
+    def advance_tracks(self):
+        """模型跳过的帧：轨迹按速度外推一帧（线程安全）"""
+        self._mutex.lock()
+        try:
+            self.analyzer.advance()
+        finally:
+            self._mutex.unlock()
+
+    def reset_tracks(self):
+        """实时流暂停后恢复：暂停前的轨迹位置已失效，清空后重新分配ID（线程安全）"""
+        self._mutex.lock()
+        try:
+            self.analyzer.reset_tracks()
+        finally:
+            self._mutex.unlock()
 
     # ---------------------- 辅助方法 ----------------------
+    def _observe_stage(self, name, histogram, start_ns):
+        """记录一个阶段的耗时（指标直方图 + 追踪span），返回结束时间"""
+        end_ns = time.perf_counter_ns()
+        histogram.observe((end_ns - start_ns) / 1e9)
+        if TRACER.enabled:
+            TRACER.record(name, start_ns, end_ns, self.stream_id, self._trace_seq)
+        return end_ns
+
     def send_alert_email(self, alert_message):
         """发送报警邮件（使用处理后的帧）"""
         if self.alert_email and self.processed_alert_frame is not None:
@@ -173,61 +269,21 @@ class DetectorWorker(QObject):
             thread.daemon = True
             thread.start()
 
-    def load_area_from_xml(self, xml_path):
-        """从XML文件加载检测区域"""
-        area_boxes = []
-        if not os.path.exists(xml_path):
-            self.log_message.emit(f"XML文件不存在: {xml_path}")
-            return area_boxes
+    def load_areas(self, zone_path):
+        """加载检测区域（VOC/CVAT XML 或 LabelMe JSON）并缩放到当前视频尺寸"""
+        if not os.path.exists(zone_path):
+            self.log_message.emit(f"区域文件不存在: {zone_path}")
+            return ZoneSet([], (None, None), (self.width, self.height))
         try:
-            tree = ET.parse(xml_path)
-            root = tree.getroot()
-            size_node = root.find("size")
-            xml_w = int(size_node.find("width").text) if size_node is not None and size_node.find("width") is not None else None
-            xml_h = int(size_node.find("height").text) if size_node is not None and size_node.find("height") is not None else None
-            raw_boxes = []
-            for obj in root.findall('object'):
-                name = obj.find('name').text
-                if name == 'area':  # 只加载类别为area的区域
-                    bndbox = obj.find('bndbox')
-                    xmin = int(float(bndbox.find('xmin').text))
-                    ymin = int(float(bndbox.find('ymin').text))
-                    xmax = int(float(bndbox.find('xmax').text))
-                    ymax = int(float(bndbox.find('ymax').text))
-                    raw_boxes.append([xmin, ymin, xmax, ymax])
-            self.log_message.emit(f"成功从 {xml_path} 加载了 {len(raw_boxes)} 个检测区域")
-            if not hasattr(self, "width") or not hasattr(self, "height"):
-                print("警告: self.width/self.height 未设置，返回原始坐标（未缩放）")
-                return [[int(xmin), int(ymin), int(xmax), int(ymax)] for xmin, ymin, xmax, ymax in raw_boxes]
-            tw, th = int(self.width), int(self.height)
-            scaled = []
-            if xml_w and xml_h:
-                sx = tw / xml_w
-                sy = th / xml_h
-                for xmin, ymin, xmax, ymax in raw_boxes:
-                    nx1 = int(round(xmin * sx))
-                    ny1 = int(round(ymin * sy))
-                    nx2 = int(round(xmax * sx))
-                    ny2 = int(round(ymax * sy))
-                    # 裁剪到图像范围
-                    nx1 = max(0, min(tw - 1, nx1))
-                    nx2 = max(0, min(tw - 1, nx2))
-                    ny1 = max(0, min(th - 1, ny1))
-                    ny2 = max(0, min(th - 1, ny2))
-                    scaled.append([nx1, ny1, nx2, ny2])
-                self.log_message.emit(f"[XML缩放] {xml_w}x{xml_h} -> {tw}x{th}, boxes={len(scaled)}")
-                return scaled
+            zone_set, used_path, (src_w, src_h) = load_zone_set(zone_path, (self.width, self.height))
+            n_polygons = sum(p is not None for p in zone_set.polygons)
+            self.log_message.emit(f"成功从 {used_path} 加载了 {len(zone_set)} 个检测区域（其中多边形 {n_polygons} 个）")
+            if src_w and src_h:
+                self.log_message.emit(f"[区域缩放] {src_w}x{src_h} -> {self.width}x{self.height}, boxes={len(zone_set)}")
+            return zone_set
         except Exception as e:
-            self.log_message.emit(f"加载XML文件 {xml_path} 时出错: {e}")
-            return []
-
-    def box_fully_contains(self, box1, box2):
-        """检查box2是否完全包含在box1内"""
-        x1, y1, x2, y2 = box1  # 区域框
-        x3, y3, x4, y4 = box2  # bare框
-        result = (x3 >= x1) and (y3 >= y1) and (x4 <= x2) and (y4 <= y2)
-        # self.log_message.emit(f"检查区域框 ({x1}, {y1}, {x2}, {y2}) 是否完全包含bare框 ({x3}, {y3}, {x4}, {y4}): {result}")
-        return result
+            self.log_message.emit(f"加载区域文件 {zone_path} 时出错: {e}")
+            return ZoneSet([], (None, None), (self.width, self.height))
 
     def get_view_by_video_name(self, video_path):
         """根据视频文件名或RTSP地址确定使用哪个视角"""
@@ -243,19 +299,18 @@ class DetectorWorker(QObject):
         self.log_message.emit(f"[{current_time}] {video_name}: 成功加载{view_name}")
         return view_index
 
-    def _draw_detections(self, frame, bare_boxes, danger_boxes):
-        """绘制检测结果"""
-        # 绘制区域框
-        for box in self.area_boxes:
-            x1, y1, x2, y2 = map(int, box)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 255), 2)
-            cv2.putText(frame, "area", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+    def _draw_detections(self, frame, bare_boxes, danger_boxes, track_ids=None):
+        """绘制检测结果，track_ids与bare_boxes一一对应（可选）"""
+        t0 = time.perf_counter_ns()
+        # 绘制区域（矩形/多边形）
+        self.zone_set.draw(frame)
 
         # 绘制未戴手套框（蓝色）
-        for box in bare_boxes:
+        for i, box in enumerate(bare_boxes):
             x1, y1, x2, y2 = map(int, box)
+            label = f"bare #{track_ids[i]}" if track_ids is not None else "bare"
             cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
-            cv2.putText(frame, "bare", (x1, y1 - 10),
+            cv2.putText(frame, label, (x1, y1 - 10),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
 
         # 绘制危险框（红色）
@@ -279,4 +334,5 @@ class DetectorWorker(QObject):
             cv2.putText(frame, f"Duration: {int(alert_duration)}s", (50, 150),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
 
+        self._observe_stage("draw", self.metrics.draw_seconds, t0)
         return frame
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""
+事件推送：进程内发布/订阅 + 本机SSE端口。MES看板等可以直接订阅结构化的报警事件和（可选的）每帧检测摘要，不用再解析日志
+
+- 检测线程 publish 只向有界收件队列追加一次（该主题没有订阅者时直接返回），与订阅者数量无关
+- 分发线程把每个事件序列化一次（JSON），放进各订阅者的有界环形缓冲区。订阅者读得慢时丢弃最旧的事件并计数，不影响检测，也不影响其他订阅者
+- 主题：alert（报警）、detection（每帧检测摘要，量大，只在有订阅者时生成）
+
+事件格式（JSON，ts 为帧时间戳，本地视频为视频内时间；time 为发布时的系统时间）：
+    {"type": "alert", "stream": 3, "name": "1号线", "view": "视角1", "ts": 12.4, "time": 1757558400.1,
+     "areas": [0], "tracks": [{"id": 5, "box": [x1, y1, x2, y2], "areas": [0]}], "message": "...", "clip": "..."}
+    {"type": "detection", "stream": 3, "name": "1号线", "view": "视角1", "ts": 12.4, "time": 1757558400.1,
+     "seq": 310, "tracks": [{"id": 5, "box": [x1, y1, x2, y2], "areas": [0]}]}
+
+SSE（环境变量 GLOVE_EVENTS_PORT 设置端口后启用，服务模式用 --events-port）：
+    http://127.0.0.1:8092/events                              所有报警
+    http://127.0.0.1:8092/events?topics=alert,detection&streams=3,4
+    http://127.0.0.1:8092/                                    订阅者列表及各自丢弃的事件数
+    浏览器/看板: new EventSource(url).addEventListener("alert", e => JSON.parse(e.data))
+"""
+
+import itertools
+import json
+import threading
+import time
+from collections import deque, namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+TOPIC_ALERT = "alert"
+TOPIC_DETECTION = "detection"
+EVENTS_PORT_ENV = "GLOVE_EVENTS_PORT"
+INBOX_SIZE = 4096  # 分发线程来不及处理时最多积压的事件数
+SUBSCRIBER_BUFFER = 256  # 每个订阅者默认缓冲的事件数
+HEARTBEAT_SECONDS = 15.0  # SSE空闲时的保活间隔
+
+# seq: 发布序号（有间隔说明收件队列溢出）；payload: 事件字典（各订阅者共用，只读）；data: JSON文本
+BusEvent = namedtuple("BusEvent", ["seq", "topic", "payload", "data"])
+
+
+def make_event(topic, stream, name, view, ts, **fields):
+    """构造事件字典（stream/name/view/ts/time + 各主题自己的字段）"""
+    event = {"type": topic, "stream": stream, "name": name, "view": view, "ts": ts, "time": time.time()}
+    event.update(fields)
+    return event
+
+
+def track_summary(tracks):
+    """轨迹摘要：[{"id", "box", "areas"}]，areas 为最近一次更新时所在的区域索引"""
+    return [{"id": int(t.id), "box": [round(float(v), 1) for v in t.box[:4]], "areas": [int(a) for a in t.zones]}
+            for t in tracks]
+
+
+class Subscription:
+    """
+    一个订阅者（用 EventBus.subscribe 创建）
+    Args:
+        topics: 订阅的主题，None 为全部
+        streams: 只接收这些视频源的事件，None 为全部
+        maxlen: 缓冲区大小，满了丢弃最旧的事件
+    """
+
+    def __init__(self, bus, topics=None, streams=None, maxlen=SUBSCRIBER_BUFFER):
+        if maxlen < 1:
+            raise ValueError(f"缓冲区大小至少为1: {maxlen}")
+        self.topics = frozenset(topics) if topics else None
+        self.streams = frozenset(str(s) for s in streams) if streams else None
+        self.dropped = 0
+        self.closed = False
+        self._bus = bus
+        self._buffer = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+
+    def matches(self, topic, payload):
+        if self.topics is not None and topic not in self.topics:
+            return False
+        return self.streams is None or str(payload.get("stream")) in self.streams
+
+    def _push(self, event):
+        with self._cond:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(event)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """取出缓冲区中的全部事件（list[BusEvent]），没有事件时最多等待 timeout 秒，超时或已关闭返回空列表"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._buffer or self.closed, timeout)
+            events = list(self._buffer)
+            self._buffer.clear()
+            return events
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def close(self):
+        self._bus.unsubscribe(self)
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventBus:
+    """进程内发布/订阅（检测线程发布，订阅者在自己的线程里读取）"""
+
+    def __init__(self, inbox_size=INBOX_SIZE):
+        self._inbox = deque(maxlen=inbox_size)
+        self._wake = threading.Event()
+        self._seq = itertools.count(1)
+        self._subscribers = ()  # 写时复制，分发线程和 publish 不加锁读取
+        self._topics = frozenset()  # 有订阅者的主题（None 表示有订阅全部主题的订阅者）
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def has_subscribers(self, topic):
+        """该主题是否有订阅者：生成代价较高的事件（每帧检测摘要）前先判断"""
+        return topic in self._topics or None in self._topics
+
+    def publish(self, topic, payload):
+        """
+        发布事件（不阻塞），payload 发布后不能再修改
+        Returns:
+            bool: 是否有订阅者（没有时直接丢弃）
+        """
+        if not self.has_subscribers(topic):
+            return False
+        self._inbox.append((next(self._seq), topic, payload))
+        self._wake.set()
+        return True
+
+    def subscribe(self, topics=None, streams=None, maxlen=SUBSCRIBER_BUFFER):
+        subscription = Subscription(self, topics, streams, maxlen)
+        with self._lock:
+            self._subscribers = self._subscribers + (subscription,)
+            self._update_topics()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, name="EventBus", daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+            self._update_topics()
+
+    def _update_topics(self):
+        topics = set()
+        for s in self._subscribers:
+            topics.update(s.topics if s.topics is not None else (None,))
+        self._topics = frozenset(topics)
+
+    def subscribers(self):
+        return list(self._subscribers)
+
+    def _dispatch(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            while self._inbox:
+                seq, topic, payload = self._inbox.popleft()
+                event = None
+                for subscription in self._subscribers:
+                    if not subscription.matches(topic, payload):
+                        continue
+                    if event is None:  # 只序列化一次，所有订阅者共用
+                        data = json.dumps(payload, ensure_ascii=False, default=str)
+                        event = BusEvent(seq, topic, payload, data)
+                    subscription._push(event)
+
+
+BUS = EventBus()
+
+
+class _EventHandler(BaseHTTPRequestHandler):
+    bus = BUS
+    server_state = None  # {"stopping": bool}
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/":
+            body = json.dumps([{"topics": sorted(s.topics) if s.topics else None,
+                                "streams": sorted(s.streams) if s.streams else None,
+                                "pending": len(s), "dropped": s.dropped} for s in self.bus.subscribers()],
+                              ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if url.path != "/events":
+            self.send_error(404)
+            return
+
+        def values(name):
+            return [v for item in query.get(name, []) for v in item.split(",") if v]
+
+        topics = values("topics") or [TOPIC_ALERT]
+        if "all" in topics:
+            topics = None
+        with self.bus.subscribe(topics, values("streams")) as subscription:
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Access-Control-Allow-Origin", "*")  # 看板页面在其他端口/域名下
+                self.end_headers()
+                self.wfile.write(b"retry: 3000\n\n")
+                self.wfile.flush()
+                self._stream(subscription)
+            except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+                pass  # 订阅端断开
+
+    def _stream(self, subscription):
+        dropped = 0
+        while not self.server_state["stopping"]:
+            events = subscription.get(timeout=HEARTBEAT_SECONDS)
+            chunks = []
+            if subscription.dropped != dropped:
+                dropped = subscription.dropped
+                chunks.append(f"event: dropped\ndata: {json.dumps({'dropped': dropped})}\n\n")
+            for event in events:
+                chunks.append(f"id: {event.seq}\nevent: {event.topic}\ndata: {event.data}\n\n")
+            self.wfile.write(("".join(chunks) or ": keepalive\n\n").encode("utf-8"))
+            self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass  # 不输出访问日志
+
+
+class EventServer:
+    """
+    本机事件推送端口（SSE）
+    Args:
+        bus: EventBus，默认全局 BUS
+        host: 监听地址，默认只允许本机访问
+        port: 端口，0 表示自动分配
+    """
+
+    def __init__(self, bus=BUS, host="127.0.0.1", port=8092):
+        self._state = {"stopping": False}
+        handler = type("EventHandler", (_EventHandler,), {"bus": bus, "server_state": self._state})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="EventServer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._state["stopping"] = True
+        self._server.shutdown()
+        self._server.server_close()
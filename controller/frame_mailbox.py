@@ -0,0 +1,67 @@
+"""
+跨线程送帧的有界邮箱：检测线程放入画面，界面线程取出显示
+
+原来每帧一个排队信号（携带QImage副本），界面线程卡住时（模态对话框、大量重绘）事件队列无限增长，内存可涨到几个G。
+- 每路一个邮箱，容量固定（默认1，只保留最新一帧），满了丢弃最旧的帧并计数
+- 通知合并：邮箱从空变为非空时才发一次 ready 信号，界面线程取走之前不再发，
+  Qt事件队列里每路最多一个待处理的通知，内存占用与界面卡住多久无关
+"""
+
+import threading
+from collections import deque
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class FrameMailbox(QObject):
+    """
+    Args:
+        stream_id: 视频源ID，随 ready 信号发出
+        capacity: 最多缓存的帧数，满了丢弃最旧的
+        metrics: 可选 StreamMetrics，更新 queue_depth（邮箱中的帧数）和 display_dropped（被覆盖的帧数）
+    """
+    ready = pyqtSignal(int)  # 邮箱从空变为非空，参数为视频源ID
+
+    def __init__(self, stream_id, capacity=1, metrics=None, parent=None):
+        super().__init__(parent)
+        if capacity < 1:
+            raise ValueError(f"邮箱容量至少为1: {capacity}")
+        self.stream_id = stream_id
+        self.capacity = capacity
+        self.metrics = metrics
+        self.dropped = 0
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._notified = False  # 已发出 ready、界面线程还没取
+
+    def put(self, item):
+        """放入一帧（任意线程调用），返回是否丢弃了最旧的帧"""
+        with self._lock:
+            dropped = len(self._items) >= self.capacity
+            if dropped:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            notify = not self._notified
+            self._notified = True
+            if self.metrics is not None:
+                self.metrics.queue_depth.set(len(self._items))
+                if dropped:
+                    self.metrics.display_dropped.inc()
+        if notify:
+            self.ready.emit(self.stream_id)
+        return dropped
+
+    def take_all(self):
+        """取出全部帧（按放入顺序），之后再放入会重新通知"""
+        with self._lock:
+            items = list(self._items)
+            self._items.clear()
+            self._notified = False
+            if self.metrics is not None:
+                self.metrics.queue_depth.set(0)
+        return items
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
@@ -0,0 +1,145 @@
+"""
+精简推理路径：不构造 ultralytics Results 对象
+- bare 类别ID在加载模型时解析一次（与 VideoDetector.process_video 相同的按名称查找）
+- 预处理用每路预分配的 letterbox 缓冲区，模型原始输出直接在 numpy 数组上做阈值过滤和 NMS
+- 返回 float32 (N, 5) 数组 [x1, y1, x2, y2, score]（原始帧坐标），全程没有逐框的 Python 对象
+
+检测器接口：detect_bare(frame, conf) -> (N, 5) float32，基准测试的桩模型实现同样的接口
+"""
+
+import cv2
+import numpy as np
+
+from controller.letterbox import DEFAULT_IMGSZ, Letterbox
+
+BARE_CLASS = 'bare'
+
+
+def resolve_class_id(names, class_name=BARE_CLASS):
+    """类别名称 -> 类别ID，names 为 {id: name} 或列表，找不到返回 None"""
+    items = names.items() if isinstance(names, dict) else enumerate(names)
+    for class_id, name in items:
+        if name == class_name:
+            return int(class_id)
+    return None
+
+
+def postprocess_bare(pred, class_id, conf, iou=0.7, max_det=300):
+    """
+    YOLOv8 检测头原始输出 -> bare 框
+    Args:
+        pred: (4 + 类别数, 锚点数) 数组，前4行为 cx, cy, w, h（模型输入坐标），其余为各类别分数
+        class_id: bare 类别ID
+        conf: 分数阈值
+        iou: NMS 的IoU阈值（与ultralytics默认值一致）
+        max_det: 最多保留的框数
+    Returns:
+        (N, 5) float32 [x1, y1, x2, y2, score]（模型输入坐标），按分数从高到低
+    """
+    scores = pred[4 + class_id]
+    candidates = np.flatnonzero(scores >= conf)
+    if candidates.size:
+        # 与ultralytics一致：每个锚点只取分数最高的类别，bare不是最高类别的锚点丢弃
+        candidates = candidates[pred[4:, candidates].argmax(axis=0) == class_id]
+    if candidates.size == 0:
+        return np.zeros((0, 5), dtype=np.float32)
+
+    cx, cy, w, h = pred[:4, candidates]
+    scores = scores[candidates]
+    tlwh = np.stack([cx - w / 2, cy - h / 2, w, h], axis=1)
+    keep = np.asarray(cv2.dnn.NMSBoxes(tlwh, scores, conf, iou, top_k=max_det), dtype=np.int64).reshape(-1)
+
+    out = np.empty((keep.size, 5), dtype=np.float32)
+    out[:, 0:2] = tlwh[keep, 0:2]
+    out[:, 2:4] = tlwh[keep, 0:2] + tlwh[keep, 2:4]
+    out[:, 4] = scores[keep]
+    return out
+
+
+class LeanDetector:
+    """
+    Args:
+        yolo: ultralytics YOLO（.pt 或导出的 ONNX），只用其中的网络/权重
+        device: cuda/cpu
+        imgsz: 推理分辨率（按视频源设置）
+        fixed_imgsz: 固定输入尺寸模型（ONNX）的导出尺寸，设置后忽略 imgsz
+        half: 半精度推理（仅GPU上的 .pt）
+    """
+
+    def __init__(self, yolo, device='cpu', imgsz=None, fixed_imgsz=None, half=False, iou=0.7, max_det=300):
+        import torch
+        from ultralytics.nn.autobackend import AutoBackend
+
+        self._torch = torch
+        self.device = torch.device(device)
+        self.half = half
+        self.iou = iou
+        self.max_det = max_det
+        # AutoBackend 统一 .pt/ONNX 的前向调用（.pt 会融合卷积和BN，与ultralytics推理时一致）
+        self.backend = AutoBackend(weights=yolo.model, device=self.device, fp16=half, fuse=True, verbose=False)
+        self.backend.eval()
+        self.names = self.backend.names
+        self.bare_id = resolve_class_id(self.names)
+        if self.bare_id is None:
+            raise ValueError(f"模型类别中没有 '{BARE_CLASS}': {self.names}")
+        stride = max(int(getattr(self.backend, "stride", 32)), 32)
+        self.letterbox = Letterbox(fixed_imgsz or imgsz or DEFAULT_IMGSZ, stride=stride, auto=not fixed_imgsz)
+        self._input_src = None  # 上次转换为torch张量的letterbox缓冲区
+        self._input_cpu = None
+        self.supports_batch = not fixed_imgsz  # 导出的固定尺寸ONNX模型批大小为1
+        self._batch = None  # 批量推理的预分配缓冲区 (B, 3, H, W)
+        self._batch_cpu = None
+
+    @classmethod
+    def from_loaded(cls, loaded, imgsz=None):
+        """由 model_loader.load_model 的结果创建"""
+        kwargs = loaded.predict_kwargs
+        return cls(loaded.model, loaded.device, imgsz, kwargs.get("imgsz"), kwargs.get("half", False))
+
+    def detect_bare(self, frame, conf):
+        """
+        Args:
+            frame: BGR 原始帧
+            conf: 分数阈值
+        Returns:
+            (N, 5) float32 [x1, y1, x2, y2, score]，原始帧坐标
+        """
+        torch = self._torch
+        buffer = self.letterbox(frame)
+        if buffer is not self._input_src:
+            # 缓冲区只在视频尺寸变化时重新分配，共享内存的张量也只创建一次
+            self._input_src = buffer
+            self._input_cpu = torch.from_numpy(buffer)
+        pred = self._forward(self._input_cpu)[0]
+        return self.letterbox.scale_boxes(postprocess_bare(pred, self.bare_id, conf, self.iou, self.max_det))
+
+    def detect_bare_batch(self, frames, conf):
+        """
+        批量推理（同一视频的多帧，尺寸相同），返回每帧的 (N, 5) 数组列表
+        不支持批量的模型逐帧推理
+        """
+        if not self.supports_batch or len(frames) == 1:
+            return [self.detect_bare(frame, conf) for frame in frames]
+        torch = self._torch
+        self.letterbox(frames[0])  # 确定输入尺寸
+        shape = (len(frames), 3) + tuple(self.letterbox.input_shape)
+        if self._batch is None or self._batch.shape != shape:
+            self._batch = np.empty(shape, dtype=np.float32)
+            self._batch_cpu = torch.from_numpy(self._batch)
+        for i, frame in enumerate(frames):
+            self.letterbox(frame, out=self._batch[i:i + 1])
+        preds = self._forward(self._batch_cpu)
+        return [self.letterbox.scale_boxes(postprocess_bare(pred, self.bare_id, conf, self.iou, self.max_det))
+                for pred in preds]
+
+    def _forward(self, im):
+        """(B, 3, H, W) CPU张量 -> (B, 4 + 类别数, 锚点数) numpy"""
+        torch = self._torch
+        im = im.to(self.device, non_blocking=True)
+        if self.half:
+            im = im.half()
+        with torch.inference_mode():
+            out = self.backend(im)
+        if isinstance(out, (list, tuple)):
+            out = out[0]
+        return out.float().cpu().numpy() if isinstance(out, torch.Tensor) else np.asarray(out, dtype=np.float32)
@@ -0,0 +1,86 @@
+"""
+可复用的letterbox预处理（每路视频一个实例）
+- 等比缩放 + 灰边(114)填充，BGR->RGB，归一化到0~1，NCHW float32，与ultralytics的预处理一致
+- 缩放、画布、输入张量都预先分配，视频尺寸不变时每帧只写入已有内存
+- scale_boxes 把模型输出的框映射回原始帧坐标（与区域缩放使用同一个坐标系：原始帧像素）
+"""
+
+import math
+
+import cv2
+import numpy as np
+
+DEFAULT_IMGSZ = 640
+
+
+class Letterbox:
+    """
+    Args:
+        imgsz: 推理分辨率（长边），向上取整到 stride 的倍数
+        stride: 模型最大下采样倍数
+        auto: True 时只填充到 stride 的倍数（矩形输入，计算量更小）；False 时填充为 imgsz x imgsz（固定尺寸的ONNX模型）
+    """
+
+    def __init__(self, imgsz=DEFAULT_IMGSZ, stride=32, auto=True, pad_value=114):
+        self.imgsz = int(math.ceil(imgsz / stride) * stride)
+        self.stride = stride
+        self.auto = auto
+        self.pad_value = pad_value
+        self._src_shape = None
+        self.tensor = None
+
+    def _setup(self, h, w):
+        """视频尺寸变化时重新计算缩放参数并分配缓冲区"""
+        self.gain = min(self.imgsz / h, self.imgsz / w)
+        self.new_w, self.new_h = int(round(w * self.gain)), int(round(h * self.gain))
+        if self.auto:
+            out_w = self.new_w + (self.imgsz - self.new_w) % self.stride
+            out_h = self.new_h + (self.imgsz - self.new_h) % self.stride
+        else:
+            out_w = out_h = self.imgsz
+        dw, dh = (out_w - self.new_w) / 2, (out_h - self.new_h) / 2
+        self.left, self.top = int(round(dw - 0.1)), int(round(dh - 0.1))
+
+        self._resized = np.empty((self.new_h, self.new_w, 3), dtype=np.uint8)
+        self._canvas = np.full((out_h, out_w, 3), self.pad_value, dtype=np.uint8)
+        self._inner = self._canvas[self.top:self.top + self.new_h, self.left:self.left + self.new_w]
+        self.tensor = np.empty((1, 3, out_h, out_w), dtype=np.float32)
+        self._src_shape = (h, w)
+
+    @property
+    def input_shape(self):
+        """模型输入的 (高, 宽)，尚未处理过帧时为 None"""
+        return None if self.tensor is None else self.tensor.shape[2:]
+
+    def __call__(self, frame, out=None):
+        """
+        预处理一帧，返回预分配的 (1, 3, H, W) float32 数组（下一次调用会被覆盖）
+        out: 可选，写入指定的 (1, 3, H, W) 数组（批量推理时为批缓冲区的一个切片）
+        """
+        h, w = frame.shape[:2]
+        if self._src_shape != (h, w):
+            self._setup(h, w)
+        if (self.new_w, self.new_h) == (w, h):
+            np.copyto(self._inner, frame)
+        else:
+            cv2.resize(frame, (self.new_w, self.new_h), dst=self._resized, interpolation=cv2.INTER_LINEAR)
+            np.copyto(self._inner, self._resized)
+        # BGR->RGB + HWC->CHW + 归一化，直接写入输入张量
+        out = self.tensor if out is None else out
+        for c in range(3):
+            np.multiply(self._canvas[:, :, 2 - c], 1.0 / 255.0, out=out[0, c], casting='unsafe')
+        return out
+
+    def scale_boxes(self, boxes):
+        """
+        模型输入坐标 -> 原始帧坐标（原地修改并返回）
+        Args:
+            boxes: (N, >=4) float 数组，前4列为 xyxy
+        """
+        h, w = self._src_shape
+        boxes[:, [0, 2]] -= self.left
+        boxes[:, [1, 3]] -= self.top
+        boxes[:, :4] /= self.gain
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+        return boxes
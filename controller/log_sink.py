@@ -0,0 +1,227 @@
+"""
+日志落盘：后台线程把日志写入按大小滚动的压缩文件，并为每个文件维护时间索引
+
+文件格式：
+- xxx.log.gz  由多个独立的gzip成员拼接而成（可直接用 zcat 查看），每个成员是一批日志
+- xxx.idx     每行对应一个gzip成员: "首条时间戳\t末条时间戳\t字节偏移\t字节长度"
+检索时先读索引，只解压时间范围重叠的成员，不需要把整个文件读进内存
+"""
+
+import gzip
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+LOG_SUFFIX = ".log.gz"
+INDEX_SUFFIX = ".idx"
+
+
+def get_default_log_dir():
+    """默认日志目录：打包后放在exe旁边，开发环境放在项目根目录"""
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_path, "logs")
+
+
+class LogSink:
+    """异步日志写入器（write 只入队，不阻塞调用线程）"""
+
+    def __init__(self, log_dir=None, max_bytes=8 * 1024 * 1024, backup_count=200,
+                 block_lines=256, flush_interval=1.0, queue_size=10000):
+        self.log_dir = log_dir or get_default_log_dir()
+        self.max_bytes = max_bytes  # 单个文件大小上限，超过后滚动
+        self.backup_count = backup_count  # 最多保留的文件数
+        self.block_lines = block_lines  # 每个gzip成员最多包含的日志条数
+        self.flush_interval = flush_interval  # 最长多久落盘一次（秒）
+        self.dropped = 0  # 队列满时丢弃的日志条数
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = object()
+        self._file = None
+        self._index_file = None
+        self._segment_seq = 0
+
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="LogSink", daemon=True)
+        self._thread.start()
+
+    def write(self, message, ts=None):
+        """写入一条日志（线程安全）"""
+        try:
+            self._queue.put_nowait((ts if ts is not None else time.time(), message))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5.0):
+        """写完队列中剩余日志后关闭"""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(self._stop)
+        self._thread.join(timeout)
+
+    # ---------------------- 后台线程 ----------------------
+    def _run(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.time())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is self._stop:
+                if pending:
+                    self._write_block(pending)
+                self._close_segment()
+                return
+
+            if item is not None:
+                pending.append(item)
+                if deadline is None:
+                    deadline = time.time() + self.flush_interval
+
+            if pending and (len(pending) >= self.block_lines or time.time() >= deadline):
+                try:
+                    self._write_block(pending)
+                except Exception as e:
+                    print(f"日志落盘失败: {str(e)}")
+                pending = []
+                deadline = None
+
+    def _write_block(self, records):
+        """把一批日志压缩成一个gzip成员追加到当前文件，并记录索引"""
+        if self._file is None:
+            self._open_segment()
+
+        lines = [f"{ts:.3f}\t{json.dumps(msg, ensure_ascii=False)}" for ts, msg in records]
+        data = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"))
+        offset = self._file.tell()
+        self._file.write(data)
+        self._file.flush()
+        self._index_file.write(f"{records[0][0]:.3f}\t{records[-1][0]:.3f}\t{offset}\t{len(data)}\n")
+        self._index_file.flush()
+
+        if self._file.tell() >= self.max_bytes:
+            self._close_segment()
+            self._remove_old_segments()
+
+    def _open_segment(self):
+        self._segment_seq += 1
+        name = f"glove_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{self._segment_seq:04d}"
+        base = os.path.join(self.log_dir, name)
+        self._file = open(base + LOG_SUFFIX, "ab")
+        self._index_file = open(base + INDEX_SUFFIX, "a", encoding="utf-8")
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.close()
+            self._index_file.close()
+            self._file = None
+            self._index_file = None
+
+    def _remove_old_segments(self):
+        segments = list_segments(self.log_dir)
+        for base in segments[:max(0, len(segments) - self.backup_count)]:
+            for suffix in (LOG_SUFFIX, INDEX_SUFFIX):
+                try:
+                    os.remove(base + suffix)
+                except OSError:
+                    pass
+
+
+# ---------------------- 检索 ----------------------
+def list_segments(log_dir):
+    """按时间顺序返回所有日志文件（不含后缀）"""
+    if not os.path.isdir(log_dir):
+        return []
+    names = [f[:-len(INDEX_SUFFIX)] for f in os.listdir(log_dir) if f.endswith(INDEX_SUFFIX)]
+    return [os.path.join(log_dir, n) for n in sorted(names)]
+
+
+def _read_index(index_path):
+    entries = []
+    with open(index_path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split("\t")
+            if len(parts) != 4:
+                continue  # 写了一半的行（进程被强制结束）
+            entries.append((float(parts[0]), float(parts[1]), int(parts[2]), int(parts[3])))
+    return entries
+
+
+def search_logs(log_dir=None, keyword=None, start=None, end=None, limit=None):
+    """
+    检索日志
+    Args:
+        log_dir: 日志目录，默认 get_default_log_dir()
+        keyword: 关键字（子串匹配），None表示不过滤
+        start/end: 时间戳范围（秒），None表示不限
+        limit: 最多返回条数
+    Returns:
+        list: [(时间戳, 日志内容), ...]，按时间排序
+    """
+    log_dir = log_dir or get_default_log_dir()
+    results = []
+    for base in list_segments(log_dir):
+        blocks = [b for b in _read_index(base + INDEX_SUFFIX)
+                  if (start is None or b[1] >= start) and (end is None or b[0] <= end)]
+        if not blocks:
+            continue
+        with open(base + LOG_SUFFIX, "rb") as f:
+            for _, _, offset, length in blocks:
+                f.seek(offset)
+                try:
+                    text = gzip.decompress(f.read(length)).decode("utf-8")
+                except (OSError, EOFError):
+                    continue  # 成员损坏（异常退出时可能发生）
+                for line in text.splitlines():
+                    ts_text, _, msg_text = line.partition("\t")
+                    ts = float(ts_text)
+                    if (start is not None and ts < start) or (end is not None and ts > end):
+                        continue
+                    message = json.loads(msg_text)
+                    if keyword and keyword not in message:
+                        continue
+                    results.append((ts, message))
+                    if limit and len(results) >= limit:
+                        return results
+    return results
+
+
+def _parse_time(text):
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(text, fmt))
+        except ValueError:
+            continue
+    raise ValueError(f"无法解析时间: {text}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='检索落盘日志')
+    parser.add_argument('--dir', type=str, default=None, help='日志目录')
+    parser.add_argument('--keyword', type=str, default=None, help='关键字')
+    parser.add_argument('--start', type=str, default=None, help='开始时间，如 "2025-09-11 08:00"')
+    parser.add_argument('--end', type=str, default=None, help='结束时间')
+    parser.add_argument('--limit', type=int, default=None, help='最多输出条数')
+    args = parser.parse_args()
+
+    t0 = time.time()
+    records = search_logs(args.dir, args.keyword,
+                          _parse_time(args.start) if args.start else None,
+                          _parse_time(args.end) if args.end else None,
+                          args.limit)
+    for ts, message in records:
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))}] {message}")
+    print(f"共 {len(records)} 条，耗时 {time.time() - t0:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
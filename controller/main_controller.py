@@ -1,18 +1,36 @@
 # view/main_controller.py
+import json
 import os
 import sys
+import threading
 import time
 
-import cv2
 from PyQt6 import QtGui
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QObject, QTimer
 from PyQt6.QtGui import QStandardItemModel, QStandardItem, QImage
 from PyQt6.QtWidgets import QTreeWidgetItem, QMessageBox
 
 from model.db import Database, VideoSource
+from controller.log_sink import LogSink, get_default_log_dir
+from controller.preloader import ModulePreloader, format_timings
+from controller.resource_budget import configure_detector, pin_gui_thread, plan_budget
+from controller.detection_scheduler import DetectionScheduler, slots_for_plan
+from controller.frame_mailbox import FrameMailbox
+from controller.metrics import REGISTRY, MetricsServer, StreamMetrics
+from controller.stream_session import StreamSession
+from controller.event_bus import EVENTS_PORT_ENV, EventServer
+from controller.mjpeg_server import MJPEG_PORT_ENV, MjpegServer
+from controller.tracing import TRACER
 from view.dialogs import VideoSourceDialog, SceneDialog
 
 
+# 实时流（RTSP/摄像头）的暂停策略，环境变量 GLOVE_PAUSE_POLICY 选择，本地文件暂停时保持读取位置不受影响
+PAUSE_POLICY_ENV = "GLOVE_PAUSE_POLICY"
+PAUSE_DRAIN = "drain"      # 暂停期间继续grab丢弃（不解码，开销很小），连接保持、缓冲不积压，恢复立即出当前画面
+PAUSE_RELEASE = "release"  # 暂停时释放连接（长时间暂停、节省带宽），恢复时在后台立即重新连接
+PAUSE_POLICIES = (PAUSE_DRAIN, PAUSE_RELEASE)
+
+
 class DetectionThread(QThread):
     """视频检测线程（支持暂停/继续）"""
     log_signal = pyqtSignal(str)
@@ -20,24 +38,43 @@ class DetectionThread(QThread):
     frame_processed = pyqtSignal(int, QImage)  # 新增信号：帧处理完成
     rtsp_disconnected = pyqtSignal(int)  # 新增：RTSP断流信号，携带video_id
 
-    def __init__(self, video_source, model_path, interval):
+    def __init__(self, video_source, model_path, interval, model=None, pause_policy=None, resource_plan=None,
+                 scheduler=None):
         super().__init__()
         self.video_source = video_source
         self.model_path = model_path
+        self.model = model  # 可选：直接使用已加载的模型（基准测试用），为None时按model_path加载
         self.running = False  # 线程是否运行
         self.paused = False   # 线程是否暂停
         self.detector = None
         self.show_ui = True
-        self.interval = interval
-        self.cap = None       # 保存视频捕获对象，用于暂停后继续
+        self.interval = interval  # 没有检测调度时按固定间隔推理
+        self.scheduler = scheduler  # 检测调度：按风险优先级分配推理槽位
         self.frame_pos = 0    # 记录当前帧位置（用于文件视频）
+        self.metrics = StreamMetrics(video_source.id)  # 运行指标
+        self.resource_plan = resource_plan  # CPU线程预算（None时用各库默认线程数）
+        # 打开/读取/断流/调度/帧时间戳与服务模式共用（保存视频捕获对象，用于暂停后继续）
+        self.session = StreamSession(video_source, self.metrics, scheduler=scheduler, interval=interval,
+                                     resource_plan=resource_plan)
+        # 处理后的画面经有界邮箱送到界面线程（只保留最新一帧），界面卡住时不会堆积
+        self.mailbox = FrameMailbox(video_source.id, metrics=self.metrics)
+        self.mailbox.ready.connect(self._deliver_frames)
+        self._resumed = threading.Event()  # 恢复/停止时唤醒暂停等待
+        self._reopen = None  # release 策略恢复时在后台重新连接的线程
+        self._reopened_cap = None
+        self.pause_policy = (pause_policy or os.environ.get(PAUSE_POLICY_ENV, PAUSE_DRAIN)).lower()
+        if self.pause_policy not in PAUSE_POLICIES:
+            raise ValueError(f"未知的暂停策略: {self.pause_policy}，可选 {', '.join(PAUSE_POLICIES)}")
 
     def run(self):
         self.running = True
         self.paused = False
+        threading.current_thread().name = f"DetectionThread-{self.video_source.id}"  # 追踪文件中的线程名
         self.log_signal.emit(f"开始处理视频: {self.video_source.name}")
 
         try:
+            self.session.start()
+            # 重模块（cv2/torch/ultralytics）在这里才导入，不拖慢启动；窗口显示后已由后台预加载
             from .detector_worker import DetectorWorker
             from .video_view_mapping import get_view_for_video, get_view_name
             
@@ -53,54 +90,68 @@ class DetectionThread(QThread):
             self.detector = DetectorWorker(self.model_path,
                                            self.video_source.name,  # 或改为self.video_source.path
                                            view_index,  # 直接传递已计算好的视角索引
-                                           self.video_source.alert_email)# 新增：报警邮箱
+                                           self.video_source.alert_email,# 新增：报警邮箱
+                                           stream_id=self.video_source.id,
+                                           model=self.model,
+                                           imgsz=self.video_source.imgsz)
             self.detector.log_message.connect(self.log_signal)
             self.detector.alert_message.connect(self.alert_signal)
+            if self.resource_plan is not None and configure_detector(self.detector.model, self.resource_plan):
+                self.log_signal.emit(f"{self.video_source.name}: onnxruntime推理线程数 {self.resource_plan.inference_threads}")
 
-            # 连接检测器的帧处理完成信号
-            self.detector.proc_frame_ready.connect(
-                lambda img: self.frame_processed.emit(self.video_source.id, img)
-            )
+            # 连接检测器的帧处理完成信号：在检测线程里直接放入邮箱，不经过Qt事件队列
+            self.detector.proc_frame_ready.connect(self.mailbox.put, Qt.ConnectionType.DirectConnection)
 
             # 视频处理主循环（RTSP断流时不退出，循环重连）
             while self.running:
-                # 暂停逻辑：暂停时休眠，不占用CPU
-                while self.paused and self.running:
-                    self.msleep(100)
+                # 暂停逻辑：按暂停策略处理实时流，恢复后读到的第一帧就是当前画面
+                if self.paused and self.running:
+                    self._wait_paused()
                     continue
 
                 # 打开视频源（如果是首次运行或视频已关闭）
+                if self._reopen is not None:
+                    self._take_reopened()  # 没进入暂停等待就恢复了（如断流重连期间暂停）
                 if not self.cap or not self.cap.isOpened():
                     self.log_signal.emit(f"尝试连接视频源: {self.video_source.name}")
-                    self.cap = cv2.VideoCapture(self.video_source.path)
-                    # RTSP连接需要时间，等待1秒确认是否成功
-                    time.sleep(1)
-
-                    if not self.cap.isOpened():
+                    opened = self.session.open()
+                    if opened:
+                        # RTSP连接需要时间，等待1秒确认是否成功
+                        time.sleep(1)
+                        opened = self.cap.isOpened()
+                        if not opened:
+                            self.session.disconnected()
+                    if not opened:
                         self.log_signal.emit(f"连接失败，3秒后重试: {self.video_source.name}")
                         self.rtsp_disconnected.emit(self.video_source.id)  # 发送断流通知
                         self.msleep(3000)  # 3秒后再重试，避免频繁重试
                         continue  # 不退出循环，继续尝试重连
 
                 # 2. 连接成功后，读取帧并处理
-                ret, frame = self.cap.read()
-                if not ret:
+                frame = self.session.read()
+                if frame is None:
+                    # 已释放无效连接，下一轮重连
                     self.log_signal.emit(f"帧读取失败，尝试重连: {self.video_source.name}")
                     self.rtsp_disconnected.emit(self.video_source.id)
-                    self.cap.release()  # 释放无效连接
-                    self.cap = None  # 标记为未连接，触发下一轮重连
                     self.msleep(2000)
                     continue  # 不退出循环，继续重连
+                seq = self.frame_count = self.session.seq
 
-                # 3. 按间隔处理帧（避免每帧都处理，降低CPU占用）
-                self.frame_count = getattr(self, 'frame_count', 0) + 1
-                if self.frame_count % self.interval == 0:
+                # 3. 按调度（或固定间隔）处理帧（避免每帧都处理，降低CPU占用）
+                if self.session.should_process(seq):
                     try:
-                        self.detector.process_frame(frame)
+                        self.metrics.frames_processed.inc()
+                        with TRACER.span("process_frame", self.video_source.id, seq):
+                            self.detector.process_frame(frame, seq, self.session.timestamp())
                     except Exception as e:
                         self.log_signal.emit(f"帧处理错误: {str(e)}")
                         import traceback
                         self.log_signal.emit(f"错误详情: {traceback.format_exc()}")
+                    finally:
+                        self.session.release_slot(self.detector.risk)
+                else:
+                    # 跳过的帧上轨迹按速度外推，保持跟踪连续
+                    self.detector.advance_tracks()
 
                 # 4. 控制帧率（避免读取过快）
                 time.sleep(0.01)
@@ -111,28 +162,106 @@ class DetectionThread(QThread):
             self.log_signal.emit(f"异常详情: {traceback.format_exc()}")
         finally:
             # 只有线程完全停止时，才释放资源
-            if not self.running and self.cap:
+            if not self.running:
+                self.session.finish()
+            elif self.scheduler is not None:
+                self.scheduler.unregister(self.video_source.id)
+            if not self.running and self.detector:
+                self.detector.close()
+            # self.log_signal.emit(f"停止处理视频: {self.video_source.name}")
+
+
+    @property
+    def cap(self):
+        """当前的视频捕获对象（由 session 管理）"""
+        return self.session.cap
+
+    @cap.setter
+    def cap(self, cap):
+        self.session.cap = cap
+
+    def _wait_paused(self):
+        """
+        暂停期间的处理，恢复（或停止）时返回
+        - 本地文件：休眠，保持读取位置
+        - drain：持续grab丢弃，grab按视频源帧率阻塞，不需要额外休眠；断流则释放，恢复后走重连流程
+        - release：释放连接；恢复时 resume() 已在后台开始重新连接，这里接过连好的视频源，主循环直接读帧
+        """
+        self.session.mark_disconnected()
+        live = self.video_source.type != 1
+        if live and self.pause_policy == PAUSE_RELEASE and self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        while self.paused and self.running:
+            if live and self.cap is not None and self.pause_policy == PAUSE_DRAIN:
+                if self.cap.grab():
+                    self.metrics.frames_drained.inc()
+                    continue
                 self.cap.release()
                 self.cap = None
-            # self.log_signal.emit(f"停止处理视频: {self.video_source.name}")
+            self._resumed.wait(0.1)
+        if self._reopen is not None:
+            self._take_reopened()
+        if live and self.detector is not None:
+            self.detector.reset_tracks()  # 暂停前的轨迹位置已失效
+
+    def _reopen_capture(self):
+        """后台线程：恢复时重新连接视频源（RTSP连接耗时，不占用界面线程，也不等检测线程醒来）"""
+        try:
+            self._reopened_cap = self.session.create_capture()
+        except Exception as e:
+            self._reopened_cap = None
+            self.log_signal.emit(f"恢复时重新连接失败: {self.video_source.name} - {str(e)}")
+
+    def _take_reopened(self):
+        """检测线程：等后台连接完成，连上了就作为当前连接，否则交给主循环的重连流程"""
+        self._reopen.join()
+        self._reopen = None
+        cap, self._reopened_cap = self._reopened_cap, None
+        if cap is None:
+            return
+        if self.running and self.cap is None and cap.isOpened():
+            self.cap = cap
+        else:
+            cap.release()
 
+    def _deliver_frames(self, video_id):
+        """界面线程：取出邮箱中的帧转发给界面（邮箱的通知是合并的，每路最多一个待处理）"""
+        for img in self.mailbox.take_all():
+            self.frame_processed.emit(video_id, img)
 
     def pause(self):
         """暂停线程"""
+        self._resumed.clear()
         self.paused = True
-        self.log_signal.emit(f"暂停处理视频: {self.video_source.name}")
+        policy = f"（{self.pause_policy}）" if self.video_source.type != 1 else ""
+        self.log_signal.emit(f"暂停处理视频: {self.video_source.name}{policy}")
 
     def resume(self):
-        """继续线程"""
+        """继续线程（release 策略的实时流在后台立即重新连接，检测线程醒来时直接读帧）"""
+        if (self.paused and self.running and self.video_source.type != 1 and self.pause_policy == PAUSE_RELEASE
+                and self.cap is None and self._reopen is None):
+            self._reopen = threading.Thread(target=self._reopen_capture, daemon=True,
+                                            name=f"Reopen-{self.video_source.id}")
+            self._reopen.start()
         self.paused = False
+        self._resumed.set()
         self.log_signal.emit(f"继续处理视频: {self.video_source.name}")
 
-    def stop(self):
-        """完全停止线程（释放资源）"""
+    def request_stop(self):
+        """通知线程停止，不等待"""
         self.running = False
         self.paused = False
+        self._resumed.set()
+
+    def stop(self):
+        """完全停止线程（释放资源）"""
+        self.request_stop()
         self.wait()
 
+METRICS_PORT = 9108  # 指标抓取端口（仅监听本机）
+
+
 def get_resource_path(relative_path):
     if getattr(sys, 'frozen', False):
         base_path = sys._MEIPASS
@@ -147,17 +276,51 @@ class MainController(QObject):
     video_added = pyqtSignal(int, str)  # 新增视频信号 (video_id, name)
     video_removed = pyqtSignal(int)  # 移除视频信号 (video_id)
 
-    def __init__(self, main_window):
+    def __init__(self, main_window, db_path=None, detector_factory=None, log_dir=None):
+        """
+        Args:
+            db_path: 数据库文件路径，默认 model/monitor.db（压力测试用临时数据库）
+            detector_factory: 可选，detector_factory(video_source) 返回检测器（压力测试用桩模型），默认按模型路径加载
+            log_dir: 日志落盘目录，默认 logs/
+        """
         super().__init__()  # 初始化QObject
         self.main_window = main_window
-        self.db = Database()
+        self.db = Database(db_path) if db_path else Database()
         self.current_scene_id = None
         self.detection_threads =  {}  # 改为字典存储 {video_id: DetectionThread}
         self.model_path = get_resource_path("../model/best.pt")
+        self.detector_factory = detector_factory
 
         # 初始化日志模型
         self.log_model = QStandardItemModel()
         self.main_window.log_box.setModel(self.log_model)
+        # 日志落盘（后台线程写入，界面关闭后仍可检索）
+        self.log_sink = LogSink(log_dir)
+        # 运行指标：本机抓取端口 + 主界面统计表
+        self.metrics_server = None
+        try:
+            self.metrics_server = MetricsServer(port=METRICS_PORT, routes={"/trace": self._trace_route}).start()
+        except OSError as e:
+            self.log(f"指标端口 {METRICS_PORT} 启动失败: {str(e)}")
+        # 远程观看（MJPEG）：设置 GLOVE_MJPEG_PORT 后启动，局域网内浏览器可查看各路标注画面
+        self.mjpeg_server = None
+        mjpeg_port = int(os.environ.get(MJPEG_PORT_ENV, 0))
+        if mjpeg_port:
+            try:
+                self.mjpeg_server = MjpegServer(port=mjpeg_port).start()
+            except OSError as e:
+                self.log(f"远程观看端口 {mjpeg_port} 启动失败: {str(e)}")
+        # 事件推送（SSE）：设置 GLOVE_EVENTS_PORT 后启动，本机看板可订阅报警事件和每帧检测摘要
+        self.events_server = None
+        events_port = int(os.environ.get(EVENTS_PORT_ENV, 0))
+        if events_port:
+            try:
+                self.events_server = EventServer(port=events_port).start()
+            except OSError as e:
+                self.log(f"事件推送端口 {events_port} 启动失败: {str(e)}")
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.refresh_stats)
+        self.stats_timer.start(1000)
 
         # 初始化UI和信号连接
         self.init_ui()
@@ -168,6 +331,25 @@ class MainController(QObject):
         self.video_frame_updated.connect(main_window.update_video_frame)
         # 将控制器设置到窗口
         self.main_window.controller = self
+        # 重模块在窗口显示后由 start_preload() 后台加载
+        self.preloader = None
+        self.resource_plan = None  # CPU线程预算，开始检测时按路数计算
+        self.scheduler = DetectionScheduler()  # 各路共用的推理槽位，槽位数随CPU预算更新
+
+    def start_preload(self):
+        """窗口显示后调用：后台导入cv2/torch/ultralytics等，进度显示在状态栏"""
+        self.preloader = ModulePreloader(parent=self)
+        self.preloader.progress.connect(self._on_preload_progress)
+        self.preloader.loaded.connect(self._on_preload_finished)
+        self.preloader.start()
+
+    def _on_preload_progress(self, done, total, label):
+        if done < total:
+            self.main_window.statusBar().showMessage(f"正在加载{label}... ({done}/{total})")
+
+    def _on_preload_finished(self, timings):
+        self.main_window.statusBar().showMessage("检测模块加载完成", 3000)
+        self.log(f"后台加载完成: {format_timings(timings)}")
 
     def init_ui(self):
         """初始化UI数据"""
@@ -308,7 +490,8 @@ class MainController(QObject):
                     scene_id=video_info["scene_id"],
                     type=video_info["type"],
                     is_valid=True,  # 新增：设置有效性
-                    alert_email = video_info["alert_email"]  # 新增：添加报警邮箱
+                    alert_email = video_info["alert_email"],  # 新增：添加报警邮箱
+                    imgsz=video_info["imgsz"]
                 )
 
                 video_id = self.db.add_video_source(video)
@@ -375,7 +558,8 @@ class MainController(QObject):
                     is_valid=True,  # 更新连接状态
                     scene_id=self.current_scene_id,
                     type=updated_info["type"],
-                    alert_email=updated_info["alert_email"]
+                    alert_email=updated_info["alert_email"],
+                    imgsz=updated_info["imgsz"]
                 )
 
                 if self.db.update_video_source(updated_video):
@@ -411,6 +595,7 @@ class MainController(QObject):
 
             self.log(f"开始对 {len(selected_videos)} 个视频源进行检测...")
             frame_interval = min(5, max(3, len(selected_videos) // 2))
+            self._update_resource_plan(set(self.detection_threads) | {video.id for video in selected_videos})
 
             # 为每个选中的视频源创建或恢复检测线程
             for video in selected_videos:
@@ -422,7 +607,9 @@ class MainController(QObject):
                             thread.resume()
                     else:
                         # 创建新线程
-                        thread = DetectionThread(video, self.model_path, frame_interval)
+                        thread = DetectionThread(video, self.model_path, frame_interval,
+                                                 model=self._create_detector(video),
+                                                 resource_plan=self.resource_plan, scheduler=self.scheduler)
                         thread.log_signal.connect(self.log)
                         thread.alert_signal.connect(lambda msg, vid=video.name:
                                                     self.log(f"[报警] {vid}: {msg}"))
@@ -456,6 +643,21 @@ class MainController(QObject):
             QMessageBox.critical(self.main_window, "错误", f"启动检测失败: {str(e)}")
 
 
+    def _update_resource_plan(self, stream_ids):
+        """
+        按同时检测的路数重新分配CPU线程预算（已在运行的线程保持原设置，新线程使用新预算）
+        界面线程只做绑核；OpenCV/torch 的进程级设置要导入重模块，由新检测线程开始时设置
+        """
+        self.resource_plan = plan_budget(len(stream_ids))
+        for note in pin_gui_thread(self.resource_plan):
+            self.log(note)
+        self.scheduler.slots = slots_for_plan(self.resource_plan)
+        self.log(f"{self.resource_plan.describe()}，推理槽位 {self.scheduler.slots}")
+
+    def _create_detector(self, video):
+        """外部注入的检测器（没有时返回None，由检测线程按模型路径加载）"""
+        return self.detector_factory(video) if self.detector_factory else None
+
     def handle_rtsp_disconnect(self, video_id):
         """处理RTSP断流：通知UI并触发重连"""
         self.log(f"RTSP断流: 视频源ID={video_id}，将自动重连")
@@ -492,13 +694,14 @@ class MainController(QObject):
             self.log(f"重连跳过: 视频 {video.name} 未选中检测（is_true={video.is_true}）")
             return
 
-        # 4. 停止旧线程（如果存在）
-        self.stop_video_detection(video_id)  # 封装成通用方法，停止并清理线程
+        # 4. 停止旧线程（如果存在），指标保留给新线程继续累计
+        self.stop_video_detection(video_id, keep_metrics=True)  # 封装成通用方法，停止并清理线程
 
         # 5. 创建新线程并重连
         try:
             frame_interval = min(5, max(3, len(self.db.get_videos_by_scene(self.current_scene_id)) // 2))
-            new_thread = DetectionThread(video, self.model_path, frame_interval)
+            new_thread = DetectionThread(video, self.model_path, frame_interval, model=self._create_detector(video),
+                                         resource_plan=self.resource_plan, scheduler=self.scheduler)
             # 重新连接信号
             new_thread.log_signal.connect(self.log)
             new_thread.alert_signal.connect(lambda msg, vid=video.name: self.log(f"[报警] {vid}: {msg}"))
@@ -526,16 +729,21 @@ class MainController(QObject):
 
     """停止所有检测线程"""
     def stop_all_detections(self):
+        # 先通知所有线程停止，各线程同时收尾，总等待时间不随路数累加
+        for thread in self.detection_threads.values():
+            thread.request_stop()
         for video_id in list(self.detection_threads.keys()):
             self.stop_video_detection(video_id)
         self.detection_threads.clear()
 
     """停止指定视频的检测"""
-    def stop_video_detection(self, video_id):
+    def stop_video_detection(self, video_id, keep_metrics=False):
         if video_id in self.detection_threads:
             thread = self.detection_threads[video_id]
             if thread.isRunning():
                 thread.stop()  # 等待线程完全停止
+            if not keep_metrics:
+                thread.metrics.remove()  # 不再导出已停止视频源的指标
             del self.detection_threads[video_id]
             self.video_removed.emit(video_id)
             self.log(f"已停止视频源 {video_id} 的检测线程")
@@ -544,11 +752,29 @@ class MainController(QObject):
     def on_frame_processed(self, video_id, qimage):
         self.video_frame_updated.emit(video_id, qimage)
 
+    """指标端口上的 /trace：导出追踪数据（Chrome/Perfetto格式），?clear=1 导出后清空"""
+    def _trace_route(self, query):
+        trace = TRACER.to_chrome_trace()
+        if query.get("clear") == ["1"]:
+            TRACER.clear()
+        return "application/json", json.dumps(trace, ensure_ascii=False).encode("utf-8")
+
+    """刷新主界面的运行统计表"""
+    def refresh_stats(self):
+        rows = REGISTRY.stream_rows()
+        table = []
+        for video_id, thread in self.detection_threads.items():
+            row = rows.get(str(video_id))
+            if row:
+                table.append((thread.video_source.name, row))
+        self.main_window.update_stats_table(table)
+
     def log(self, message):
         """添加日志信息"""
         timestamp = time.strftime("%H:%M:%S")
         log_message = f"[{timestamp}] {message}"
         item = QStandardItem(log_message)
+        self.log_sink.write(message)
 
         # 如果是报警信息，设置为红色
         if "[报警]" in log_message:
@@ -574,6 +800,19 @@ class MainController(QObject):
     #     self.main_window.log_box.scrollToBottom()
 
     def cleanup(self):
+        if self.preloader is not None:
+            # import 无法中断，等它结束再退出，否则线程对象销毁时还在运行
+            self.preloader.wait()
         self.stop_all_detections()
         if hasattr(self, 'db'):
-            self.db.close()
\ No newline at end of file
+            self.db.close()
+        if getattr(self, 'metrics_server', None):
+            self.metrics_server.stop()
+        if getattr(self, 'mjpeg_server', None):
+            self.mjpeg_server.stop()
+        if getattr(self, 'events_server', None):
+            self.events_server.stop()
+        if TRACER.enabled:
+            TRACER.dump(os.path.join(get_default_log_dir(), f"trace_{time.strftime('%Y%m%d_%H%M%S')}.json"))
+        if hasattr(self, 'log_sink'):
+            self.log_sink.close()
\ No newline at end of file
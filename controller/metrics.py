@@ -0,0 +1,225 @@
+"""
+运行指标：每个视频源的采集帧率、各阶段耗时、队列深度、丢帧、重连、报警次数
+- 热路径上只做整数/浮点累加，不加锁（每个指标只由一个线程写入）
+- 通过 MetricsServer 以 Prometheus 文本格式暴露在本机端口上
+- 主界面的统计表通过 REGISTRY.stream_rows() 获取汇总数据
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# 耗时直方图的桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+
+class Counter:
+    """只增计数器"""
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+
+class Gauge:
+    """可增可减的瞬时值"""
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, n=1):
+        self.value += n
+
+    def dec(self, n=1):
+        self.value -= n
+
+
+class Histogram:
+    """固定桶直方图，observe 只做一次二分查找和三次累加"""
+    kind = "histogram"
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个是 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """指标注册表，指标按 (名称, 视频源) 唯一"""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # 只保护注册，不保护更新
+        self._metrics = {}  # {(name, stream): metric}
+        self._help = {}  # {name: (kind, help)}
+        self._last_hist = {}  # stream_rows 用于计算区间均值 {(name, stream): (sum, count)}
+
+    def _get(self, cls, name, help_text, stream, **kwargs):
+        key = (name, None if stream is None else str(stream))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = cls(**kwargs)
+                    self._metrics[key] = metric
+                    self._help.setdefault(name, (cls.kind, help_text))
+        return metric
+
+    def counter(self, name, help_text="", stream=None):
+        return self._get(Counter, name, help_text, stream)
+
+    def gauge(self, name, help_text="", stream=None):
+        return self._get(Gauge, name, help_text, stream)
+
+    def histogram(self, name, help_text="", stream=None, buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, stream, buckets=buckets)
+
+    def remove_stream(self, stream):
+        """视频源停止后移除其指标"""
+        stream = str(stream)
+        with self._lock:
+            for key in [k for k in self._metrics if k[1] == stream]:
+                del self._metrics[key]
+                self._last_hist.pop(key, None)
+
+    def render_prometheus(self):
+        """生成 Prometheus 文本格式"""
+        with self._lock:
+            items = sorted(self._metrics.items(), key=lambda kv: (kv[0][0], kv[0][1] or ""))
+            help_map = dict(self._help)
+        lines = []
+        last_name = None
+        for (name, stream), metric in items:
+            if name != last_name:
+                kind, help_text = help_map[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                last_name = name
+            label = f'stream="{stream}"' if stream is not None else ""
+            if metric.kind == "histogram":
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float("inf"),), list(metric.counts)):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    sep = "," if label else ""
+                    lines.append(f'{name}_bucket{{{label}{sep}le="{le}"}} {cumulative}')
+                braces = f"{{{label}}}" if label else ""
+                lines.append(f"{name}_sum{braces} {metric.sum}")
+                lines.append(f"{name}_count{braces} {metric.count}")
+            else:
+                lines.append(f"{name}{{{label}}} {metric.value}" if label else f"{name} {metric.value}")
+        return "\n".join(lines) + "\n"
+
+    def stream_rows(self):
+        """
+        主界面统计表数据：每个视频源一行
+        Returns:
+            dict: {stream: {指标名: 值}}，直方图取上次调用以来的平均耗时（毫秒）
+        """
+        with self._lock:
+            items = list(self._metrics.items())
+        rows = {}
+        for (name, stream), metric in items:
+            if stream is None:
+                continue
+            row = rows.setdefault(stream, {})
+            if metric.kind == "histogram":
+                last_sum, last_count = self._last_hist.get((name, stream), (0.0, 0))
+                total, count = metric.sum, metric.count
+                self._last_hist[(name, stream)] = (total, count)
+                row[name] = (total - last_sum) / (count - last_count) * 1000 if count > last_count else None
+            else:
+                row[name] = metric.value
+        return rows
+
+
+# 全局注册表
+REGISTRY = MetricsRegistry()
+
+
+class StreamMetrics:
+    """单个视频源的全部指标，避免在热路径上反复查表"""
+
+    def __init__(self, stream, registry=REGISTRY):
+        self.stream = stream
+        self.registry = registry
+        r = registry
+        self.capture_fps = r.gauge("glove_capture_fps", "视频采集帧率", stream)
+        self.frames_read = r.counter("glove_frames_read_total", "读取的帧数", stream)
+        self.frames_processed = r.counter("glove_frames_processed_total", "送入检测的帧数", stream)
+        self.frames_dropped = r.counter("glove_frames_dropped_total", "丢弃的帧数（读取失败等）", stream)
+        self.frames_drained = r.counter("glove_frames_drained_total", "暂停期间只grab不解码丢弃的帧数", stream)
+        self.decode_seconds = r.histogram("glove_decode_seconds", "读取解码耗时", stream)
+        self.inference_seconds = r.histogram("glove_inference_seconds", "模型推理耗时", stream)
+        self.postprocess_seconds = r.histogram("glove_postprocess_seconds", "后处理耗时（提取框、区域判断、报警）", stream)
+        self.draw_seconds = r.histogram("glove_draw_seconds", "绘制检测结果耗时", stream)
+        self.queue_depth = r.gauge("glove_frame_queue_depth", "等待界面显示的帧数（送帧邮箱中）", stream)
+        self.display_dropped = r.counter("glove_display_dropped_total", "界面来不及显示、被新帧覆盖的帧数", stream)
+        self.reconnects = r.counter("glove_reconnects_total", "重连次数", stream)
+        self.alerts = r.counter("glove_alerts_total", "报警次数", stream)
+        self.risk = r.gauge("glove_stream_risk", "调度风险等级（-1断流 0空闲 1区域附近有bare 2正在累计报警）", stream)
+        self.schedule_skipped = r.counter("glove_schedule_skipped_total", "未分到推理槽位（或超过空闲帧率上限）跳过的帧数", stream)
+
+    def remove(self):
+        """视频源彻底停止时调用：从注册表移除，/metrics 不再导出已停止的视频源"""
+        self.registry.remove_stream(self.stream)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+    routes = {}
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/metrics":
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+            body = self.registry.render_prometheus().encode("utf-8")
+        elif url.path in self.routes:
+            content_type, body = self.routes[url.path](parse_qs(url.query))
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 不输出访问日志
+
+
+class MetricsServer:
+    """
+    本机指标抓取端口: http://127.0.0.1:<port>/metrics
+    routes: 额外的路径 {"/path": func(query_dict) -> (content_type, body_bytes)}
+    """
+
+    def __init__(self, registry=REGISTRY, host="127.0.0.1", port=9108, routes=None):
+        handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry, "routes": dict(routes or {})})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
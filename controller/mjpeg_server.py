@@ -0,0 +1,286 @@
+"""
+远程观看：内嵌HTTP服务，把每路的标注画面以MJPEG输出，主管在自己电脑的浏览器里打开
+
+- 检测线程只把标注后的帧引用交给 HUB（没有客户端时直接返回，不拷贝不编码）
+- 编码在客户端连接的线程里按需进行：每路每一帧、每种(质量, 宽度)只编码一次，结果供所有客户端共用，与客户端数量无关
+- 每个客户端可单独指定帧率、宽度和质量（质量和宽度按档位取整，限制编码种类）
+- 慢客户端发完上一帧后直接取最新帧，中间的帧跳过，服务端不为客户端缓存帧
+
+地址（默认端口8091，环境变量 GLOVE_MJPEG_PORT 设置端口后启用）：
+    http://<本机IP>:8091/                                   各路画面的网页
+    http://<本机IP>:8091/stream/<视频源ID>.mjpg?fps=5&width=640&quality=70
+    http://<本机IP>:8091/snapshot/<视频源ID>.jpg?width=960
+    http://<本机IP>:8091/streams.json                       各路客户端数、发布帧数、编码次数
+"""
+
+import html
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+MJPEG_PORT_ENV = "GLOVE_MJPEG_PORT"
+BOUNDARY = "glovemjpeg"
+QUALITY_LEVELS = (30, 40, 50, 60, 70, 80, 90)
+WIDTH_LEVELS = (320, 480, 640, 960, 1280)  # 不在档位内的宽度取不超过它的最大档位，0 表示原始尺寸
+DEFAULT_QUALITY = 70
+DEFAULT_FPS = 10.0
+MAX_FPS = 30.0
+
+
+def quantize_quality(quality):
+    return min(QUALITY_LEVELS, key=lambda q: abs(q - quality))
+
+
+def quantize_width(width):
+    if not width:
+        return 0
+    fitting = [w for w in WIDTH_LEVELS if w <= width]
+    return fitting[-1] if fitting else WIDTH_LEVELS[0]
+
+
+class _Channel:
+    """一路画面：最新一帧 + 各编码档位的缓存"""
+
+    def __init__(self, name):
+        self.name = name
+        self.frame = None
+        self.seq = 0
+        self.clients = 0
+        self.closed = False
+        self.encodes = 0
+        self.cache = {}  # (质量, 宽度) -> (帧序号, jpeg)
+        self.cond = threading.Condition()
+        self.encode_lock = threading.Lock()  # 编码不持有 cond，不阻塞检测线程发布
+
+
+class FrameHub:
+    """各路最新标注画面的发布点（检测线程发布，HTTP客户端线程读取）"""
+
+    def __init__(self):
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def open(self, stream_id, name=None):
+        """检测开始时登记一路（重复登记会保留已连接的客户端）"""
+        with self._lock:
+            channel = self._channels.get(stream_id)
+            if channel is None or channel.closed:
+                channel = self._channels[stream_id] = _Channel(name or str(stream_id))
+            elif name:
+                channel.name = name
+        return channel
+
+    def close(self, stream_id):
+        """检测结束：通知该路的客户端断开"""
+        with self._lock:
+            channel = self._channels.pop(stream_id, None)
+        if channel is not None:
+            with channel.cond:
+                channel.closed = True
+                channel.cond.notify_all()
+
+    def has_clients(self, stream_id):
+        channel = self._channels.get(stream_id)
+        return channel is not None and channel.clients > 0
+
+    def publish(self, stream_id, frame):
+        """
+        发布一帧标注画面（BGR），调用方之后不能再修改这个数组
+        Returns:
+            bool: 是否有客户端在看（没有时不保存）
+        """
+        channel = self._channels.get(stream_id)
+        if channel is None or channel.clients == 0:
+            return False
+        with channel.cond:
+            channel.frame = frame
+            channel.seq += 1
+            channel.cond.notify_all()
+        return True
+
+    def attach(self, stream_id):
+        channel = self._channels.get(stream_id)
+        if channel is None:
+            return None
+        with channel.cond:
+            channel.clients += 1
+        return channel
+
+    def detach(self, channel):
+        with channel.cond:
+            channel.clients -= 1
+            if channel.clients == 0:
+                channel.frame = None  # 没人看时不再持有帧
+                channel.cache.clear()
+
+    @staticmethod
+    def wait_frame(channel, after_seq, timeout=1.0):
+        """等待比 after_seq 新的帧，返回最新帧序号；超时或该路已结束返回None"""
+        with channel.cond:
+            channel.cond.wait_for(lambda: channel.closed or (channel.seq > after_seq and channel.frame is not None),
+                                  timeout)
+            if channel.closed or channel.seq <= after_seq or channel.frame is None:
+                return None
+            return channel.seq
+
+    @staticmethod
+    def jpeg(channel, quality, width):
+        """当前帧的JPEG（同一帧同一档位只编码一次），返回 (帧序号, 字节)"""
+        import cv2
+
+        key = (quality, width)
+        with channel.cond:
+            seq, frame = channel.seq, channel.frame
+            cached = channel.cache.get(key)
+        if cached is not None and cached[0] == seq:
+            return cached
+        with channel.encode_lock:
+            cached = channel.cache.get(key)
+            if cached is not None and cached[0] >= seq:
+                return cached  # 等锁期间其他客户端已编码
+            if frame is None:
+                return None
+            if width and frame.shape[1] > width:
+                height = int(round(frame.shape[0] * width / frame.shape[1]))
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not ok:
+                return None
+            result = (seq, buffer.tobytes())
+            channel.cache[key] = result
+            channel.encodes += 1
+            return result
+
+    def stats(self):
+        with self._lock:
+            items = list(self._channels.items())
+        return [{"id": sid, "name": ch.name, "clients": ch.clients, "published": ch.seq, "encodes": ch.encodes}
+                for sid, ch in items]
+
+
+HUB = FrameHub()
+
+
+def _stream_id(text):
+    return int(text) if text.isdigit() else text
+
+
+def _query_number(query, name, default, cast=float):
+    try:
+        return cast(query[name][0])
+    except (KeyError, ValueError, IndexError):
+        return default
+
+
+class _MjpegHandler(BaseHTTPRequestHandler):
+    hub = HUB
+    server_state = None  # {"stopping": bool}
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/":
+            self._send(200, "text/html; charset=utf-8", self._index().encode("utf-8"))
+            return
+        if url.path == "/streams.json":
+            self._send(200, "application/json; charset=utf-8",
+                       json.dumps(self.hub.stats(), ensure_ascii=False).encode("utf-8"))
+            return
+        m = re.match(r"^/(stream|snapshot)/([^/.]+)\.(mjpg|jpg)$", url.path)
+        channel = self.hub.attach(_stream_id(m.group(2))) if m else None
+        if channel is None:
+            self.send_error(404)
+            return
+        try:
+            quality = quantize_quality(_query_number(query, "quality", DEFAULT_QUALITY, int))
+            width = quantize_width(_query_number(query, "width", 0, int))
+            if m.group(1) == "snapshot":
+                self._snapshot(channel, quality, width)
+            else:
+                fps = min(max(_query_number(query, "fps", DEFAULT_FPS), 0.1), MAX_FPS)
+                self._stream(channel, fps, quality, width)
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            pass  # 客户端关闭页面
+        finally:
+            self.hub.detach(channel)
+
+    def _snapshot(self, channel, quality, width):
+        seq = self.hub.wait_frame(channel, 0, timeout=3.0)
+        result = self.hub.jpeg(channel, quality, width) if seq else None
+        if result is None:
+            self.send_error(503, "no frame")
+            return
+        self._send(200, "image/jpeg", result[1])
+
+    def _stream(self, channel, fps, quality, width):
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        interval = 1.0 / fps
+        seq = 0
+        next_due = time.monotonic()
+        while not self.server_state["stopping"]:
+            delay = next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)  # 按客户端帧率取帧，期间的帧直接跳过
+            if self.hub.wait_frame(channel, seq) is None:
+                if channel.closed:
+                    return
+                continue
+            result = self.hub.jpeg(channel, quality, width)
+            if result is None:
+                continue
+            seq, jpeg = result
+            self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                             f"Content-Length: {len(jpeg)}\r\n\r\n".encode("ascii") + jpeg + b"\r\n")
+            next_due = max(next_due + interval, time.monotonic() - interval)
+
+    def _index(self):
+        rows = "".join(
+            f'<div><h3>{html.escape(item["name"])}</h3>'
+            f'<img src="/stream/{item["id"]}.mjpg?fps=5&width=640" width="640"></div>'
+            for item in self.hub.stats())
+        return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>手套佩戴检测</title></head>'
+                f'<body>{rows or "<p>没有正在检测的视频源</p>"}</body></html>')
+
+    def _send(self, code, content_type, body):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 不输出访问日志
+
+
+class MjpegServer:
+    """
+    远程观看服务（局域网可访问）
+    Args:
+        hub: FrameHub，默认全局 HUB
+        host: 监听地址，默认所有网卡
+        port: 端口，0 表示自动分配
+    """
+
+    def __init__(self, hub=HUB, host="0.0.0.0", port=8091):
+        self._state = {"stopping": False}
+        handler = type("MjpegHandler", (_MjpegHandler,), {"hub": hub, "server_state": self._state})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MjpegServer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._state["stopping"] = True
+        self._server.shutdown()
+        self._server.server_close()
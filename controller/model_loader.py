@@ -0,0 +1,96 @@
+"""
+模型加载：按精度变体选择模型文件和运行设备
+- fp32: 原始 best.pt
+- fp16: GPU上直接用 best.pt 半精度推理；CPU上用 best_fp16.onnx
+- int8: best_int8.onnx（静态量化，用现场视频校准，见 model/quantize.py）
+变体通过环境变量 GLOVE_MODEL_VARIANT 选择（按现场测速和报警一致性结果决定，见 benchmark/quant_harness.py），
+量化文件不存在时回退到 fp32。
+"""
+
+import os
+from dataclasses import dataclass, field
+
+VARIANT_ENV = "GLOVE_MODEL_VARIANT"
+MODEL_VARIANTS = ("fp32", "fp16", "int8")
+
+
+@dataclass
+class LoadedModel:
+    model: object
+    variant: str  # 实际使用的变体
+    device: str
+    path: str
+    predict_kwargs: dict = field(default_factory=dict)  # 每次推理需要附加的参数
+    note: str = ""  # 回退原因等说明
+
+
+def variant_path(model_path, variant):
+    """变体对应的模型文件：best.pt -> best_int8.onnx / best_fp16.onnx"""
+    stem = os.path.splitext(model_path)[0]
+    if variant == "fp32":
+        return model_path
+    return f"{stem}_{variant}.onnx"
+
+
+def select_device():
+    """有可用GPU时用cuda，否则用cpu"""
+    try:
+        import torch
+        return 'cuda' if torch.cuda.is_available() else 'cpu'
+    except ImportError:
+        return 'cpu'
+
+
+def _onnx_imgsz(path):
+    """导出时写入ONNX元数据的输入尺寸（固定尺寸模型推理时必须一致）"""
+    try:
+        import ast
+        import onnx
+        meta = {p.key: p.value for p in onnx.load(path, load_external_data=False).metadata_props}
+        imgsz = ast.literal_eval(meta.get("imgsz", "None"))
+        return imgsz[0] if isinstance(imgsz, (list, tuple)) else imgsz
+    except Exception:
+        return None
+
+
+def load_model(model_path, variant=None, device=None):
+    """
+    加载指定精度变体的模型
+    Args:
+        model_path: fp32 权重路径（best.pt）
+        variant: fp32/fp16/int8，为None时读取环境变量 GLOVE_MODEL_VARIANT（默认fp32）
+        device: cuda/cpu，为None时自动选择
+    Returns:
+        LoadedModel
+    """
+    from ultralytics import YOLO  # 按需导入，使用桩模型时不需要torch
+
+    variant = (variant or os.environ.get(VARIANT_ENV, "fp32")).lower()
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"未知的模型变体: {variant}，可选 {', '.join(MODEL_VARIANTS)}")
+    device = device or select_device()
+
+    note = ""
+    if variant == "fp16" and device == 'cuda':
+        # GPU 原生支持半精度，直接用 .pt 推理
+        model = YOLO(model_path)
+        model.to(device)
+        return LoadedModel(model, variant, device, model_path, {"half": True})
+
+    path = variant_path(model_path, variant)
+    if variant != "fp32" and not os.path.exists(path):
+        note = f"{os.path.basename(path)} 不存在，回退到fp32（先运行 python -m model.quantize --variant {variant}）"
+        variant, path = "fp32", model_path
+
+    if path.endswith(".onnx"):
+        # ONNX 模型由 onnxruntime 执行，不能 .to(device)，设备在推理时指定
+        model = YOLO(path, task="detect")
+        predict_kwargs = {"device": device}
+        imgsz = _onnx_imgsz(path)
+        if imgsz:
+            predict_kwargs["imgsz"] = imgsz
+        return LoadedModel(model, variant, device, path, predict_kwargs, note)
+
+    model = YOLO(path)
+    model.to(device)
+    return LoadedModel(model, variant, device, path, {}, note)
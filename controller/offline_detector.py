@@ -0,0 +1,507 @@
+"""
+离线批处理：无界面地检测一个目录下的录像（审计用），替代逐帧显示的 VideoDetector.py
+
+- 每个文件一条流水线，三个阶段并行：解码线程 -> 批量推理 + 跟踪/区域/报警（主线程）-> 编码线程（可选标注视频）
+  阶段之间用有界队列连接，解码和编码不等推理
+- 多个文件分给进程池，每个进程只加载一次模型
+- 报警逻辑与实时检测一致：跟踪 -> 区域判断 -> 按区域的时间窗口报警（视频内时间），同一轨迹只报一次
+- 输出（每个视频一组文件，保存在输出目录）：
+  <视频>.detections.jsonl/.parquet  有检测结果的帧，每个已确认轨迹一条 [帧号, 时间, 轨迹ID, 框, 分数, 所在区域]
+  <视频>.alerts.jsonl/.parquet      报警事件 [帧号, 时间, 区域, 轨迹ID]
+  <视频>.annotated.mp4               标注视频（--save_video）
+  summary.json                       每个文件的帧数、耗时、报警数，以及相对实时播放的加速比
+
+用法：
+    python -m controller.offline_detector --input D:\\videos\\20250911 --output D:\\audit\\20250911
+    python -m controller.offline_detector --input D:\\videos --output out --workers 4 --batch 8 --interval 3 --format parquet
+"""
+
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from controller.alert_evaluator import ALERT_COOLDOWN_SECONDS, AlertAnalyzer
+from controller.view_registry import get_registry
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.flv', '.ts')
+OUTPUT_FORMATS = ('jsonl', 'parquet')
+
+
+def find_videos(input_path, recursive=True):
+    """输入为文件时直接返回，为目录时返回其中的视频文件（按路径排序）"""
+    if os.path.isfile(input_path):
+        return [input_path]
+    videos = []
+    for root, dirs, files in os.walk(input_path):
+        videos.extend(os.path.join(root, f) for f in files if f.lower().endswith(VIDEO_EXTENSIONS))
+        if not recursive:
+            break
+    return sorted(videos)
+
+
+def output_stem(video_path, input_root):
+    """输出文件名前缀：相对输入目录的路径，子目录用 __ 连接，避免不同目录下同名视频冲突"""
+    root = input_root if os.path.isdir(input_root) else os.path.dirname(input_root)
+    rel = os.path.relpath(video_path, root)
+    return os.path.splitext(rel)[0].replace(os.sep, "__").replace("/", "__")
+
+
+def load_detector(model_path, variant=None, device=None, imgsz=None):
+    """加载精简推理路径的检测器（进程池中每个进程调用一次）"""
+    from controller.inference import LeanDetector
+    from controller.model_loader import load_model
+
+    loaded = load_model(model_path, variant=variant, device=device)
+    if loaded.note:
+        print(f"模型变体: {loaded.note}")
+    return LeanDetector.from_loaded(loaded, imgsz)
+
+
+class RecordWriter:
+    """检测记录和报警事件写入 JSONL（逐行追加）或 Parquet（结束时一次写出，需要 pyarrow）"""
+
+    def __init__(self, out_dir, stem, fmt='jsonl'):
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"不支持的输出格式: {fmt}")
+        os.makedirs(out_dir, exist_ok=True)
+        self.fmt = fmt
+        self.detections_path = os.path.join(out_dir, f"{stem}.detections.{fmt}")
+        self.alerts_path = os.path.join(out_dir, f"{stem}.alerts.{fmt}")
+        self._rows = {"detections": [], "alerts": []}
+        if fmt == 'jsonl':
+            self._files = {"detections": open(self.detections_path, "w", encoding="utf-8"),
+                           "alerts": open(self.alerts_path, "w", encoding="utf-8")}
+
+    def write_frame(self, frame_idx, ts, tracks):
+        if not tracks:
+            return
+        rows = [{"frame": frame_idx, "ts": round(ts, 3), "track_id": t.id,
+                 "box": [round(float(v), 1) for v in t.box], "score": round(t.score, 4),
+                 "zones": [int(z) for z in t.zones]} for t in tracks]
+        self._write("detections", rows)
+
+    def write_alert(self, frame_idx, ts, areas, tracks):
+        self._write("alerts", [{"frame": frame_idx, "ts": round(ts, 3), "areas": [int(a) for a in areas],
+                                "track_ids": [t.id for t in tracks]}])
+
+    def _write(self, kind, rows):
+        if self.fmt == 'jsonl':
+            f = self._files[kind]
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        else:
+            self._rows[kind].extend(rows)
+
+    def close(self):
+        if self.fmt == 'jsonl':
+            for f in self._files.values():
+                f.close()
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        detections = self._rows["detections"]
+        boxes = np.array([r["box"] for r in detections], dtype=np.float32).reshape(-1, 4)
+        pq.write_table(pa.table({
+            "frame": pa.array([r["frame"] for r in detections], pa.int64()),
+            "ts": pa.array([r["ts"] for r in detections], pa.float64()),
+            "track_id": pa.array([r["track_id"] for r in detections], pa.int64()),
+            "x1": boxes[:, 0], "y1": boxes[:, 1], "x2": boxes[:, 2], "y2": boxes[:, 3],
+            "score": pa.array([r["score"] for r in detections], pa.float32()),
+            "zones": pa.array([r["zones"] for r in detections], pa.list_(pa.int32())),
+        }), self.detections_path)
+        alerts = self._rows["alerts"]
+        pq.write_table(pa.table({
+            "frame": pa.array([r["frame"] for r in alerts], pa.int64()),
+            "ts": pa.array([r["ts"] for r in alerts], pa.float64()),
+            "areas": pa.array([r["areas"] for r in alerts], pa.list_(pa.int32())),
+            "track_ids": pa.array([r["track_ids"] for r in alerts], pa.list_(pa.int64())),
+        }), self.alerts_path)
+
+
+_END = object()
+
+
+def _decode_stage(cap, out_q, interval, start_frame, end_frame, fps, stop, progress):
+    """
+    解码线程：检测帧完整解码，跳过的帧只 grab（不转换颜色），放入 (帧号, 时间, 帧)
+    end_frame 为 None 表示到文件结束；读过的帧数记在 progress["frames"]
+    """
+    try:
+        frame_idx = start_frame
+        while not stop.is_set() and (end_frame is None or frame_idx < end_frame):
+            if (frame_idx - start_frame) % interval == 0:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                out_q.put((frame_idx, frame_idx / fps, frame))
+            elif not cap.grab():
+                break
+            frame_idx += 1
+            progress["frames"] = frame_idx - start_frame
+        out_q.put(_END)
+    except Exception as e:
+        out_q.put(e)
+
+
+def iter_frames(cap, interval=1, fps=25.0, start_frame=0, end_frame=None, queue_size=16):
+    """在解码线程中读取（与消费方并行），按顺序产出 (帧号, 时间, 帧)"""
+    out_q = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    decoder = threading.Thread(target=_decode_stage, name="OfflineDecode", daemon=True,
+                               args=(cap, out_q, interval, start_frame, end_frame, fps, stop, {}))
+    decoder.start()
+    try:
+        while True:
+            item = out_q.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        while decoder.is_alive():
+            try:
+                out_q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def _open_video_writer(path, fps, size):
+    return cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+
+
+def _encode_stage(path, fps, in_q, errors):
+    """编码线程：写标注视频，出错时把异常放入 errors 后退出（由调用方写入结果）"""
+    writer = None
+    try:
+        while True:
+            frame = in_q.get()
+            if frame is _END:
+                break
+            if writer is None:
+                h, w = frame.shape[:2]
+                writer = _open_video_writer(path, fps, (w, h))
+            writer.write(frame)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        if writer is not None:
+            writer.release()
+
+
+def _put_while_alive(q, item, thread):
+    """放入队列，接收线程已退出（异常）时放弃，返回是否放入"""
+    while thread.is_alive():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def draw_frame(frame, zone_set, tracks, alerting):
+    """标注：区域、轨迹框（区域内为红色）、报警状态"""
+    zone_set.draw(frame)
+    for t in tracks:
+        x1, y1, x2, y2 = map(int, t.box)
+        color = (0, 0, 255) if t.zones else (255, 0, 0)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3 if t.zones else 2)
+        cv2.putText(frame, f"bare #{t.id}", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    status, color = ("DANGER", (0, 0, 255)) if alerting else ("SAFE", (0, 255, 0))
+    cv2.putText(frame, f"status: {status}", (30, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.2, color, 3)
+    return frame
+
+
+def analyze_video(video_path, detector, interval=1, batch=8, start_s=None, end_s=None, zone_path=None,
+                  writer=None, video_out=None, queue_size=None):
+    """
+    流水线处理一个视频（或其中一段）
+    Args:
+        video_path: 视频路径
+        detector: 实现 detect_bare / detect_bare_batch 的检测器
+        interval: 每隔几帧检测一次（跳过的帧上轨迹外推，与实时检测一致）
+        batch: 推理批大小
+        start_s / end_s: 只处理该时间段（秒），None 表示文件开头/结尾
+        zone_path: 区域文件，None 时按视角注册表确定
+        writer: RecordWriter，None 表示不写记录
+        video_out: 标注视频输出路径，None 表示不输出
+    Returns:
+        dict: 帧数、耗时、报警事件 [(帧号, 时间, 区域, 轨迹ID)]；标注视频写入失败时 video_error 为错误说明
+    """
+    if zone_path is None:
+        registry = get_registry()
+        zone_path = registry.area_path(registry.resolve(video_path))
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"无法打开视频: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    start_frame = int(round(start_s * fps)) if start_s else 0
+    end_frame = int(round(end_s * fps)) if end_s is not None else None
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    analyzer = AlertAnalyzer(zone_path)
+    batch_detect = getattr(detector, "detect_bare_batch", None)
+    queue_size = queue_size or batch * 2
+    decode_q = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    progress = {"frames": 0}
+    decoder = threading.Thread(target=_decode_stage, name="OfflineDecode", daemon=True,
+                               args=(cap, decode_q, interval, start_frame, end_frame, fps, stop, progress))
+    encode_q = encoder = None
+    encode_errors = []
+    if video_out:
+        encode_q = queue.Queue(maxsize=queue_size)
+        encoder = threading.Thread(target=_encode_stage, name="OfflineEncode", daemon=True,
+                                   args=(video_out, fps / interval, encode_q, encode_errors))
+        encoder.start()
+
+    alerts = []
+    processed = 0
+    last_idx = None
+    alert_until = -np.inf
+    infer_seconds = 0.0
+    t_start = time.perf_counter()
+    decoder.start()
+    try:
+        done = False
+        while not done:
+            # 凑一批：至少等到一帧，之后只取队列中已解码好的帧
+            items = []
+            while len(items) < batch:
+                try:
+                    item = decode_q.get() if not items else decode_q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _END:
+                    done = True
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                items.append(item)
+            if not items:
+                continue
+
+            frames = [frame for _, _, frame in items]
+            t0 = time.perf_counter()
+            if batch_detect is not None:
+                results = batch_detect(frames, analyzer.low_thresh)
+            else:
+                results = [detector.detect_bare(frame, analyzer.low_thresh) for frame in frames]
+            infer_seconds += time.perf_counter() - t0
+
+            for (frame_idx, ts, frame), detections in zip(items, results):
+                h, w = frame.shape[:2]
+                analyzer.set_frame_size(w, h)
+                if last_idx is not None:
+                    analyzer.advance(frame_idx - last_idx - 1)
+                last_idx = frame_idx
+                tracks, alert_areas, alert_tracks = analyzer.update(detections, ts)
+                processed += 1
+                if writer is not None:
+                    writer.write_frame(frame_idx, ts, tracks)
+                if alert_areas:
+                    alerts.append((frame_idx, ts, list(alert_areas), [t.id for t in alert_tracks]))
+                    alert_until = ts + ALERT_COOLDOWN_SECONDS
+                    if writer is not None:
+                        writer.write_alert(frame_idx, ts, alert_areas, alert_tracks)
+                if encode_q is not None and not _put_while_alive(
+                        encode_q, draw_frame(frame, analyzer.zone_set, tracks, ts <= alert_until), encoder):
+                    encode_q = None  # 编码线程已异常退出，检测继续
+    finally:
+        stop.set()
+        # 解码线程可能阻塞在已满的队列上，取空后再等待
+        while decoder.is_alive():
+            try:
+                decode_q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        decoder.join()
+        cap.release()
+        if encoder is not None:
+            # 编码线程异常退出时队列可能已满，不能阻塞等待
+            if encode_q is not None:
+                _put_while_alive(encode_q, _END, encoder)
+            encoder.join()
+
+    elapsed = time.perf_counter() - t_start
+    span_frames = progress["frames"]
+    result = {
+        "video": video_path,
+        "fps": fps,
+        "total_frames": total_frames,
+        "frames": span_frames,
+        "processed": processed,
+        "video_seconds": span_frames / fps,
+        "elapsed": elapsed,
+        "infer_seconds": infer_seconds,
+        "alerts": alerts,
+    }
+    if encode_errors:
+        result["video_error"] = f"标注视频写入失败，不再保存: {video_out} - {encode_errors[0]}"
+    return result
+
+
+# ---------------------- 进程池 ----------------------
+_worker_detector = None
+
+
+def _init_worker(detector_factory):
+    global _worker_detector
+    _worker_detector = detector_factory()
+
+
+def _run_task(task_fn, args):
+    return task_fn(_worker_detector, *args)
+
+
+def run_pool(task_fn, tasks, detector_factory, workers=1, log=print):
+    """
+    把文件分给进程池处理
+    Args:
+        task_fn: 模块级函数 task_fn(检测器, 视频路径, *其他参数)，返回结果dict
+        tasks: [(视频路径, *其他参数)]
+        detector_factory: 无参可调用对象（需可pickle），在每个工作进程中创建一次检测器
+        workers: 进程数，1 表示在当前进程中依次处理
+    Returns:
+        (结果列表, 失败列表, 总耗时秒)
+    """
+    results, failures = [], []
+
+    def done(path, get_result):
+        try:
+            results.append(get_result())
+            log(f"完成 {path}: {len(results[-1]['alerts'])} 次报警")
+            if results[-1].get("video_error"):
+                log(results[-1]["video_error"])
+        except Exception as e:
+            failures.append({"video": path, "error": str(e)})
+            log(f"处理失败 {path}: {e}")
+
+    t0 = time.perf_counter()
+    if workers <= 1:
+        _init_worker(detector_factory)
+        for args in tasks:
+            done(args[0], functools.partial(_run_task, task_fn, args))
+    else:
+        # spawn：CUDA 不能在 fork 出的子进程中使用
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(detector_factory,)) as pool:
+            futures = {pool.submit(_run_task, task_fn, args): args[0] for args in tasks}
+            for future in as_completed(futures):
+                done(futures[future], future.result)
+    return results, failures, time.perf_counter() - t0
+
+
+def _process_file(detector, video_path, stem, options):
+    """进程池任务：处理一个文件并写出结果"""
+    writer = RecordWriter(options["output"], stem, options["format"])
+    video_out = os.path.join(options["output"], f"{stem}.annotated.mp4") if options["save_video"] else None
+    try:
+        result = analyze_video(video_path, detector, interval=options["interval"], batch=options["batch"],
+                               writer=writer, video_out=video_out)
+    finally:
+        writer.close()
+    result["detections_file"] = writer.detections_path
+    result["alerts_file"] = writer.alerts_path
+    return result
+
+
+def run_offline(videos, input_root, output, detector_factory, workers=1, batch=8, interval=1, fmt='jsonl',
+                save_video=False, log=print):
+    """
+    处理一组视频，返回汇总（同时写入 output/summary.json）
+    Args:
+        detector_factory: 无参可调用对象（需可pickle），在每个工作进程中创建一次检测器
+        workers: 进程数，1 表示在当前进程中依次处理
+    """
+    os.makedirs(output, exist_ok=True)
+    options = {"output": output, "format": fmt, "interval": interval, "batch": batch, "save_video": save_video}
+    tasks = [(path, output_stem(path, input_root), options) for path in videos]
+    results, failures, wall = run_pool(_process_file, tasks, detector_factory, workers, log)
+
+    results.sort(key=lambda r: r["video"])
+    video_seconds = sum(r["video_seconds"] for r in results)
+    summary = {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "workers": workers,
+        "batch": batch,
+        "interval": interval,
+        "format": fmt,
+        "files": len(results),
+        "failed": failures,
+        "video_seconds": round(video_seconds, 2),
+        "wall_seconds": round(wall, 2),
+        "realtime_speedup": round(video_seconds / wall, 2) if wall > 0 else None,
+        "alerts": sum(len(r["alerts"]) for r in results),
+        "videos": [{
+            "video": r["video"],
+            "frames": r["frames"],
+            "processed": r["processed"],
+            "video_seconds": round(r["video_seconds"], 2),
+            "elapsed": round(r["elapsed"], 2),
+            "infer_fps": round(r["processed"] / r["infer_seconds"], 2) if r["infer_seconds"] > 0 else None,
+            "alerts": len(r["alerts"]),
+            "detections_file": r["detections_file"],
+            "alerts_file": r["alerts_file"],
+        } for r in results],
+    }
+    with open(os.path.join(output, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线批量检测录像（无界面）')
+    parser.add_argument('--input', type=str, required=True, help='视频文件或目录')
+    parser.add_argument('--output', type=str, required=True, help='结果输出目录')
+    parser.add_argument('--model', type=str, default='model/best.pt', help='模型路径')
+    parser.add_argument('--variant', type=str, default=None, help='精度变体 fp32/fp16/int8，默认读环境变量')
+    parser.add_argument('--device', type=str, default=None, help='cuda/cpu，默认自动选择')
+    parser.add_argument('--imgsz', type=int, default=None, help='推理分辨率，默认640')
+    parser.add_argument('--workers', type=int, default=max(1, min(4, (os.cpu_count() or 2) // 2)),
+                        help='进程数（每个进程加载一份模型）')
+    parser.add_argument('--batch', type=int, default=8, help='推理批大小')
+    parser.add_argument('--interval', type=int, default=1, help='每隔几帧检测一次')
+    parser.add_argument('--format', type=str, default='jsonl', choices=OUTPUT_FORMATS, help='记录格式')
+    parser.add_argument('--save_video', action='store_true', help='同时输出标注视频')
+    parser.add_argument('--no_recursive', action='store_true', help='不处理子目录')
+    args = parser.parse_args()
+
+    if args.format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("输出 parquet 需要安装 pyarrow (pip install pyarrow)")
+    videos = find_videos(args.input, recursive=not args.no_recursive)
+    if not videos:
+        parser.error(f"没有找到视频文件: {args.input}")
+    print(f"共 {len(videos)} 个视频，{args.workers} 个进程，批大小 {args.batch}")
+
+    factory = functools.partial(load_detector, args.model, args.variant, args.device, args.imgsz)
+    summary = run_offline(videos, args.input, args.output, factory, workers=args.workers, batch=args.batch,
+                          interval=args.interval, fmt=args.format, save_video=args.save_video)
+    print(f"视频总时长 {summary['video_seconds']:.0f}s，耗时 {summary['wall_seconds']:.1f}s，"
+          f"加速比 {summary['realtime_speedup']}x，报警 {summary['alerts']} 次，失败 {len(summary['failed'])} 个")
+    print(f"汇总: {os.path.join(args.output, 'summary.json')}")
+
+
+if __name__ == '__main__':
+    main()
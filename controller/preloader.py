@@ -0,0 +1,52 @@
+"""
+后台预加载重模块：窗口显示后在后台线程依次导入 numpy/cv2/torch/ultralytics 和检测模块
+
+启动时只导入界面和数据库需要的模块，窗口和视频源列表立即显示；
+预加载期间点击开始检测也没问题，检测线程里的 import 会等同一个模块加载完成（Python导入锁），不会重复加载
+"""
+
+import importlib
+import time
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+# (模块名, 显示名称)，按依赖顺序加载，前面的模块后面会用到
+PRELOAD_MODULES = [
+    ("numpy", "numpy"),
+    ("cv2", "OpenCV"),
+    ("torch", "PyTorch"),
+    ("ultralytics", "YOLO"),
+    ("controller.detector_worker", "检测模块"),
+]
+
+
+class ModulePreloader(QThread):
+    progress = pyqtSignal(int, int, str)  # 已完成数, 总数, 正在加载的模块显示名称
+    loaded = pyqtSignal(dict)  # {显示名称: 耗时秒}，未安装的模块为 None
+
+    def __init__(self, modules=None, parent=None):
+        super().__init__(parent)
+        self.modules = list(PRELOAD_MODULES if modules is None else modules)
+        self.timings = {}
+
+    def run(self):
+        total = len(self.modules)
+        for i, (module, label) in enumerate(self.modules):
+            self.progress.emit(i, total, label)
+            t0 = time.perf_counter()
+            try:
+                importlib.import_module(module)
+                self.timings[label] = time.perf_counter() - t0
+            except ImportError:
+                # 可选依赖（如只用ONNX时没有ultralytics），用到时再报错
+                self.timings[label] = None
+        self.progress.emit(total, total, "")
+        self.loaded.emit(dict(self.timings))
+
+
+def format_timings(timings):
+    """耗时汇总，用于日志: 'OpenCV 98ms, PyTorch 1520ms, YOLO 未安装'"""
+    parts = []
+    for label, seconds in timings.items():
+        parts.append(f"{label} 未安装" if seconds is None else f"{label} {seconds * 1000:.0f}ms")
+    return ", ".join(parts)
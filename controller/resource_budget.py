@@ -0,0 +1,191 @@
+"""
+CPU线程预算：把配置的核数分给推理、解码和界面，统一设置 torch / OpenCV / onnxruntime 的线程数，可选绑定CPU核
+
+默认每个 DetectorWorker 的 torch 用满所有核，OpenCV 解码也各自开线程，8路时约100个可运行线程抢缓存。
+按预算分配后：
+- 界面保留 gui_cores 个核（绑核时界面线程只在这些核上运行）
+- 其余核按 decode_share 分给解码，剩下给推理；每路的推理/解码线程数 = 对应核数 / 路数（至少1）
+- torch 的 intra-op 线程数是按线程生效的（OpenMP），需要在每个检测线程里设置，见 enter_worker_thread
+- OpenCV 线程池、torch inter-op 等进程级设置要导入cv2/torch，在检测线程开始时设置（apply_library_limits），不阻塞界面线程
+
+环境变量：
+- GLOVE_CPU_BUDGET    参与分配的核数，默认为本进程可用的全部核
+- GLOVE_CPU_AFFINITY  为1时绑核（Linux按线程绑定；其他系统需要psutil，只能按进程绑定到全部预算核）
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+
+BUDGET_ENV = "GLOVE_CPU_BUDGET"
+AFFINITY_ENV = "GLOVE_CPU_AFFINITY"
+
+_library_lock = threading.Lock()
+_library_limits = None  # 已生效的 (OpenCV线程数, torch线程数)
+
+
+@dataclass
+class ResourcePlan:
+    streams: int
+    cores: int  # 参与分配的核数
+    gui_cores: int
+    decode_cores: int
+    inference_cores: int
+    inference_threads: int  # 每路推理线程数（torch intra-op / onnxruntime intra-op）
+    decode_threads: int  # 每路解码线程数（VideoCapture 的 FFmpeg 线程）
+    affinity: bool = False
+    gui_cpus: list = field(default_factory=list)  # 绑核时界面线程使用的CPU编号
+    worker_cpus: list = field(default_factory=list)  # 绑核时检测线程（推理+解码）使用的CPU编号
+
+    def describe(self):
+        text = (f"CPU预算 {self.cores}核/{self.streams}路: 界面{self.gui_cores} 解码{self.decode_cores} "
+                f"推理{self.inference_cores}，每路推理{self.inference_threads}线程 解码{self.decode_threads}线程")
+        if self.affinity:
+            text += f"，绑核 界面{self.gui_cpus} 检测{self.worker_cpus}"
+        return text
+
+
+def available_cpus():
+    """本进程可用的CPU编号（容器/任务管理器限制后的）"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_budget(streams, cores=None, gui_cores=1, decode_share=0.25, affinity=None, cpus=None):
+    """
+    计算线程分配
+    Args:
+        streams: 同时检测的路数
+        cores: 参与分配的核数，为None时读取环境变量 GLOVE_CPU_BUDGET（默认全部可用核）
+        gui_cores: 给界面保留的核数（核数不足2时不保留）
+        decode_share: 检测核中分给解码的比例
+        affinity: 是否绑核，为None时读取环境变量 GLOVE_CPU_AFFINITY
+        cpus: 可用的CPU编号，默认为本进程可用的全部CPU
+    Returns:
+        ResourcePlan
+    """
+    cpus = list(cpus) if cpus is not None else available_cpus()
+    if cores is None:
+        cores = int(os.environ.get(BUDGET_ENV, 0)) or len(cpus)
+    cores = max(1, min(cores, len(cpus)))
+    streams = max(1, streams)
+    if affinity is None:
+        affinity = os.environ.get(AFFINITY_ENV, "0") == "1"
+
+    gui = min(gui_cores, cores - 1)
+    worker = cores - gui
+    decode = min(max(1, round(worker * decode_share)), max(1, worker - 1))
+    inference = max(1, worker - decode)
+    return ResourcePlan(
+        streams=streams, cores=cores, gui_cores=gui, decode_cores=decode, inference_cores=inference,
+        inference_threads=max(1, inference // streams), decode_threads=max(1, decode // streams),
+        affinity=affinity, gui_cpus=cpus[:gui] if gui else cpus[:cores], worker_cpus=cpus[gui:cores],
+    )
+
+
+def _set_thread_affinity(cpus):
+    """绑定当前线程（Linux）；其他系统用psutil绑定整个进程，都不支持时返回False"""
+    if not cpus:
+        return False
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)  # Linux上pid 0 表示调用线程
+        return True
+    try:
+        import psutil
+    except ImportError:
+        return False
+    psutil.Process().cpu_affinity(cpus)
+    return True
+
+
+def apply_library_limits(plan):
+    """
+    进程级的库线程设置：OpenCV线程池、torch inter-op 线程
+    会导入cv2/torch，由 enter_worker_thread 在检测线程中调用；多个检测线程同时开始时只设置一次，预算变了再重新设置
+    """
+    global _library_limits
+    limits = (plan.decode_cores, plan.inference_threads)
+    with _library_lock:
+        if _library_limits == limits:
+            return
+        _library_limits = limits
+        try:
+            import cv2
+            # OpenCV 的 parallel_for 线程池全进程共用（resize/cvtColor等），大小按解码核数
+            cv2.setNumThreads(plan.decode_cores)
+        except ImportError:
+            pass
+        try:
+            import torch
+            torch.set_num_threads(plan.inference_threads)
+            try:
+                torch.set_num_interop_threads(1)  # 只能在第一次并行计算前设置一次
+            except RuntimeError:
+                pass
+        except ImportError:
+            pass
+
+
+def pin_gui_thread(plan):
+    """
+    界面线程绑核（在界面线程调用，不导入cv2/torch）
+    Returns:
+        list: 未能生效的设置说明
+    """
+    if plan.affinity and not _set_thread_affinity(plan.gui_cpus if hasattr(os, "sched_setaffinity")
+                                                  else plan.gui_cpus + plan.worker_cpus):
+        return ["当前系统不支持绑核（需要psutil）"]
+    return []
+
+
+def apply_process_limits(plan):
+    """
+    进程级设置（服务模式启动时在主线程调用一次）：OpenCV线程池、torch inter-op 线程、主线程绑核
+    Returns:
+        list: 未能生效的设置说明
+    """
+    apply_library_limits(plan)
+    return pin_gui_thread(plan)
+
+
+def enter_worker_thread(plan):
+    """检测线程开始时调用：进程级的库线程设置（见 apply_library_limits），本线程的 torch 推理线程数，绑核时绑定到检测核"""
+    apply_library_limits(plan)
+    try:
+        import torch
+        torch.set_num_threads(plan.inference_threads)
+    except ImportError:
+        pass
+    if plan.affinity and hasattr(os, "sched_setaffinity"):
+        # FFmpeg 解码线程由本线程创建，继承同样的绑定
+        _set_thread_affinity(plan.worker_cpus)
+
+
+def capture_params(plan):
+    """VideoCapture 打开参数：限制FFmpeg解码线程数（OpenCV 4.6+ 支持，旧版本返回空列表）"""
+    import cv2
+    prop = getattr(cv2, "CAP_PROP_N_THREADS", None)
+    if plan is None or prop is None:
+        return []
+    return [prop, plan.decode_threads]
+
+
+def configure_detector(model, plan):
+    """
+    检测器按预算设置推理线程：LeanDetector 的ONNX后端在CPU上按预算重建onnxruntime会话（默认用满所有核）
+    Returns:
+        bool: 是否重建了会话
+    """
+    session = getattr(getattr(model, "backend", None), "session", None)
+    if session is None or session.get_providers()[:1] != ["CPUExecutionProvider"]:
+        return False
+    path = getattr(session, "_model_path", None)
+    if not path:
+        return False
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = plan.inference_threads
+    options.inter_op_num_threads = 1
+    model.backend.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+    return True
@@ -0,0 +1,351 @@
+"""
+无界面服务模式（服务器部署）：从 monitor.db 读取场景和视频源，后台运行检测、报警和日志，不导入Qt
+
+- 每个选中的视频源一个检测线程：读取/重连 -> 推理 -> 跟踪/区域/报警（与离线检测相同的 AlertAnalyzer）
+- 推理槽位、CPU线程预算与界面版一致（detection_scheduler / resource_budget）
+- 日志写入 logs/（与界面版同一格式，可用 log_sink 检索），同时输出到标准输出；运行指标在 http://127.0.0.1:9108/metrics
+- 报警：日志 + 报警邮件（视频源配置了报警邮箱时）+ 可选报警录像（--clips）
+- 远程观看：--mjpeg-port 指定端口后，主管可在浏览器中查看各路标注画面（见 mjpeg_server）
+- 事件推送：--events-port 指定端口后，以SSE推送报警事件和每帧检测摘要（见 event_bus）
+- SIGTERM / SIGINT：停止读取，等各线程处理完当前帧、写完报警录像和日志后退出
+
+用法：
+    python -m controller.service                          # 所有场景中选中的视频源
+    python -m controller.service --scene 车间A --scene 3  # 指定场景（名称或ID）
+    python -m controller.service --db /data/monitor.db --variant int8 --clips
+    python -m controller.service --mjpeg-port 8091
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.alert_evaluator import AlertAnalyzer
+from controller.detection_scheduler import DetectionScheduler, assess_risk, slots_for_plan
+from controller.event_bus import BUS, TOPIC_ALERT, TOPIC_DETECTION, EventServer, make_event, track_summary
+from controller.log_sink import LogSink
+from controller.metrics import MetricsServer, StreamMetrics
+from controller.mjpeg_server import HUB, MjpegServer
+from controller.offline_detector import draw_frame, load_detector
+from controller.resource_budget import apply_process_limits, plan_budget
+from controller.stream_session import StreamSession
+from controller.view_registry import get_registry
+from model.db import Database
+
+DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model", "best.pt")
+METRICS_PORT = 9108
+RECONNECT_SECONDS = 3  # 连接失败/断流后的重试间隔
+
+
+class ServiceLog:
+    """日志：写入日志文件（后台线程落盘）并输出到标准输出（systemd/docker 收集）"""
+
+    def __init__(self, log_dir=None, echo=True):
+        self.sink = LogSink(log_dir)
+        self.echo = echo
+        self._lock = threading.Lock()
+
+    def __call__(self, message):
+        self.sink.write(message)
+        if self.echo:
+            with self._lock:
+                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}", flush=True)
+
+    def close(self):
+        self.sink.close()
+
+
+class StreamRunner(threading.Thread):
+    """
+    一路视频的检测线程（无Qt）
+    Args:
+        source: VideoSource
+        detector: 实现 detect_bare(frame, conf) 的检测器
+        stop_event: 服务停止事件
+        log: 日志函数
+        scheduler: DetectionScheduler，为None时按 interval 固定间隔推理
+        resource_plan: ResourcePlan，为None时用各库默认线程数
+        record_clips: 是否保存报警录像
+    """
+
+    def __init__(self, source, detector, stop_event, log, scheduler=None, interval=3, resource_plan=None,
+                 record_clips=False, zone_path=None):
+        super().__init__(name=f"StreamRunner-{source.id}", daemon=True)
+        self.source = source
+        self.detector = detector
+        self.stop_event = stop_event
+        self.log = log
+        self.scheduler = scheduler
+        self.interval = interval
+        self.resource_plan = resource_plan
+        registry = get_registry()
+        view = registry.resolve(source.path)
+        self.view_name = registry.view_name(view)
+        if zone_path is None:
+            zone_path = registry.area_path(view)
+        self.analyzer = AlertAnalyzer(zone_path)
+        self.metrics = StreamMetrics(source.id)
+        # 打开/读取/断流/调度/帧时间戳与界面版共用
+        self.session = StreamSession(source, self.metrics, scheduler=scheduler, interval=interval,
+                                     resource_plan=resource_plan)
+        self.clip_recorder = None
+        if record_clips:
+            from controller.clip_recorder import ClipRecorder
+            self.clip_recorder = ClipRecorder(source.id, on_saved=lambda path, n: self.log(
+                f"[报警录像] 已保存 {path}（{n}帧）"))
+        self.alerts = 0
+        self._email_sender = None
+        HUB.open(source.id, source.name)
+
+    def run(self):
+        session = self.session
+        session.start()
+        try:
+            while not self.stop_event.is_set():
+                if session.cap is None:
+                    self.log(f"尝试连接视频源: {self.source.name}")
+                    if not session.open():
+                        self.log(f"连接失败，{RECONNECT_SECONDS}秒后重试: {self.source.name}")
+                        self.stop_event.wait(RECONNECT_SECONDS)
+                        continue
+
+                frame = session.read()
+                if frame is None:
+                    self.log(f"帧读取失败，尝试重连: {self.source.name}")
+                    self.stop_event.wait(RECONNECT_SECONDS)
+                    continue
+
+                if session.should_process():
+                    try:
+                        self._process(frame, session.timestamp())
+                    except Exception as e:
+                        self.log(f"帧处理错误: {self.source.name} - {str(e)}")
+                else:
+                    self.analyzer.advance()
+        finally:
+            session.finish()
+            if self.clip_recorder is not None:
+                self.clip_recorder.close()
+            HUB.close(self.source.id)
+            self.metrics.remove()  # 不再导出已停止视频源的指标
+            self.log(f"停止处理视频: {self.source.name}")
+
+    def _process(self, frame, ts):
+        risk = None
+        try:
+            h, w = frame.shape[:2]
+            self.analyzer.set_frame_size(w, h)
+            self.metrics.frames_processed.inc()
+            t0 = time.perf_counter()
+            detections = self.detector.detect_bare(frame, self.analyzer.low_thresh)
+            t1 = time.perf_counter()
+            self.metrics.inference_seconds.observe(t1 - t0)
+            updated, alert_areas, alert_tracks = self.analyzer.update(detections, ts)
+            tracks = self.analyzer.tracker.active_tracks()
+            risk = assess_risk(self.analyzer.evaluator, [t.box for t in tracks], self.analyzer.zone_set.bboxes, (w, h))
+            self.metrics.postprocess_seconds.observe(time.perf_counter() - t1)
+            if BUS.has_subscribers(TOPIC_DETECTION):
+                BUS.publish(TOPIC_DETECTION, make_event(TOPIC_DETECTION, self.source.id, self.source.name,
+                                                        self.view_name, ts, seq=self.session.seq,
+                                                        tracks=track_summary(tracks)))
+
+            annotated = None
+            if (self.clip_recorder is not None or (alert_areas and self.source.alert_email)
+                    or HUB.has_clients(self.source.id)):
+                annotated = draw_frame(frame.copy(), self.analyzer.zone_set, tracks, bool(alert_areas))
+            if self.clip_recorder is not None:
+                self.clip_recorder.push(annotated, ts)
+            if annotated is not None:
+                HUB.publish(self.source.id, annotated)
+            if alert_areas:
+                self._alert(ts, alert_areas, alert_tracks, annotated)
+        finally:
+            self.session.release_slot(risk)
+
+    def _alert(self, ts, areas, tracks, annotated):
+        self.alerts += 1
+        self.metrics.alerts.inc()
+        message = (f"检测到未佩戴手套操作！(目标ID: {', '.join(str(t.id) for t in tracks)}, "
+                   f"区域{', '.join(map(str, areas))})")
+        self.log(f"[报警] {self.source.name}: {message}")
+        clip_path = None
+        if self.clip_recorder is not None:
+            clip_path = self.clip_recorder.trigger(ts, message)
+            self.log(f"[报警录像] {clip_path}")
+        BUS.publish(TOPIC_ALERT, make_event(TOPIC_ALERT, self.source.id, self.source.name, self.view_name, ts,
+                                            areas=[int(a) for a in areas], tracks=track_summary(tracks),
+                                            message=message, clip=clip_path))
+        if self.source.alert_email and annotated is not None:
+            if self._email_sender is None:
+                from model.email_sender import EmailSender
+                self._email_sender = EmailSender()
+            threading.Thread(target=self._email_sender.send_alert_email, daemon=True,
+                             args=(self.source.name, message, annotated, self.source.alert_email)).start()
+
+
+def select_sources(db, scenes=None):
+    """
+    选中的视频源（is_true），scenes 为场景名称或ID列表，None 表示所有场景
+    Returns:
+        list: [(场景名称, VideoSource)]
+    """
+    wanted = {str(s) for s in scenes} if scenes else None
+    selected = []
+    for scene in db.get_all_scenes():
+        if wanted is not None and scene.name not in wanted and str(scene.id) not in wanted:
+            continue
+        selected.extend((scene.name, video) for video in db.get_videos_by_scene(scene.id) if video.is_true)
+    return selected
+
+
+class DetectionService:
+    """
+    Args:
+        db_path: 数据库文件，None 为 model/monitor.db
+        scenes: 场景名称或ID列表，None 为全部场景
+        detector_factory: detector_factory(video_source) 返回检测器
+        log_dir: 日志目录，None 为 logs/
+        metrics_port: 指标端口，0 表示不启动
+        mjpeg_port: 远程观看端口，0 表示不启动
+        events_port: 事件推送(SSE)端口，0 表示不启动
+        use_scheduler: 是否按风险调度推理槽位（否则按固定间隔）
+        record_clips: 是否保存报警录像
+    """
+
+    def __init__(self, detector_factory, db_path=None, scenes=None, log_dir=None, metrics_port=METRICS_PORT,
+                 use_scheduler=True, record_clips=False, echo=True, mjpeg_port=0, events_port=0):
+        self.detector_factory = detector_factory
+        self.mjpeg_port = mjpeg_port
+        self.events_port = events_port
+        self.db_path = db_path
+        self.scenes = scenes
+        self.metrics_port = metrics_port
+        self.use_scheduler = use_scheduler
+        self.record_clips = record_clips
+        self.log = ServiceLog(log_dir, echo=echo)
+        self.stop_event = threading.Event()
+        self.runners = []
+
+    def stop(self, *_):
+        """停止服务（可作为信号处理函数）"""
+        self.stop_event.set()
+
+    def install_signal_handlers(self):
+        """SIGTERM/SIGINT 时停止（只能在主线程调用）"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def start(self):
+        db = Database(self.db_path) if self.db_path else Database()
+        try:
+            sources = select_sources(db, self.scenes)
+        finally:
+            db.close()
+        if not sources:
+            self.log("没有选中的视频源，服务退出")
+            return False
+
+        plan = plan_budget(len(sources))
+        apply_process_limits(plan)
+        scheduler = None
+        if self.use_scheduler:
+            scheduler = DetectionScheduler(slots=slots_for_plan(plan))
+        self.log(f"服务启动: {len(sources)} 个视频源，{plan.describe()}"
+                 + (f"，推理槽位 {scheduler.slots}" if scheduler else ""))
+
+        interval = min(5, max(3, len(sources) // 2))  # 与界面版一致
+        for scene_name, source in sources:
+            try:
+                detector = self.detector_factory(source)
+            except Exception as e:
+                self.log(f"加载检测器失败 {source.name}: {str(e)}")
+                continue
+            self.log(f"开始处理视频: {scene_name}/{source.name}")
+            runner = StreamRunner(source, detector, self.stop_event, self.log, scheduler=scheduler, interval=interval,
+                                  resource_plan=plan, record_clips=self.record_clips)
+            runner.start()
+            self.runners.append(runner)
+        return bool(self.runners)
+
+    def run(self, stats_seconds=60.0):
+        """启动并阻塞到收到停止信号，定期输出各路帧率和报警数"""
+        metrics_server = None
+        if self.metrics_port:
+            try:
+                metrics_server = MetricsServer(port=self.metrics_port).start()
+            except OSError as e:
+                self.log(f"指标端口 {self.metrics_port} 启动失败: {str(e)}")
+        mjpeg_server = None
+        if self.mjpeg_port:
+            try:
+                mjpeg_server = MjpegServer(port=self.mjpeg_port).start()
+                self.log(f"远程观看: http://<本机IP>:{mjpeg_server.port}/")
+            except OSError as e:
+                self.log(f"远程观看端口 {self.mjpeg_port} 启动失败: {str(e)}")
+        events_server = None
+        if self.events_port:
+            try:
+                events_server = EventServer(port=self.events_port).start()
+                self.log(f"事件推送: http://127.0.0.1:{events_server.port}/events")
+            except OSError as e:
+                self.log(f"事件推送端口 {self.events_port} 启动失败: {str(e)}")
+        try:
+            if not self.start():
+                return
+            last = {r.source.id: r.metrics.frames_processed.value for r in self.runners}
+            while not self.stop_event.wait(stats_seconds):
+                parts = []
+                for r in self.runners:
+                    done = r.metrics.frames_processed.value
+                    parts.append(f"{r.source.name} {(done - last[r.source.id]) / stats_seconds:.1f}fps/{r.alerts}报警")
+                    last[r.source.id] = done
+                self.log("运行状态: " + "，".join(parts))
+            self.log("收到停止信号，等待各视频源处理完当前帧")
+        finally:
+            self.stop_event.set()
+            for runner in self.runners:
+                runner.join(timeout=30)
+            if metrics_server is not None:
+                metrics_server.stop()
+            if mjpeg_server is not None:
+                mjpeg_server.stop()
+            if events_server is not None:
+                events_server.stop()
+            self.log("服务已停止")
+            self.log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='无界面检测服务')
+    parser.add_argument('--db', type=str, default=None, help='数据库文件，默认 model/monitor.db')
+    parser.add_argument('--scene', type=str, action='append', default=None, help='场景名称或ID，可重复，默认全部场景')
+    parser.add_argument('--model', type=str, default=DEFAULT_MODEL, help='模型权重(best.pt)')
+    parser.add_argument('--variant', type=str, default=None, help='fp32/fp16/int8，默认读取 GLOVE_MODEL_VARIANT')
+    parser.add_argument('--device', type=str, default=None, help='cuda/cpu，默认自动选择')
+    parser.add_argument('--log-dir', type=str, default=None, help='日志目录，默认 logs/')
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT, help='指标端口，0 表示不启动')
+    parser.add_argument('--mjpeg-port', type=int, default=0, help='远程观看(MJPEG)端口，0 表示不启动')
+    parser.add_argument('--events-port', type=int, default=0, help='事件推送(SSE)端口，0 表示不启动')
+    parser.add_argument('--no-scheduler', action='store_true', help='按固定间隔推理，不按风险调度')
+    parser.add_argument('--clips', action='store_true', help='保存报警录像')
+    parser.add_argument('--stats', type=float, default=60.0, help='运行状态日志间隔(秒)')
+    args = parser.parse_args()
+
+    def detector_factory(source):
+        return load_detector(args.model, args.variant, args.device, source.imgsz)
+
+    service = DetectionService(detector_factory, db_path=args.db, scenes=args.scene, log_dir=args.log_dir,
+                               metrics_port=args.metrics_port, use_scheduler=not args.no_scheduler,
+                               record_clips=args.clips, mjpeg_port=args.mjpeg_port,
+                               events_port=args.events_port)
+    service.install_signal_handlers()
+    service.run(stats_seconds=args.stats)
+
+
+if __name__ == "__main__":
+    main()
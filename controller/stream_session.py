@@ -0,0 +1,141 @@
+"""
+一路视频的读取循环公共部分：界面检测线程（DetectionThread）和服务模式（service.StreamRunner）共用，不依赖Qt
+
+- 打开视频源（按CPU预算限制解码线程数）、读帧（解码耗时/采集帧率/丢帧指标、追踪）
+- 断流处理：释放连接、重连计数、退出调度
+- 推理调度：有调度器时申请推理槽位（不阻塞），否则按固定间隔
+- 帧时间戳：本地视频用视频内时间（与处理速度无关），实时流用系统时间
+等待/重试间隔、日志和通知由调用方决定
+"""
+
+import time
+
+from controller.detection_scheduler import RISK_DISCONNECTED
+from controller.resource_budget import capture_params, enter_worker_thread
+from controller.tracing import TRACER
+
+
+class StreamSession:
+    """
+    Args:
+        source: VideoSource
+        metrics: StreamMetrics
+        scheduler: DetectionScheduler，为None时按 interval 固定间隔推理
+        interval: 没有调度器时的推理间隔（帧）
+        resource_plan: ResourcePlan，为None时用各库默认线程数
+    """
+
+    def __init__(self, source, metrics, scheduler=None, interval=3, resource_plan=None):
+        self.source = source
+        self.metrics = metrics
+        self.scheduler = scheduler
+        self.interval = interval
+        self.resource_plan = resource_plan
+        self.cap = None
+        self.seq = 0  # 已读取的帧数（帧序号）
+        self._fps_start = time.time()
+        self._fps_frames = 0
+
+    @property
+    def is_file(self):
+        return self.source.type == 1
+
+    def start(self):
+        """检测线程开始时调用（在检测线程中）"""
+        if self.resource_plan is not None:
+            enter_worker_thread(self.resource_plan)
+        if self.scheduler is not None:
+            self.scheduler.register(self.source.id)
+
+    def finish(self):
+        """检测线程结束时调用：释放连接，退出调度"""
+        self.release()
+        if self.scheduler is not None:
+            self.scheduler.unregister(self.source.id)
+
+    def open(self):
+        """
+        打开视频源，失败时按断流处理
+        Returns:
+            bool: 是否打开
+        """
+        self.cap = self.create_capture()
+        if self.cap.isOpened():
+            return True
+        self.disconnected()
+        return False
+
+    def create_capture(self):
+        """新建 VideoCapture（不改变当前连接，可在其他线程中提前打开）"""
+        import cv2
+
+        params = capture_params(self.resource_plan)
+        return (cv2.VideoCapture(self.source.path, cv2.CAP_ANY, params) if params
+                else cv2.VideoCapture(self.source.path))
+
+    def read(self):
+        """
+        读取下一帧，失败时计为丢帧并按断流处理
+        Returns:
+            帧（BGR），失败返回None
+        """
+        seq = self.seq + 1
+        t0 = time.perf_counter_ns()
+        ret, frame = self.cap.read()
+        t1 = time.perf_counter_ns()
+        self.metrics.decode_seconds.observe((t1 - t0) / 1e9)
+        if TRACER.enabled:
+            TRACER.record("read", t0, t1, self.source.id, seq)
+        if not ret:
+            self.metrics.frames_dropped.inc()
+            self.disconnected()
+            return None
+        self.seq = seq
+        self.metrics.frames_read.inc()
+        self._fps_frames += 1
+        now = time.time()
+        if now - self._fps_start >= 1.0:
+            self.metrics.capture_fps.set(round(self._fps_frames / (now - self._fps_start), 1))
+            self._fps_start = now
+            self._fps_frames = 0
+        return frame
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def disconnected(self):
+        """连接失败/断流：释放连接，计一次重连，退出调度"""
+        self.release()
+        self.metrics.reconnects.inc()
+        self.mark_disconnected()
+
+    def mark_disconnected(self):
+        """断流/暂停时不参与调度"""
+        self.metrics.risk.set(RISK_DISCONNECTED)
+        if self.scheduler is not None:
+            self.scheduler.mark_disconnected(self.source.id)
+
+    def should_process(self, seq=None):
+        """这一帧是否推理：有调度时申请推理槽位（不阻塞），否则按固定间隔"""
+        if self.scheduler is None:
+            return (self.seq if seq is None else seq) % self.interval == 0
+        if self.scheduler.try_acquire(self.source.id):
+            return True
+        self.metrics.schedule_skipped.inc()
+        return False
+
+    def release_slot(self, risk):
+        """推理完成：归还槽位，risk 为这次推理后的风险等级（None表示推理失败，保持原等级）"""
+        if self.scheduler is not None:
+            self.scheduler.release(self.source.id, risk)
+        if risk is not None:
+            self.metrics.risk.set(risk)
+
+    def timestamp(self):
+        """报警判断用的帧时间：本地视频用视频内时间，实时流用系统时间"""
+        if self.is_file:
+            import cv2
+            return self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        return time.time()
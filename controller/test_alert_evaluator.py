@@ -0,0 +1,106 @@
+"""
+测试alert_evaluator.py的功能：报警时间与采样间隔无关、命中比例、冷却、时间倒退重置、AlertAnalyzer同一轨迹只报一次
+"""
+import os
+import sys
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from controller.alert_evaluator import ALERT_DANGER_SECONDS, AlertAnalyzer, ZoneAlertEvaluator
+from controller.zones import ZoneSet
+
+FPS = 25
+
+
+def first_alert_time(interval, pattern=(True,), seconds=10.0, start=0.0):
+    """按给定采样间隔喂入区域0的命中序列，返回首次报警时间"""
+    evaluator = ZoneAlertEvaluator(2, window_seconds=1.5, hit_ratio=0.8, cooldown_seconds=5.0)
+    i = 0
+    while i * interval / FPS <= seconds:
+        ts = start + i * interval / FPS
+        hit = pattern[i % len(pattern)]
+        if evaluator.observe(ts, [hit, False]) == [0]:
+            return ts - start
+        i += 1
+    return None
+
+
+def test_independent_of_interval():
+    # 原来按10个采样帧计数：间隔3帧约1.2秒，间隔5帧约2.0秒
+    t3 = first_alert_time(3)
+    t5 = first_alert_time(5)
+    assert 1.5 <= t3 < 1.5 + 3 / FPS + 1e-6
+    assert 1.5 <= t5 < 1.5 + 5 / FPS + 1e-6
+    # 更低的推理频率也一样
+    t12 = first_alert_time(12)
+    assert 1.5 <= t12 < 1.5 + 12 / FPS + 1e-6
+
+
+def test_hit_ratio():
+    # 每3次漏检1次，命中比例约67%，低于80%不报警
+    assert first_alert_time(3, pattern=(True, True, False)) is None
+    # 每10次漏检1次，仍然报警
+    assert first_alert_time(3, pattern=(True,) * 9 + (False,)) is not None
+
+
+def test_cooldown_and_other_area():
+    evaluator = ZoneAlertEvaluator(2, window_seconds=1.5, hit_ratio=0.8, cooldown_seconds=5.0)
+    alerts = []
+    for i in range(0, 500):
+        ts = i * 4 / FPS
+        for area in evaluator.observe(ts, [True, ts >= 3.0]):
+            alerts.append((area, ts))
+    first = [ts for area, ts in alerts if area == 0]
+    # 冷却5秒后需要重新积累满1.5秒
+    assert first[1] - first[0] >= 6.5
+    assert first[1] - first[0] < 6.5 + 4 / FPS + 1e-6
+    # 区域1独立计时：从3秒开始危险，窗口内命中达到80%（约1.2秒）后报警
+    second = [ts for area, ts in alerts if area == 1]
+    assert 3.0 + 1.2 - 4 / FPS <= second[0] <= 3.0 + 1.5
+
+
+def test_reset_on_time_going_back():
+    evaluator = ZoneAlertEvaluator(1, window_seconds=1.5, cooldown_seconds=5.0)
+    for i in range(30):
+        evaluator.observe(i * 0.1, [True])
+    # 本地视频重新开始播放：时间倒退，历史清空，不应立刻报警
+    assert evaluator.observe(0.0, [True]) == []
+    assert evaluator.observe(0.1, [True]) == []
+
+
+def test_analyzer_alerts_once_per_track():
+    analyzer = AlertAnalyzer()
+    rect = np.array([[0, 0], [200, 0], [200, 200], [0, 200]], dtype=np.float32)
+    analyzer.set_zones(ZoneSet([(rect, True)], (None, None), (640, 480)), (640, 480))
+    inside = np.array([[20, 20, 80, 120, 0.9]], dtype=np.float32)
+    alerts = []
+    for i in range(100):
+        ts = i / FPS
+        _, areas, tracks = analyzer.update(inside, ts)
+        if areas:
+            alerts.append((ts, areas, [t.id for t in tracks]))
+    # 同一个人一直在区域内：累计满窗口后只报一次，冷却结束也不再报
+    assert len(alerts) == 1 and alerts[0][1] == [0]
+    assert ALERT_DANGER_SECONDS <= alerts[0][0] <= ALERT_DANGER_SECONDS + 2 / FPS
+    assert analyzer.tracker.active_tracks()[0].alerted
+    # 轨迹清空后（换人/实时流恢复）重新计入
+    analyzer.reset_tracks()
+    later = [analyzer.update(inside, 4.0 + 6.0 + i / FPS)[1] for i in range(60)]
+    assert [0] in later
+
+
+def run_tests():
+    print("========== 分区域时间窗口报警测试 ==========")
+    test_independent_of_interval()
+    test_hit_ratio()
+    test_cooldown_and_other_area()
+    test_reset_on_time_going_back()
+    test_analyzer_alerts_once_per_track()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
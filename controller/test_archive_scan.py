@@ -0,0 +1,83 @@
+"""
+测试archive_scan.py的功能：候选时间段合并、粗扫+确认的报警与全量处理一致
+"""
+import json
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.archive_scan import candidate_windows, match_alerts, run_scan
+
+HAZARD_SECONDS = (8.0, 11.0)  # 画面变亮的时间段内有人在区域0未戴手套
+
+
+class _HazardDetector:
+    """画面亮时在区域0内返回一个高分框（视频默认按视角1的区域，缩放到465x270）"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect_bare_batch(self, frames, conf):
+        self.calls += len(frames)
+        return [np.array([[20, 100, 100, 200, 0.9]] if frame[:20, :20].mean() > 128 else [],
+                         dtype=np.float32).reshape(-1, 5) for frame in frames]
+
+
+def _detectors():
+    return _HazardDetector(), _HazardDetector()
+
+
+def _write_video(path, seconds=20, fps=25):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (465, 270))
+    for i in range(int(seconds * fps)):
+        bright = HAZARD_SECONDS[0] <= i / fps < HAZARD_SECONDS[1]
+        writer.write(np.full((270, 465, 3), 200 if bright else 60, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def test_candidate_windows():
+    assert candidate_windows([], 3.0, 100) == []
+    assert candidate_windows([10, 12, 30], 3.0, 100) == [(7, 15), (27, 33)]
+    assert candidate_windows([1, 99], 3.0, 100) == [(0.0, 4), (96, 100)]
+
+
+def test_match_alerts():
+    reference = [(0, 10.0, [0], [1]), (0, 50.0, [1], [2])]
+    candidate = [(0, 10.4, [0], [1]), (0, 50.0, [0], [3])]
+    assert match_alerts(reference, candidate, 1.0) == (1, 2, 2)
+
+
+def test_scan_matches_full_pass():
+    with tempfile.TemporaryDirectory() as tmp:
+        video = _write_video(os.path.join(tmp, "a.mp4"))
+        out = os.path.join(tmp, "out")
+        summary = run_scan([video], out, _detectors, verify=True, log=lambda msg: None)
+        assert summary["files"] == 1 and not summary["failed"]
+        assert summary["full_alerts"] == 1 and summary["alert_recall"] == 1.0
+        item = summary["videos"][0]
+        assert item["sampled"] == 20 and item["candidates"] == 3
+        # 只重新解码候选附近的时间段
+        assert summary["rescanned_ratio"] < 0.5
+        with open(os.path.join(out, "scan_alerts.jsonl"), encoding="utf-8") as f:
+            alerts = [json.loads(line) for line in f]
+        assert len(alerts) == 1 and alerts[0]["areas"] == [0]
+        assert HAZARD_SECONDS[0] < alerts[0]["ts"] < HAZARD_SECONDS[1]
+
+
+def run_tests():
+    print("========== 归档扫描测试 ==========")
+    test_candidate_windows()
+    test_match_alerts()
+    test_scan_matches_full_pass()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
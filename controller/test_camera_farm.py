@@ -0,0 +1,105 @@
+"""
+测试benchmark/camera_farm.py的功能：故障计划解析、按时间/周期/错开生效、HTTP-MJPEG 可被OpenCV读取、断开故障返回503
+"""
+import http.client
+import json
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+from benchmark.camera_farm import Fault, SimulatedCamera, build_farm, parse_faults
+from benchmark.synthetic_video import generate_video
+
+
+def test_parse_faults():
+    faults = parse_faults("disconnect@30+5, stall@60+3,fps@90+30=5,resolution@120+30=960x540")
+    assert faults == [Fault("disconnect", 30.0, 5.0), Fault("stall", 60.0, 3.0), Fault("fps", 90.0, 30.0, 5.0),
+                      Fault("resolution", 120.0, 30.0, (960, 540))]
+    assert parse_faults("") == [] and parse_faults(None) == []
+    for bad in ("explode@1+2", "disconnect@1", "fps@1+2=fast"):
+        try:
+            parse_faults(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"应报错: {bad}")
+
+
+def _camera_at(t, faults, period=None, offset=0.0):
+    """不启动生产线程，把开始播放时间设为 t 秒前"""
+    camera = SimulatedCamera(0, "unused.mp4", parse_faults(faults), fault_period=period, offset=offset)
+    camera._t0 = time.monotonic() - t
+    return [f.kind for f in camera.active_faults()]
+
+
+def test_fault_schedule():
+    assert SimulatedCamera(0, "unused.mp4", parse_faults("stall@0+5")).active_faults() == []  # 还没开始播放
+    spec = "disconnect@10+5,stall@12+10"
+    assert _camera_at(5, spec) == []
+    assert _camera_at(11, spec) == ["disconnect"]
+    assert _camera_at(13, spec) == ["disconnect", "stall"]
+    assert _camera_at(20, spec) == ["stall"]
+    assert _camera_at(111, spec) == []
+    # 按周期重复
+    assert _camera_at(111, spec, period=100) == ["disconnect"]
+    # 错开：第 i 路的故障推迟 offset 秒
+    assert _camera_at(11, spec, offset=3) == []
+    assert _camera_at(14, spec, offset=3) == ["disconnect"]
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_stream_and_disconnect():
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = generate_video(os.path.join(tmp, "farm.mp4"), width=320, height=240, fps=25, seconds=2)
+        with build_farm([clip], 1, parse_faults("disconnect@0+1"), port=0) as farm:
+            camera = farm.cameras[0]
+            assert _wait(lambda: camera.disconnected)
+            conn = http.client.HTTPConnection(farm.host, farm.port, timeout=5)
+            conn.request("GET", "/cam/0")
+            assert conn.getresponse().status == 503
+            conn.close()
+
+            # 断开结束后可以用OpenCV直接读取
+            assert _wait(lambda: not camera.disconnected and camera.frames_published > 0)
+            cap = cv2.VideoCapture(farm.url(0))
+            try:
+                assert cap.isOpened()
+                shapes = []
+                for _ in range(3):
+                    ret, frame = cap.read()
+                    assert ret
+                    shapes.append(frame.shape)
+            finally:
+                cap.release()
+            assert shapes == [(240, 320, 3)] * 3
+
+            conn = http.client.HTTPConnection(farm.host, farm.port, timeout=5)
+            conn.request("GET", "/")
+            status = json.loads(conn.getresponse().read())
+            assert status[0]["id"] == 0 and status[0]["faults"] == [] and status[0]["frames"] > 0
+            conn.request("GET", "/cam/9")
+            assert conn.getresponse().status == 404
+            conn.close()
+
+
+def run_tests():
+    print("========== 摄像头模拟器测试 ==========")
+    test_parse_faults()
+    test_fault_schedule()
+    test_stream_and_disconnect()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,133 @@
+"""
+测试clip_recorder.py的功能：内存上限淘汰、报警前后片段写出、push/trigger/close不阻塞
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.clip_recorder import ClipRecorder, FrameRingBuffer
+
+
+def _frame(i):
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    cv2.putText(frame, str(i), (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 2)
+    return frame
+
+
+def test_ring_buffer_budget_and_span():
+    ring = FrameRingBuffer(budget_bytes=1000, max_seconds=2.0)
+    for i in range(20):
+        ring.append(i * 0.1, b"x" * 100)
+    assert ring.nbytes <= 1000 and len(ring) == 10
+    ring = FrameRingBuffer(budget_bytes=10 ** 6, max_seconds=2.0)
+    for i in range(50):
+        ring.append(i * 0.1, b"x" * 100)
+    assert ring.between(0, 100)[0][0] >= 4.9 - 2.0 - 1e-9
+    # 时间倒退时清空
+    ring.append(0.0, b"x")
+    assert len(ring) == 1
+
+
+def test_clip_covers_before_and_after():
+    with tempfile.TemporaryDirectory() as tmp:
+        saved = []
+        recorder = ClipRecorder(1, clip_dir=tmp, pre_seconds=1.0, post_seconds=1.0, queue_size=1000,
+                                on_saved=lambda path, n: saved.append((path, n)))
+        fps = 10
+        path = None
+        for i in range(50):
+            ts = i / fps
+            if i == 25:
+                path = recorder.trigger(ts, "测试报警")
+            recorder.push(_frame(i), ts)
+        recorder.close()
+
+        assert saved and saved[0][0] == path and os.path.exists(path)
+        # 报警前1秒 + 报警帧 + 报警后1秒
+        assert saved[0][1] == 21
+        cap = cv2.VideoCapture(path)
+        assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 21
+        cap.release()
+        with open(os.path.splitext(path)[0] + ".json", encoding="utf-8") as f:
+            meta = json.load(f)
+        assert meta["message"] == "测试报警"
+        assert abs(meta["start_ts"] - 1.5) < 1e-6 and abs(meta["end_ts"] - 3.5) < 1e-6
+
+
+def test_push_never_blocks():
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = ClipRecorder(2, clip_dir=tmp, queue_size=2)
+        big = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        t0 = time.perf_counter()
+        for i in range(200):
+            recorder.push(big, i * 0.04)
+        assert time.perf_counter() - t0 < 0.5
+        assert recorder.dropped > 0
+        recorder.close()
+
+
+def test_trigger_and_close_never_block():
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = ClipRecorder(3, clip_dir=tmp, pre_seconds=1.0, post_seconds=1.0, queue_size=2)
+        # 模拟后台线程卡住：帧队列一直是满的
+        recorder._stopping.set()
+        recorder._thread.join()
+        recorder.push(_frame(0), 0.0)
+        recorder.push(_frame(1), 0.1)
+        t0 = time.perf_counter()
+        for i in range(5):
+            recorder.trigger(0.1, "报警")
+        assert time.perf_counter() - t0 < 0.1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = ClipRecorder(4, clip_dir=tmp, pre_seconds=1.0, post_seconds=1.0, queue_size=1000)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_write(*args):
+            started.set()
+            release.wait(5)
+
+        recorder._write_clip = slow_write  # 模拟编码很慢的录像
+        for i in range(10):
+            recorder.push(_frame(i), i / 10)
+        recorder.trigger(0.5, "报警")
+        t0 = time.perf_counter()
+        assert recorder.close(timeout=0.5) is False
+        assert time.perf_counter() - t0 < 1.0 and started.is_set()
+        release.set()
+
+    # 停止检测时不等待（timeout=0），录像在后台写完
+    with tempfile.TemporaryDirectory() as tmp:
+        saved = threading.Event()
+        recorder = ClipRecorder(5, clip_dir=tmp, pre_seconds=1.0, post_seconds=1.0, queue_size=1000,
+                                on_saved=lambda path, n: saved.set())
+        for i in range(30):
+            recorder.push(_frame(i), i / 10)
+        path = recorder.trigger(1.0, "报警")
+        t0 = time.perf_counter()
+        recorder.close(timeout=0)
+        assert time.perf_counter() - t0 < 0.05
+        assert saved.wait(10) and os.path.exists(path)
+
+
+def run_tests():
+    print("========== 报警录像测试 ==========")
+    test_ring_buffer_budget_and_span()
+    test_clip_covers_before_and_after()
+    test_push_never_blocks()
+    test_trigger_and_close_never_block()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,118 @@
+"""
+测试detection_scheduler.py的功能：按风险分配推理槽位、最低速率保证、断流的路不参与
+"""
+import os
+import sys
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.alert_evaluator import ZoneAlertEvaluator
+from controller.detection_scheduler import (RISK_ALERTING, RISK_IDLE, RISK_NEAR, SLOTS_ENV, DetectionScheduler,
+                                            assess_risk, slots_for_plan)
+from controller.resource_budget import plan_budget
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _simulate(scheduler, clock, risks, seconds=10.0, frame_dt=0.04, infer_seconds=0.1):
+    """每路每帧申请一次，推理占用槽位 infer_seconds 秒，返回各路推理次数"""
+    for sid in risks:
+        scheduler.register(sid)
+    busy_until = {sid: None for sid in risks}
+    served = {sid: 0 for sid in risks}
+    while clock.now < seconds:
+        for sid, risk in risks.items():
+            if busy_until[sid] is not None and busy_until[sid] <= clock.now:
+                scheduler.release(sid, risk)
+                busy_until[sid] = None
+        for sid in risks:
+            if busy_until[sid] is None and scheduler.try_acquire(sid):
+                busy_until[sid] = clock.now + infer_seconds
+                served[sid] += 1
+        clock.now = round(clock.now + frame_dt, 6)
+    return served
+
+
+def test_priority_by_risk():
+    clock = _Clock()
+    scheduler = DetectionScheduler(slots=1, clock=clock)
+    served = _simulate(scheduler, clock, {1: RISK_ALERTING, 2: RISK_NEAR, 3: RISK_IDLE})
+    assert served[1] > served[2] > served[3]
+    # 空闲的路也保证最低速率（2fps，10秒约20次）
+    assert served[3] >= 18
+
+
+def test_min_rate_under_contention():
+    clock = _Clock()
+    scheduler = DetectionScheduler(slots=1, min_fps=1.0, clock=clock)
+    served = _simulate(scheduler, clock, {1: RISK_ALERTING, 2: RISK_ALERTING, 3: RISK_IDLE, 4: RISK_IDLE})
+    assert served[3] >= 9 and served[4] >= 9
+    assert served[1] + served[2] > 2 * (served[3] + served[4])
+
+
+def test_idle_rate_cap():
+    clock = _Clock()
+    scheduler = DetectionScheduler(slots=4, clock=clock)
+    served = _simulate(scheduler, clock, {1: RISK_IDLE, 2: RISK_NEAR})
+    assert served[1] <= 51  # 空闲最高5fps
+    assert served[2] >= 75  # 槽位充足时不限制（每次推理0.1秒，按帧间隔对齐后约0.12秒）
+
+
+def test_disconnected_stream_not_waiting():
+    clock = _Clock()
+    scheduler = DetectionScheduler(slots=1, clock=clock)
+    scheduler.register(1)
+    scheduler.register(2)
+    clock.now = 5.0
+    assert scheduler.try_acquire(2)  # 已超过最低速率间隔，排在前面
+    scheduler.release(2, RISK_ALERTING)
+    scheduler.mark_disconnected(2)
+    clock.now = 5.05
+    assert scheduler.try_acquire(1)
+    scheduler.release(1)
+    scheduler.unregister(1)
+    snapshot = scheduler.snapshot()
+    assert list(snapshot) == [2] and snapshot[2]["served"] == 1
+
+
+def test_slots_for_plan():
+    plan = plan_budget(4, cpus=range(16), affinity=False)
+    assert slots_for_plan(plan) == 5
+    os.environ[SLOTS_ENV] = "2"
+    try:
+        assert slots_for_plan(plan) == 2
+    finally:
+        del os.environ[SLOTS_ENV]
+
+
+def test_assess_risk():
+    evaluator = ZoneAlertEvaluator(1)
+    zones = [[400, 100, 600, 300]]
+    assert assess_risk(evaluator, [], zones, (1000, 500)) == RISK_IDLE
+    assert assess_risk(evaluator, [[0, 0, 100, 100]], zones, (1000, 500)) == RISK_IDLE
+    # 离区域60像素（长边的10%以内）
+    assert assess_risk(evaluator, [[320, 120, 380, 200]], zones, (1000, 500)) == RISK_NEAR
+    evaluator.observe(0.0, [True])
+    assert assess_risk(evaluator, [], zones, (1000, 500)) == RISK_ALERTING
+
+
+def run_tests():
+    print("========== 检测调度测试 ==========")
+    test_priority_by_risk()
+    test_min_rate_under_contention()
+    test_idle_rate_cap()
+    test_disconnected_stream_not_waiting()
+    test_slots_for_plan()
+    test_assess_risk()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,137 @@
+"""
+测试event_bus.py的功能：没有订阅者时不入队、按主题/视频源过滤、订阅者缓冲区有界（丢弃最旧并计数）、慢订阅者不阻塞发布、SSE推送
+"""
+import http.client
+import json
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.event_bus import (TOPIC_ALERT, TOPIC_DETECTION, EventBus, EventServer, make_event,
+                                  track_summary)
+from controller.tracker import Track
+
+
+def _alert(stream, i=0):
+    return make_event(TOPIC_ALERT, stream, f"cam{stream}", "视角1", float(i), areas=[0], message=f"报警{i}")
+
+
+def _wait_len(subscription, n, timeout=5.0):
+    deadline = time.time() + timeout
+    while len(subscription) < n and time.time() < deadline:
+        time.sleep(0.01)
+    return len(subscription)
+
+
+def test_no_subscribers():
+    bus = EventBus()
+    assert not bus.has_subscribers(TOPIC_ALERT)
+    assert not bus.publish(TOPIC_ALERT, _alert(1))
+    with bus.subscribe([TOPIC_ALERT]):
+        assert bus.has_subscribers(TOPIC_ALERT) and not bus.has_subscribers(TOPIC_DETECTION)
+    assert not bus.has_subscribers(TOPIC_ALERT)
+    with bus.subscribe():  # 订阅全部主题
+        assert bus.has_subscribers(TOPIC_DETECTION)
+
+
+def test_filter_topics_and_streams():
+    bus = EventBus()
+    alerts = bus.subscribe([TOPIC_ALERT])
+    stream2 = bus.subscribe(None, streams=["2"])
+    bus.publish(TOPIC_ALERT, _alert(1))
+    bus.publish(TOPIC_DETECTION, make_event(TOPIC_DETECTION, 2, "cam2", "视角1", 0.0, tracks=[]))
+    bus.publish(TOPIC_ALERT, _alert(2))
+    assert _wait_len(alerts, 2) == 2 and _wait_len(stream2, 2) == 2
+    assert [e.payload["stream"] for e in alerts.get()] == [1, 2]
+    events = stream2.get()
+    assert [e.topic for e in events] == [TOPIC_DETECTION, TOPIC_ALERT]
+    assert json.loads(events[1].data)["message"] == "报警0"
+    assert alerts.get(timeout=0.05) == []
+    alerts.close()
+    stream2.close()
+
+
+def test_bounded_buffer_and_slow_subscriber():
+    bus = EventBus()
+    slow = bus.subscribe(maxlen=10)
+    fast = bus.subscribe(maxlen=1000)
+    t0 = time.perf_counter()
+    for i in range(500):
+        bus.publish(TOPIC_ALERT, _alert(1, i))
+    assert time.perf_counter() - t0 < 1.0  # 发布不等待订阅者
+    assert _wait_len(fast, 500) == 500
+    _wait_len(slow, 10)
+    events = slow.get()
+    # 只保留最新的10个，其余计为丢弃
+    assert [e.payload["ts"] for e in events] == [float(i) for i in range(490, 500)]
+    assert slow.dropped == 490 and fast.dropped == 0
+    # 同一事件只序列化一次，订阅者共用
+    assert events[-1] is fast.get()[-1]
+    slow.close()
+    fast.close()
+
+
+def test_track_summary():
+    track = Track(5, [10, 20, 110, 220], 0.9)
+    track.zones = [0, 2]
+    assert track_summary([track]) == [{"id": 5, "box": [10.0, 20.0, 110.0, 220.0], "areas": [0, 2]}]
+
+
+def _read_event(response):
+    fields = {}
+    while True:
+        line = response.fp.readline().decode("utf-8").rstrip("\n")
+        if not line:
+            if "data" in fields:
+                return fields
+            continue
+        if line.startswith(":") or ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        fields[key] = value.strip()
+
+
+def test_sse():
+    bus = EventBus()
+    server = EventServer(bus, port=0).start()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        conn.request("GET", "/events?topics=alert&streams=3")
+        response = conn.getresponse()
+        assert response.status == 200
+        assert response.getheader("Content-Type").startswith("text/event-stream")
+        deadline = time.time() + 5
+        while not bus.has_subscribers(TOPIC_ALERT) and time.time() < deadline:
+            time.sleep(0.01)
+        bus.publish(TOPIC_ALERT, _alert(4))  # 其他视频源，不推送
+        bus.publish(TOPIC_ALERT, _alert(3, 7))
+        event = _read_event(response)
+        assert event["event"] == "alert"
+        payload = json.loads(event["data"])
+        assert payload["stream"] == 3 and payload["ts"] == 7.0 and payload["view"] == "视角1"
+
+        conn2 = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        conn2.request("GET", "/")
+        listing = json.loads(conn2.getresponse().read())
+        assert listing == [{"topics": ["alert"], "streams": ["3"], "pending": 0, "dropped": 0}]
+        conn2.close()
+        conn.close()
+    finally:
+        server.stop()
+
+
+def run_tests():
+    print("========== 事件推送测试 ==========")
+    test_no_subscribers()
+    test_filter_topics_and_streams()
+    test_bounded_buffer_and_slow_subscriber()
+    test_track_summary()
+    test_sse()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,72 @@
+"""
+测试frame_mailbox.py的功能：容量满时丢弃最旧的帧、通知合并、指标更新
+"""
+import os
+import sys
+import threading
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtCore import Qt
+
+from controller.frame_mailbox import FrameMailbox
+from controller.metrics import MetricsRegistry, StreamMetrics
+
+
+def test_drop_oldest_and_coalesced_ready():
+    metrics = StreamMetrics(1, registry=MetricsRegistry())
+    mailbox = FrameMailbox(1, capacity=2, metrics=metrics)
+    notified = []
+    mailbox.ready.connect(notified.append)
+
+    for i in range(5):
+        mailbox.put(i)
+    # 界面线程没取之前只通知一次
+    assert notified == [1]
+    assert len(mailbox) == 2 and metrics.queue_depth.value == 2
+    assert mailbox.dropped == 3 and metrics.display_dropped.value == 3
+
+    assert mailbox.take_all() == [3, 4]
+    assert metrics.queue_depth.value == 0 and mailbox.take_all() == []
+    mailbox.put(5)
+    assert notified == [1, 1]
+
+
+def test_bounded_under_concurrent_producers():
+    mailbox = FrameMailbox(2)
+    notified = []
+    # 没有事件循环，直接在放入线程里记录通知
+    mailbox.ready.connect(notified.append, Qt.ConnectionType.DirectConnection)
+
+    def produce():
+        for i in range(2000):
+            mailbox.put(i)
+
+    threads = [threading.Thread(target=produce) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(mailbox) == 1 and len(notified) == 1
+    assert mailbox.dropped == 8000 - 1
+
+
+def test_invalid_capacity():
+    try:
+        FrameMailbox(1, capacity=0)
+    except ValueError:
+        return
+    raise AssertionError("容量为0应报错")
+
+
+def run_tests():
+    print("========== 送帧邮箱测试 ==========")
+    test_drop_oldest_and_coalesced_ready()
+    test_bounded_under_concurrent_producers()
+    test_invalid_capacity()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
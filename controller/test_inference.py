@@ -0,0 +1,62 @@
+"""
+测试inference.py的功能：类别ID解析、原始输出的阈值过滤与NMS
+"""
+import os
+import sys
+
+import numpy as np
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.inference import postprocess_bare, resolve_class_id
+
+
+def _raw_output(boxes_cxcywh, class_scores):
+    """拼出 (4 + 类别数, 锚点数) 的原始输出"""
+    return np.concatenate([np.asarray(boxes_cxcywh, dtype=np.float32).T,
+                           np.asarray(class_scores, dtype=np.float32).T], axis=0)
+
+
+def test_resolve_class_id():
+    assert resolve_class_id({0: 'glove', 1: 'bare'}) == 1
+    assert resolve_class_id(['bare', 'glove']) == 0
+    assert resolve_class_id({0: 'glove'}) is None
+
+
+def test_threshold_argmax_and_nms():
+    pred = _raw_output(
+        [[50, 50, 20, 20], [52, 50, 20, 20], [200, 200, 30, 30], [300, 300, 10, 10], [100, 100, 10, 10]],
+        # 每行: [glove, bare]
+        [[0.1, 0.9], [0.1, 0.85], [0.1, 0.5], [0.95, 0.6], [0.2, 0.1]],
+    )
+    out = postprocess_bare(pred, 1, conf=0.3)
+    assert out.dtype == np.float32 and out.shape == (2, 5)
+    # 第2个框与第1个重叠被NMS去掉；第4个框glove分数更高，不算bare
+    assert np.allclose(out[0], [40, 40, 60, 60, 0.9])
+    assert np.allclose(out[1], [185, 185, 215, 215, 0.5])
+    # 阈值提高后只剩一个
+    assert postprocess_bare(pred, 1, conf=0.8).shape == (1, 5)
+    assert postprocess_bare(pred, 1, conf=0.99).shape == (0, 5)
+
+
+def test_max_det():
+    rng = np.random.default_rng(0)
+    centers = rng.uniform(0, 640, (500, 2))
+    boxes = np.concatenate([centers, np.full((500, 2), 4.0)], axis=1)
+    scores = np.stack([np.zeros(500), rng.uniform(0.5, 1.0, 500)], axis=1)
+    out = postprocess_bare(_raw_output(boxes, scores), 1, conf=0.3, max_det=100)
+    assert out.shape == (100, 5)
+    assert np.all(np.diff(out[:, 4]) <= 0)
+
+
+def run_tests():
+    print("========== 精简推理后处理测试 ==========")
+    test_resolve_class_id()
+    test_threshold_argmax_and_nms()
+    test_max_det()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
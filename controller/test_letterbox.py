@@ -0,0 +1,76 @@
+"""
+测试letterbox.py的功能：输出尺寸、缓冲区复用、框坐标还原
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.letterbox import Letterbox
+
+
+def _reference(frame, imgsz):
+    """逐步实现的固定尺寸letterbox，用于对照"""
+    h, w = frame.shape[:2]
+    r = min(imgsz / h, imgsz / w)
+    nw, nh = int(round(w * r)), int(round(h * r))
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = int(round((imgsz - nh) / 2 - 0.1)), int(round((imgsz - nw) / 2 - 0.1))
+    canvas[top:top + nh, left:left + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    return canvas[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+
+
+def test_shapes_and_reference():
+    frame = np.random.default_rng(0).integers(0, 255, (1080, 1860, 3), dtype=np.uint8)
+    assert Letterbox(640)(frame).shape == (1, 3, 384, 640)
+    assert Letterbox(416)(frame).shape == (1, 3, 256, 416)
+    assert Letterbox(960)(frame).shape == (1, 3, 576, 960)
+    # 非32倍数向上取整
+    assert Letterbox(600)(frame).shape == (1, 3, 384, 608)
+    fixed = Letterbox(640, auto=False)
+    assert np.abs(fixed(frame) - _reference(frame, 640)).max() < 1e-6
+
+
+def test_buffer_reused():
+    rng = np.random.default_rng(1)
+    letterbox = Letterbox(640)
+    first = letterbox(rng.integers(0, 255, (540, 930, 3), dtype=np.uint8))
+    second = letterbox(rng.integers(0, 255, (540, 930, 3), dtype=np.uint8))
+    assert first is second
+    # 尺寸变化时重新分配
+    third = letterbox(rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8))
+    assert third is not first and third.shape == (1, 3, 384, 640)
+    # 写入批缓冲区的切片，结果与单帧缓冲区一致
+    frame = rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    batch = np.zeros((2, 3, 384, 640), dtype=np.float32)
+    assert letterbox(frame, out=batch[1:2]).base is batch
+    assert np.array_equal(batch[1], letterbox(frame)[0])
+
+
+def test_scale_boxes_round_trip():
+    for auto in (True, False):
+        letterbox = Letterbox(640, auto=auto)
+        letterbox(np.zeros((1080, 1860, 3), dtype=np.uint8))
+        boxes = np.array([[100, 200, 300, 400, 0.9], [0, 0, 1860, 1080, 0.5]], dtype=np.float32)
+        model_boxes = boxes.copy()
+        model_boxes[:, :4] *= letterbox.gain
+        model_boxes[:, [0, 2]] += letterbox.left
+        model_boxes[:, [1, 3]] += letterbox.top
+        restored = letterbox.scale_boxes(model_boxes)
+        assert np.allclose(restored, boxes, atol=1e-3)
+
+
+def run_tests():
+    print("========== letterbox预处理测试 ==========")
+    test_shapes_and_reference()
+    test_buffer_reused()
+    test_scale_boxes_round_trip()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,59 @@
+"""
+测试log_sink.py的功能：落盘、滚动、按时间/关键字检索
+"""
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.log_sink import LogSink, list_segments, search_logs
+
+
+def test_write_and_search():
+    with tempfile.TemporaryDirectory() as log_dir:
+        sink = LogSink(log_dir, max_bytes=2048, block_lines=50)
+        base = 1_700_000_000.0
+        for i in range(2000):
+            camera = "104" if i % 2 == 0 else "102"
+            sink.write(f"连接失败，3秒后重试: 摄像头{camera} #{i}\n第二行", ts=base + i)
+        sink.close()
+
+        # 小文件上限会触发滚动
+        assert len(list_segments(log_dir)) > 1
+
+        # 全量检索
+        records = search_logs(log_dir)
+        assert len(records) == 2000
+        assert records[0] == (base, "连接失败，3秒后重试: 摄像头104 #0\n第二行")
+
+        # 时间范围 + 关键字
+        records = search_logs(log_dir, keyword="摄像头104", start=base + 100, end=base + 199)
+        assert [int(ts - base) for ts, _ in records] == list(range(100, 200, 2))
+
+        # 条数限制
+        assert len(search_logs(log_dir, limit=7)) == 7
+
+
+def test_backup_count():
+    with tempfile.TemporaryDirectory() as log_dir:
+        sink = LogSink(log_dir, max_bytes=1, backup_count=3, block_lines=1)
+        for i in range(10):
+            sink.write(f"日志 {i}", ts=1000.0 + i)
+            time.sleep(0.01)
+        sink.close()
+        assert len(list_segments(log_dir)) == 3
+        assert [msg for _, msg in search_logs(log_dir)] == ["日志 7", "日志 8", "日志 9"]
+
+
+def run_tests():
+    print("========== 日志落盘测试 ==========")
+    test_write_and_search()
+    test_backup_count()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
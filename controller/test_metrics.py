@@ -0,0 +1,77 @@
+"""
+测试metrics.py的功能：直方图分桶、Prometheus文本输出、统计表数据、本机抓取端口
+"""
+import os
+import sys
+import urllib.request
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.metrics import MetricsRegistry, MetricsServer, StreamMetrics
+
+
+def test_render_prometheus():
+    registry = MetricsRegistry()
+    m = StreamMetrics(3, registry)
+    m.reconnects.inc()
+    m.reconnects.inc()
+    m.queue_depth.inc(4)
+    m.queue_depth.dec()
+    for v in (0.0005, 0.003, 0.003, 7.0):
+        m.inference_seconds.observe(v)
+
+    text = registry.render_prometheus()
+    assert 'glove_reconnects_total{stream="3"} 2' in text
+    assert 'glove_frame_queue_depth{stream="3"} 3' in text
+    assert 'glove_inference_seconds_bucket{stream="3",le="0.001"} 1' in text
+    assert 'glove_inference_seconds_bucket{stream="3",le="0.005"} 3' in text
+    assert 'glove_inference_seconds_bucket{stream="3",le="+Inf"} 4' in text
+    assert 'glove_inference_seconds_count{stream="3"} 4' in text
+    assert text.count("# TYPE glove_inference_seconds histogram") == 1
+
+
+def test_stream_rows():
+    registry = MetricsRegistry()
+    m = StreamMetrics("7", registry)
+    m.draw_seconds.observe(0.010)
+    m.draw_seconds.observe(0.020)
+    assert abs(registry.stream_rows()["7"]["glove_draw_seconds"] - 15.0) < 1e-6
+    # 第二次取的是两次调用之间的均值
+    m.draw_seconds.observe(0.004)
+    assert abs(registry.stream_rows()["7"]["glove_draw_seconds"] - 4.0) < 1e-6
+    assert registry.stream_rows()["7"]["glove_draw_seconds"] is None
+
+    registry.remove_stream(7)
+    assert registry.stream_rows() == {}
+
+    # 视频源停止时通过 StreamMetrics.remove() 移除，其他视频源不受影响
+    first, second = StreamMetrics(1, registry), StreamMetrics(2, registry)
+    first.alerts.inc()
+    second.alerts.inc()
+    first.remove()
+    text = registry.render_prometheus()
+    assert 'stream="1"' not in text and 'glove_alerts_total{stream="2"} 1' in text
+
+
+def test_metrics_server():
+    registry = MetricsRegistry()
+    StreamMetrics(1, registry).alerts.inc()
+    server = MetricsServer(registry, port=0).start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as resp:
+            assert 'glove_alerts_total{stream="1"} 1' in resp.read().decode("utf-8")
+    finally:
+        server.stop()
+
+
+def run_tests():
+    print("========== 运行指标测试 ==========")
+    test_render_prometheus()
+    test_stream_rows()
+    test_metrics_server()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
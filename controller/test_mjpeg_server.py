@@ -0,0 +1,176 @@
+"""
+测试mjpeg_server.py的功能：多个客户端共用一次编码、按客户端帧率/宽度输出、慢客户端跳帧、没有客户端时不保存帧
+"""
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from controller.mjpeg_server import FrameHub, MjpegServer, quantize_quality, quantize_width
+
+
+def _frame(i):
+    frame = np.zeros((360, 640, 3), dtype=np.uint8)
+    cv2.putText(frame, str(i), (50, 200), cv2.FONT_HERSHEY_SIMPLEX, 4, (255, 255, 255), 5)
+    return frame
+
+
+def _read_parts(port, path, count, timeout=10.0):
+    """读取 count 帧，返回解码后的图像列表"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    conn.request("GET", path)
+    response = conn.getresponse()
+    assert response.status == 200
+    images = []
+    while len(images) < count:
+        line = response.fp.readline()
+        if not line:
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+            response.fp.readline()
+            data = response.fp.read(length)
+            images.append(cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR))
+    conn.close()
+    return images
+
+
+def _publisher(hub, stream_id, stop, fps=50):
+    i = 0
+    while not stop.is_set():
+        hub.publish(stream_id, _frame(i))
+        i += 1
+        time.sleep(1.0 / fps)
+
+
+def _stats(port):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", "/streams.json")
+    data = json.loads(conn.getresponse().read())
+    conn.close()
+    return {item["id"]: item for item in data}
+
+
+def test_quantize():
+    assert quantize_quality(73) == 70 and quantize_quality(5) == 30 and quantize_quality(100) == 90
+    assert quantize_width(0) == 0 and quantize_width(700) == 640 and quantize_width(100) == 320
+
+
+def test_no_clients_no_frames():
+    hub = FrameHub()
+    hub.open(1, "cam1")
+    assert not hub.publish(1, _frame(0))
+    assert hub.stats()[0]["published"] == 0
+    assert not hub.publish(2, _frame(0))  # 未登记的路
+
+
+def test_shared_encoding_and_per_client_settings():
+    hub = FrameHub()
+    hub.open(7, "cam7")
+    server = MjpegServer(hub, host="127.0.0.1", port=0).start()
+    stop = threading.Event()
+    threading.Thread(target=_publisher, args=(hub, 7, stop), daemon=True).start()
+    try:
+        results = {}
+
+        def client(key, path, count):
+            results[key] = _read_parts(server.port, path, count)
+
+        clients = [threading.Thread(target=client, args=(i, "/stream/7.mjpg?fps=20&width=320", 10)) for i in range(4)]
+        clients.append(threading.Thread(target=client, args=("full", "/stream/7.mjpg?fps=20", 10)))
+        for t in clients:
+            t.start()
+        for t in clients:
+            t.join(15)
+        assert all(len(results[i]) == 10 and results[i][0].shape[1] == 320 for i in range(4))
+        assert results["full"][0].shape[1] == 640
+        stats = _stats(server.port)[7]
+        # 5个客户端、2种档位：编码次数不超过 发布帧数 x 档位数，与客户端数量无关
+        assert stats["encodes"] <= stats["published"] * 2, stats
+        assert stats["encodes"] < 5 * 10, stats
+
+        # 客户端帧率：fps=5 时1.2秒内最多约6帧
+        t0 = time.monotonic()
+        _read_parts(server.port, "/stream/7.mjpg?fps=5", 6)
+        assert time.monotonic() - t0 >= 0.9
+
+        # 快照
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        conn.request("GET", "/snapshot/7.jpg?width=480")
+        response = conn.getresponse()
+        assert response.status == 200 and response.getheader("Content-Type") == "image/jpeg"
+        assert cv2.imdecode(np.frombuffer(response.read(), np.uint8), cv2.IMREAD_COLOR).shape[1] == 480
+        conn.close()
+    finally:
+        stop.set()
+        server.stop()
+
+
+def test_slow_client_skips_frames():
+    hub = FrameHub()
+    hub.open(3, "cam3")
+    server = MjpegServer(hub, host="127.0.0.1", port=0).start()
+    stop = threading.Event()
+    threading.Thread(target=_publisher, args=(hub, 3, stop, 100), daemon=True).start()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        conn.request("GET", "/stream/3.mjpg?fps=30")
+        response = conn.getresponse()
+        time.sleep(1.0)  # 不读取，模拟慢客户端
+        published = _stats(server.port)[3]["published"]
+        # 发布不受慢客户端影响，服务端不为它缓存帧
+        assert published >= 50, published
+        assert hub.stats()[0]["encodes"] < published
+        response.close()
+        conn.close()
+    finally:
+        stop.set()
+        server.stop()
+
+
+def test_unknown_stream_and_close():
+    hub = FrameHub()
+    hub.open(5, "cam5")
+    server = MjpegServer(hub, host="127.0.0.1", port=0).start()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        conn.request("GET", "/stream/99.mjpg")
+        assert conn.getresponse().status == 404
+        conn.close()
+
+        done = threading.Event()
+
+        def viewer():
+            _read_parts(server.port, "/stream/5.mjpg", 1000)
+            done.set()
+
+        threading.Thread(target=viewer, daemon=True).start()
+        time.sleep(0.3)
+        hub.publish(5, _frame(0))
+        hub.close(5)  # 检测结束，客户端连接随之结束
+        assert done.wait(5)
+        assert hub.stats() == []
+    finally:
+        server.stop()
+
+
+def run_tests():
+    print("========== 远程观看(MJPEG)测试 ==========")
+    test_quantize()
+    test_no_clients_no_frames()
+    test_shared_encoding_and_per_client_settings()
+    test_slow_client_skips_frames()
+    test_unknown_stream_and_close()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
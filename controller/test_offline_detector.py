@@ -0,0 +1,133 @@
+"""
+测试offline_detector.py的功能：跳帧检测与报警事件、记录和标注视频输出、按时间段处理、多进程分片
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark.stub_model import StubYOLO
+import controller.offline_detector as offline_detector
+from controller.offline_detector import RecordWriter, analyze_video, find_videos, run_offline
+
+AREA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "area")
+ZONE_PATH = os.path.join(AREA_DIR, "0911_1_frame00000.xml")  # 区域0缩放到465x270约为 (1, 70, 180, 245)
+
+
+class _FixedDetector:
+    """每帧在区域0内返回同一个高分框"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect_bare_batch(self, frames, conf):
+        self.calls += len(frames)
+        return [np.array([[20, 100, 100, 200, 0.9]], dtype=np.float32) for _ in frames]
+
+
+def _write_video(path, seconds=4, fps=25):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (465, 270))
+    for i in range(int(seconds * fps)):
+        frame = np.full((270, 465, 3), 60, dtype=np.uint8)
+        cv2.putText(frame, str(i), (200, 150), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def test_alert_and_records():
+    with tempfile.TemporaryDirectory() as tmp:
+        video = _write_video(os.path.join(tmp, "a.mp4"))
+        detector = _FixedDetector()
+        writer = RecordWriter(tmp, "a")
+        result = analyze_video(video, detector, interval=2, batch=4, zone_path=ZONE_PATH, writer=writer,
+                               video_out=os.path.join(tmp, "a.annotated.mp4"))
+        writer.close()
+
+        assert result["frames"] == 100 and result["processed"] == 50 and detector.calls == 50
+        # 同一个人（轨迹）只报警一次，约在危险持续 1.5*0.8 秒后
+        assert len(result["alerts"]) == 1
+        frame_idx, ts, areas, track_ids = result["alerts"][0]
+        assert areas == [0] and track_ids == [1] and 1.0 <= ts <= 1.6
+        with open(writer.alerts_path, encoding="utf-8") as f:
+            assert [json.loads(line)["frame"] for line in f] == [frame_idx]
+        with open(writer.detections_path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        # 第一次检测建立轨迹，第二次确认后开始输出
+        assert len(rows) == 49 and rows[0]["zones"] == [0]
+        cap = cv2.VideoCapture(os.path.join(tmp, "a.annotated.mp4"))
+        assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 50
+        cap.release()
+
+
+def test_time_window():
+    with tempfile.TemporaryDirectory() as tmp:
+        video = _write_video(os.path.join(tmp, "a.mp4"))
+        result = analyze_video(video, _FixedDetector(), start_s=1.0, end_s=3.0, zone_path=ZONE_PATH)
+        assert result["frames"] == 50 and result["processed"] == 50
+        assert result["alerts"][0][0] >= 25
+
+
+def test_encoder_failure_does_not_hang():
+    class _FailingWriter:
+        def write(self, frame):
+            raise IOError("磁盘已满")
+
+        def release(self):
+            pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = _write_video(os.path.join(tmp, "a.mp4"))
+        original = offline_detector._open_video_writer
+        offline_detector._open_video_writer = lambda path, fps, size: _FailingWriter()
+        result = {}
+        try:
+            worker = threading.Thread(target=lambda: result.update(analyze_video(
+                video, _FixedDetector(), batch=4, zone_path=ZONE_PATH, queue_size=2,
+                video_out=os.path.join(tmp, "a.annotated.mp4"))), daemon=True)
+            worker.start()
+            worker.join(30)
+        finally:
+            offline_detector._open_video_writer = original
+        # 编码线程退出后检测继续完成，不会卡在已满的编码队列上；编码错误写入结果
+        assert not worker.is_alive()
+        assert result["processed"] == 100 and len(result["alerts"]) == 1
+        assert "磁盘已满" in result["video_error"]
+
+
+def test_process_pool_sharding():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "videos")
+        os.makedirs(os.path.join(src, "sub"))
+        _write_video(os.path.join(src, "x.mp4"), seconds=1)
+        _write_video(os.path.join(src, "sub", "x.mp4"), seconds=1)
+        videos = find_videos(src)
+        assert len(videos) == 2
+        out = os.path.join(tmp, "out")
+        summary = run_offline(videos, src, out, StubYOLO, workers=2, batch=4, log=lambda msg: None)
+        assert summary["files"] == 2 and not summary["failed"]
+        assert sorted(os.path.basename(v["detections_file"]) for v in summary["videos"]) == \
+            ["sub__x.detections.jsonl", "x.detections.jsonl"]
+        assert all(v["processed"] == 25 for v in summary["videos"])
+        with open(os.path.join(out, "summary.json"), encoding="utf-8") as f:
+            assert json.load(f)["files"] == 2
+
+
+def run_tests():
+    print("========== 离线批处理测试 ==========")
+    test_alert_and_records()
+    test_time_window()
+    test_encoder_failure_does_not_hang()
+    test_process_pool_sharding()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,146 @@
+"""
+测试DetectionThread的暂停策略：drain 暂停期间持续丢弃缓冲帧，release 释放连接、恢复时后台重新连接，本地文件保持位置
+"""
+import os
+import sys
+import threading
+import time
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.main_controller import PAUSE_DRAIN, PAUSE_RELEASE, DetectionThread
+from model.db import VideoSource
+
+
+class _FakeCapture:
+    """模拟实时流：每次grab等待一帧的时间"""
+
+    def __init__(self, fail_after=None):
+        self.grabs = 0
+        self.released = False
+        self.fail_after = fail_after
+
+    def grab(self):
+        time.sleep(0.005)
+        self.grabs += 1
+        return self.fail_after is None or self.grabs <= self.fail_after
+
+    def isOpened(self):
+        return not self.released
+
+    def release(self):
+        self.released = True
+
+
+class _FakeDetector:
+    def __init__(self):
+        self.resets = 0
+
+    def reset_tracks(self):
+        self.resets += 1
+
+
+def _thread(video_type, policy, cap):
+    source = VideoSource(id=900 + video_type, name="cam", path="rtsp://127.0.0.1/cam", is_true=True, is_valid=True,
+                         scene_id=1, type=video_type, alert_email="")
+    thread = DetectionThread(source, None, 1, pause_policy=policy)
+    thread.running = True
+    thread.cap = cap
+    thread.detector = _FakeDetector()
+    return thread
+
+
+def _pause_for(thread, seconds):
+    thread.paused = True
+    waiter = threading.Thread(target=thread._wait_paused)
+    waiter.start()
+    time.sleep(seconds)
+    thread.paused = False
+    waiter.join(timeout=2)
+    assert not waiter.is_alive()
+
+
+def test_drain_keeps_connection():
+    cap = _FakeCapture()
+    thread = _thread(2, PAUSE_DRAIN, cap)
+    _pause_for(thread, 0.2)
+    assert thread.cap is cap and not cap.released
+    assert cap.grabs > 10
+    assert thread.detector.resets == 1
+
+
+def test_drain_releases_on_disconnect():
+    cap = _FakeCapture(fail_after=3)
+    thread = _thread(2, PAUSE_DRAIN, cap)
+    _pause_for(thread, 0.2)
+    assert thread.cap is None and cap.released
+
+
+def test_release_policy():
+    cap = _FakeCapture()
+    thread = _thread(3, PAUSE_RELEASE, cap)
+    _pause_for(thread, 0.1)
+    assert thread.cap is None and cap.released and cap.grabs == 0
+
+
+def test_release_reopens_on_resume():
+    connect_seconds = 0.3  # 模拟RTSP连接耗时
+    cap = _FakeCapture()
+    thread = _thread(2, PAUSE_RELEASE, cap)
+    reopened = _FakeCapture()
+
+    def create_capture():
+        time.sleep(connect_seconds)
+        return reopened
+
+    thread.session.create_capture = create_capture
+    thread.pause()
+    waiter = threading.Thread(target=thread._wait_paused)
+    waiter.start()
+    time.sleep(0.2)
+    assert thread.cap is None and cap.released
+
+    t0 = time.perf_counter()
+    thread.resume()
+    resume_call = time.perf_counter() - t0
+    waiter.join(timeout=5)
+    latency = time.perf_counter() - t0
+    assert not waiter.is_alive()
+    # 恢复不阻塞界面线程；检测线程醒来时已接过后台连好的视频源，主循环不再走 连接+等待1秒 的重连流程
+    assert resume_call < 0.05
+    assert thread.cap is reopened and thread._reopen is None
+    assert latency < connect_seconds + 0.2
+    print(f"release 恢复延迟: {latency * 1000:.0f}ms（连接 {connect_seconds * 1000:.0f}ms，"
+          f"原来主循环重连约 {(connect_seconds + 1) * 1000:.0f}ms）")
+
+
+def test_local_file_keeps_position():
+    cap = _FakeCapture()
+    thread = _thread(1, PAUSE_RELEASE, cap)
+    _pause_for(thread, 0.1)
+    assert thread.cap is cap and not cap.released and cap.grabs == 0
+    assert thread.detector.resets == 0
+
+
+def test_unknown_policy():
+    try:
+        _thread(2, "sleep", None)
+    except ValueError:
+        return
+    raise AssertionError("未知策略应报错")
+
+
+def run_tests():
+    print("========== 暂停策略测试 ==========")
+    test_drain_keeps_connection()
+    test_drain_releases_on_disconnect()
+    test_release_policy()
+    test_release_reopens_on_resume()
+    test_local_file_keeps_position()
+    test_unknown_policy()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
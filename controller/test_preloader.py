@@ -0,0 +1,38 @@
+"""
+测试preloader.py的功能：按顺序导入并记录耗时，未安装的模块不报错
+"""
+import os
+import sys
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.preloader import ModulePreloader, format_timings
+
+
+def test_preload_records_timings():
+    preloader = ModulePreloader([("json", "json"), ("_no_such_module_", "缺失"), ("csv", "csv")])
+    progress, loaded = [], []
+    preloader.progress.connect(lambda done, total, label: progress.append((done, total, label)))
+    preloader.loaded.connect(loaded.append)
+    preloader.run()  # 直接在当前线程执行，信号同步送达
+    assert progress == [(0, 3, "json"), (1, 3, "缺失"), (2, 3, "csv"), (3, 3, "")]
+    timings = loaded[0]
+    assert list(timings) == ["json", "缺失", "csv"]
+    assert timings["缺失"] is None and timings["json"] >= 0
+    assert "缺失 未安装" in format_timings(timings)
+
+
+def test_format_timings():
+    assert format_timings({"OpenCV": 0.0984, "YOLO": None}) == "OpenCV 98ms, YOLO 未安装"
+
+
+def run_tests():
+    print("========== 后台预加载测试 ==========")
+    test_preload_records_timings()
+    test_format_timings()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,102 @@
+"""
+测试resource_budget.py的功能：按核数和路数分配推理/解码/界面线程，进程级库线程设置在检测线程中完成
+"""
+import os
+import subprocess
+import sys
+import threading
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller import resource_budget
+from controller.resource_budget import (BUDGET_ENV, apply_library_limits, capture_params, configure_detector,
+                                        enter_worker_thread, pin_gui_thread, plan_budget)
+
+
+def test_split_cores():
+    plan = plan_budget(4, cpus=range(16), affinity=False)
+    assert (plan.gui_cores, plan.decode_cores, plan.inference_cores) == (1, 4, 11)
+    assert plan.inference_threads == 2 and plan.decode_threads == 1
+    # 路数多于核数时每路至少1个线程
+    plan = plan_budget(32, cpus=range(16), affinity=False)
+    assert plan.inference_threads == 1 and plan.decode_threads == 1
+
+
+def test_affinity_cpus():
+    plan = plan_budget(8, cores=4, cpus=[2, 3, 5, 7, 11], affinity=True)
+    assert plan.cores == 4 and plan.gui_cpus == [2] and plan.worker_cpus == [3, 5, 7]
+    assert "绑核" in plan.describe()
+
+
+def test_small_machine():
+    plan = plan_budget(2, cpus=[0], affinity=False)
+    assert plan.gui_cores == 0 and plan.inference_threads == 1 and plan.decode_threads == 1
+    plan = plan_budget(2, cpus=range(2), affinity=False)
+    assert (plan.gui_cores, plan.decode_cores, plan.inference_cores) == (1, 1, 1)
+
+
+def test_budget_from_env():
+    os.environ[BUDGET_ENV] = "6"
+    try:
+        plan = plan_budget(1, cpus=range(16), affinity=False)
+    finally:
+        del os.environ[BUDGET_ENV]
+    assert plan.cores == 6 and plan.inference_threads == plan.inference_cores == 4
+
+
+def test_capture_params_and_detector():
+    assert capture_params(None) == []
+    params = capture_params(plan_budget(2, cpus=range(8), affinity=False))
+    assert params == [] or params[1] == 1
+    # 没有onnxruntime会话的检测器（.pt模型、桩模型）不需要重建
+    assert configure_detector(object(), plan_budget(1, cpus=range(8), affinity=False)) is False
+
+
+def test_gui_thread_does_not_import_heavy_modules():
+    # 界面线程开始检测时只绑核，不导入cv2/torch（否则预加载没完成时会卡住界面）
+    code = ("import sys; from controller.resource_budget import pin_gui_thread, plan_budget; "
+            "pin_gui_thread(plan_budget(4, affinity=False)); "
+            "assert not {'cv2', 'torch', 'numpy'} & set(sys.modules), sorted(sys.modules)")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
+    assert pin_gui_thread(plan_budget(4, cpus=range(8), affinity=False)) == []
+
+
+def test_library_limits_in_worker_thread():
+    import cv2
+
+    previous = cv2.getNumThreads()
+    try:
+        resource_budget._library_limits = None
+        cv2.setNumThreads(7)
+        plan = plan_budget(2, cores=8, cpus=range(8), affinity=False)
+        assert plan.decode_cores == 2
+        worker = threading.Thread(target=enter_worker_thread, args=(plan,))
+        worker.start()
+        worker.join()
+        assert cv2.getNumThreads() == plan.decode_cores
+        assert resource_budget._library_limits == (plan.decode_cores, plan.inference_threads)
+        # 预算没变时其他检测线程不再重复设置
+        cv2.setNumThreads(7)
+        apply_library_limits(plan)
+        assert cv2.getNumThreads() == 7
+    finally:
+        cv2.setNumThreads(previous)
+        resource_budget._library_limits = None
+
+
+def run_tests():
+    print("========== CPU线程预算测试 ==========")
+    test_split_cores()
+    test_affinity_cpus()
+    test_small_machine()
+    test_budget_from_env()
+    test_capture_params_and_detector()
+    test_gui_thread_does_not_import_heavy_modules()
+    test_library_limits_in_worker_thread()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
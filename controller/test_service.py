@@ -0,0 +1,125 @@
+"""
+测试service.py的功能：不导入Qt、从数据库读取选中的视频源、报警写入日志并推送报警事件、SIGTERM后正常退出
+"""
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from controller.event_bus import BUS, TOPIC_ALERT, TOPIC_DETECTION
+from controller.log_sink import search_logs
+from controller.metrics import REGISTRY
+from controller.service import DetectionService, select_sources
+from model.db import Database, VideoSource
+
+HAZARD_SECONDS = (2.0, 5.0)  # 画面变亮的时间段内有人在区域0未戴手套
+
+
+class _HazardDetector:
+    """画面亮时在区域0内返回一个高分框（视频默认按视角1的区域，缩放到465x270）"""
+
+    def detect_bare(self, frame, conf):
+        boxes = [[20, 100, 100, 200, 0.9]] if frame[:20, :20].mean() > 128 else []
+        return np.array(boxes, dtype=np.float32).reshape(-1, 5)
+
+
+def _write_video(path, seconds=8, fps=25):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (465, 270))
+    for i in range(int(seconds * fps)):
+        bright = HAZARD_SECONDS[0] <= i / fps < HAZARD_SECONDS[1]
+        writer.write(np.full((270, 465, 3), 200 if bright else 60, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def _prepare_db(db_path, video_path):
+    db = Database(db_path)
+    db.add_scene("车间A")
+    db.add_scene("车间B")
+    scenes = {s.name: s.id for s in db.get_all_scenes()}
+    db.add_video_source(VideoSource(id=0, name="cam1", path=video_path, is_true=True, is_valid=True,
+                                    scene_id=scenes["车间A"], type=1, alert_email=""))
+    db.add_video_source(VideoSource(id=0, name="cam2", path=video_path, is_true=False, is_valid=True,
+                                    scene_id=scenes["车间A"], type=1, alert_email=""))
+    db.add_video_source(VideoSource(id=0, name="cam3", path=video_path, is_true=True, is_valid=True,
+                                    scene_id=scenes["车间B"], type=1, alert_email=""))
+    return db
+
+
+def test_no_qt_import():
+    code = "import sys, controller.service; assert 'PyQt6' not in sys.modules, 'PyQt6'"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_select_sources():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _prepare_db(os.path.join(tmp, "monitor.db"), "a.mp4")
+        assert [v.name for _, v in select_sources(db)] == ["cam1", "cam3"]
+        assert [v.name for _, v in select_sources(db, ["车间B"])] == ["cam3"]
+        db.close()
+
+
+def test_service_alert_and_sigterm():
+    with tempfile.TemporaryDirectory() as tmp:
+        video = _write_video(os.path.join(tmp, "a.mp4"))
+        db_path = os.path.join(tmp, "monitor.db")
+        _prepare_db(db_path, video).close()
+        log_dir = os.path.join(tmp, "logs")
+        service = DetectionService(lambda source: _HazardDetector(), db_path=db_path, scenes=["车间A"],
+                                   log_dir=log_dir, metrics_port=0, use_scheduler=False, echo=False)
+        service.install_signal_handlers()
+
+        def terminate():
+            deadline = time.time() + 20
+            while time.time() < deadline and not (service.runners and service.runners[0].alerts):
+                time.sleep(0.1)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        killer = threading.Thread(target=terminate)
+        subscription = BUS.subscribe([TOPIC_ALERT])
+        detections = BUS.subscribe([TOPIC_DETECTION])
+        killer.start()
+        try:
+            service.run(stats_seconds=0.5)
+        finally:
+            killer.join()
+            subscription.close()
+            detections.close()
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        assert len(service.runners) == 1 and not service.runners[0].is_alive()
+        assert str(service.runners[0].source.id) not in REGISTRY.stream_rows()  # 停止后不再导出指标
+        assert service.runners[0].alerts >= 1
+        messages = [m for _, m in search_logs(log_dir, keyword="[报警]")]
+        assert messages and "cam1" in messages[0] and "区域0" in messages[0]
+        assert search_logs(log_dir, keyword="服务已停止")
+        alerts = [e.payload for e in subscription.get(timeout=1)]
+        assert alerts and alerts[0]["name"] == "cam1" and alerts[0]["areas"] == [0] and alerts[0]["tracks"]
+        # 检测事件与界面版格式一致（带帧序号）
+        frames = [e.payload for e in detections.get(timeout=1)]
+        seqs = [f["seq"] for f in frames]
+        assert seqs and seqs == sorted(seqs) and all(isinstance(s, int) and s > 0 for s in seqs)
+
+
+def run_tests():
+    print("========== 无界面服务测试 ==========")
+    test_no_qt_import()
+    test_select_sources()
+    test_service_alert_and_sigterm()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,91 @@
+"""
+测试stream_session.py的功能：读帧计数、读取失败按断流处理、按间隔或调度推理、推理后归还槽位并更新风险等级
+"""
+import os
+import sys
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from controller.detection_scheduler import RISK_DISCONNECTED, DetectionScheduler
+from controller.metrics import MetricsRegistry, StreamMetrics
+from controller.stream_session import StreamSession
+from model.db import VideoSource
+
+
+class _FakeCapture:
+    def __init__(self, frames):
+        self.frames = frames
+        self.released = False
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.frames <= 0:
+            return False, None
+        self.frames -= 1
+        return True, np.zeros((4, 4, 3), np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+def _session(scheduler=None, interval=3):
+    source = VideoSource(id=950, name="cam", path="rtsp://127.0.0.1/cam", is_true=True, is_valid=True,
+                         scene_id=1, type=0, alert_email="")
+    return StreamSession(source, StreamMetrics(source.id, MetricsRegistry()), scheduler=scheduler, interval=interval)
+
+
+def test_read_and_disconnect():
+    session = _session()
+    cap = session.cap = _FakeCapture(2)
+    assert session.read() is not None and session.read() is not None
+    assert session.seq == 2 and session.metrics.frames_read.value == 2
+    assert session.read() is None
+    assert cap.released and session.cap is None
+    assert session.seq == 2
+    assert session.metrics.frames_dropped.value == 1 and session.metrics.reconnects.value == 1
+    assert session.metrics.risk.value == RISK_DISCONNECTED
+
+
+def test_interval_without_scheduler():
+    session = _session(interval=3)
+    session.cap = _FakeCapture(9)
+    processed = []
+    for _ in range(9):
+        session.read()
+        if session.should_process():
+            processed.append(session.seq)
+    assert processed == [3, 6, 9]
+
+
+def test_scheduler_slot():
+    scheduler = DetectionScheduler(1, max_fps={})  # 不限最高帧率
+    session = _session(scheduler)
+    session.start()
+    try:
+        assert session.should_process(1)
+        assert not session.should_process(2)  # 槽位还没归还
+        assert session.metrics.schedule_skipped.value == 1
+        session.release_slot(2)
+        assert session.metrics.risk.value == 2
+        assert session.should_process(3)
+        session.release_slot(None)  # 推理失败：保持原风险等级
+        assert session.metrics.risk.value == 2
+    finally:
+        session.finish()
+
+
+def run_tests():
+    print("========== 读取循环测试 ==========")
+    test_read_and_disconnect()
+    test_interval_without_scheduler()
+    test_scheduler_slot()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,113 @@
+"""
+测试tracing.py的功能：关闭时不记录、span记录、环形缓冲淘汰最旧的事件、跨线程flow、Chrome Trace格式导出
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.tracing import Tracer
+
+
+def _spans(trace):
+    return [e for e in trace["traceEvents"] if e["ph"] == "X"]
+
+
+def test_disabled():
+    tracer = Tracer(enabled=False)
+    with tracer.span("inference", 1, 1) as span:
+        pass
+    assert span is tracer.span("other")  # 关闭时返回同一个空对象
+    assert _spans(tracer.to_chrome_trace()) == []
+
+
+def test_span_recording():
+    tracer = Tracer(enabled=True)
+    with tracer.span("inference", 3, 42):
+        time.sleep(0.01)
+    start = tracer.now()
+    tracer.record("read", start, start + 2_500_000, stream=3, seq=43, frames=1)
+    events = _spans(tracer.to_chrome_trace())
+    assert [e["name"] for e in events] == ["inference", "read"]
+    inference, read = events
+    assert inference["dur"] >= 10_000  # 微秒
+    assert inference["args"] == {"stream": 3, "seq": 42}
+    assert read["dur"] == 2500.0 and read["ts"] == start / 1000.0
+    assert read["args"] == {"stream": 3, "seq": 43, "frames": 1}
+    tracer.clear()
+    assert _spans(tracer.to_chrome_trace()) == []
+
+
+def test_ring_buffer_eviction():
+    tracer = Tracer(capacity=5, enabled=True)
+    for seq in range(12):
+        tracer.record("read", seq * 1000, seq * 1000 + 500, stream=1, seq=seq)
+    events = _spans(tracer.to_chrome_trace())
+    assert [e["args"]["seq"] for e in events] == [7, 8, 9, 10, 11]
+
+
+def test_flow_across_threads():
+    tracer = Tracer(enabled=True)
+
+    def worker():
+        with tracer.span("process_frame", 2, 9):
+            tracer.flow("s", 2, 9)
+
+    thread = threading.Thread(target=worker, name="DetectionThread-2")
+    thread.start()
+    thread.join()
+    tracer.flow("f", 2, 9)
+
+    trace = tracer.to_chrome_trace()
+    names = {e["tid"]: e["args"]["name"] for e in trace["traceEvents"] if e["ph"] == "M"}
+    start = next(e for e in trace["traceEvents"] if e["ph"] == "s")
+    end = next(e for e in trace["traceEvents"] if e["ph"] == "f")
+    # 起点和终点用 (视频源ID, 帧序号) 关联，分别在两个线程上
+    assert start["id"] == end["id"] == "2:9"
+    assert names[start["tid"]] == "DetectionThread-2"
+    assert names[end["tid"]] == threading.current_thread().name
+    assert end["bp"] == "e" and "bp" not in start
+    assert start["ts"] <= end["ts"]
+
+
+def test_chrome_trace_schema():
+    tracer = Tracer(enabled=True)
+    with tracer.span("inference", 1, 1):
+        tracer.flow("s", 1, 1)
+    tracer.flow("f", 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = tracer.dump(os.path.join(tmp, "sub", "trace.json"))
+        with open(path, encoding="utf-8") as f:
+            trace = json.load(f)
+    assert trace["displayTimeUnit"] == "ms"
+    for event in trace["traceEvents"]:
+        assert {"name", "ph", "pid", "tid"} <= set(event)
+        assert event["pid"] == os.getpid()
+        if event["ph"] == "M":
+            assert event["name"] == "thread_name" and "name" in event["args"]
+            continue
+        assert event["cat"] == "glove" and isinstance(event["ts"], float)
+        if event["ph"] == "X":
+            assert event["dur"] >= 0
+        else:
+            assert event["ph"] in ("s", "f") and event["name"] == "frame"
+    assert sorted(e["ph"] for e in trace["traceEvents"]) == ["M", "X", "f", "s"]
+
+
+def run_tests():
+    print("========== 耗时追踪测试 ==========")
+    test_disabled()
+    test_span_recording()
+    test_ring_buffer_eviction()
+    test_flow_across_threads()
+    test_chrome_trace_schema()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
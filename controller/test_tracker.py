@@ -0,0 +1,124 @@
+"""
+测试tracker.py的功能：跨帧ID稳定、低分框只延续已有轨迹、跳过的帧上按速度外推、轨迹过期与reset、报警标记随轨迹保留
+"""
+import os
+import sys
+
+import numpy as np
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.tracker import ByteTracker, iou_matrix
+
+
+def _det(x, y, score=0.9, w=50, h=100):
+    return [x, y, x + w, y + h, score]
+
+
+def _step(tracker, detections):
+    tracker.predict()
+    return tracker.update(np.array(detections, dtype=np.float32).reshape(-1, 5))
+
+
+def test_stable_ids():
+    tracker = ByteTracker()
+    # 两个人各自向右移动，每帧5像素
+    ids = []
+    for i in range(10):
+        updated = _step(tracker, [_det(100 + 5 * i, 100), _det(400 + 5 * i, 120)])
+        ids.append(sorted(t.id for t in updated))
+    assert ids[0] == []  # 新轨迹需要 min_hits 次更新才确认
+    assert all(frame_ids == [1, 2] for frame_ids in ids[1:])
+    assert len(tracker.tracks) == 2
+    # 轨迹位置跟上了检测框
+    track = next(t for t in tracker.tracks if t.id == 1)
+    assert iou_matrix([track.box], [_det(145, 100)])[0, 0] > 0.9
+
+
+def test_low_score_only_extends():
+    tracker = ByteTracker(high_thresh=0.8, low_thresh=0.3)
+    # 低分框不能新建轨迹
+    for _ in range(3):
+        assert _step(tracker, [_det(100, 100, score=0.5)]) == []
+    assert tracker.tracks == []
+
+    for i in range(3):
+        _step(tracker, [_det(100 + 2 * i, 100)])
+    # 遮挡时分数降低，低分框延续同一条轨迹
+    for i in range(3, 6):
+        updated = _step(tracker, [_det(100 + 2 * i, 100, score=0.5)])
+        assert [t.id for t in updated] == [1]
+        assert updated[0].score == 0.5
+    # 低于 low_thresh 的框忽略
+    assert _step(tracker, [_det(112, 100, score=0.1)]) == []
+    assert len(tracker.tracks) == 1 and not tracker.tracks[0].tracked
+
+
+def test_predict_extrapolates_skipped_frames():
+    tracker = ByteTracker()
+    # 匀速向右，每帧10像素
+    for i in range(8):
+        _step(tracker, [_det(100 + 10 * i, 100)])
+    track = tracker.tracks[0]
+    x_before = float(track.box[0])
+    # 跳过的帧上只 predict()，不推理
+    for _ in range(3):
+        tracker.predict()
+    assert track.time_since_update == 3
+    assert abs(float(track.box[0]) - (x_before + 30)) < 6
+    assert tracker.active_tracks() == [track]  # 跳过的帧上仍然显示预测位置
+    # 外推位置与下一个检测框匹配，ID不变
+    updated = _step(tracker, [_det(100 + 10 * 11, 100)])
+    assert [t.id for t in updated] == [track.id]
+
+
+def test_expiry_and_reset():
+    tracker = ByteTracker(max_lost_frames=5)
+    for _ in range(3):
+        _step(tracker, [_det(100, 100)])
+    for _ in range(5):
+        _step(tracker, [])
+    assert len(tracker.tracks) == 1
+    _step(tracker, [])
+    assert tracker.tracks == []
+
+    for _ in range(3):
+        _step(tracker, [_det(100, 100)])
+    assert len(tracker.tracks) == 1
+    tracker.reset()
+    assert tracker.tracks == [] and tracker.active_tracks() == []
+    # reset 后ID继续递增，不与旧轨迹重复
+    _step(tracker, [_det(100, 100)])
+    assert tracker.tracks[0].id == 3
+
+
+def test_alerted_persists_per_track():
+    tracker = ByteTracker()
+    for i in range(3):
+        _step(tracker, [_det(100 + 5 * i, 100), _det(400, 100)])
+    first = next(t for t in tracker.tracks if t.id == 1)
+    first.alerted = True
+    for i in range(3, 10):
+        updated = _step(tracker, [_det(100 + 5 * i, 100), _det(400, 100)])
+        flags = {t.id: t.alerted for t in updated}
+        assert flags == {1: True, 2: False}
+    # 轨迹过期后同一位置出现的新目标是新轨迹，需要重新报警
+    tracker.reset()
+    for _ in range(3):
+        _step(tracker, [_det(145, 100)])
+    assert [t.alerted for t in tracker.tracks] == [False]
+
+
+def run_tests():
+    print("========== 目标跟踪测试 ==========")
+    test_stable_ids()
+    test_low_score_only_extends()
+    test_predict_extrapolates_skipped_frames()
+    test_expiry_and_reset()
+    test_alerted_persists_per_track()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,105 @@
+"""
+测试zones.py的功能：VOC/CVAT/LabelMe区域加载、缩放、多边形包含判断
+"""
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# 添加项目根目录到Python路径，确保能正确导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.zones import ZoneSet, _rect_points, load_zone_set
+
+AREA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "area")
+
+# 直角三角形，直角在左下: (100,100) (100,500) (500,500)
+TRIANGLE = [[100, 100], [100, 500], [500, 500]]
+
+
+def test_voc_scaling():
+    xml_path = os.path.join(AREA_DIR, "0911_1_frame00000.xml")
+    zone_set, used_path, src_size = load_zone_set(xml_path, (930, 540))
+    assert used_path == xml_path
+    assert src_size == (1860, 1080)
+    # 原始框 (4, 279, 720, 980) 缩小一半（四舍五入）
+    assert zone_set.bboxes[0] == [2, 140, 360, 490]
+    assert all(p is None for p in zone_set.polygons)
+    assert zone_set.zones_containing([10, 150, 100, 200])[0] == 0
+    assert 0 not in zone_set.zones_containing([1, 150, 100, 200])
+
+
+def test_labelme_polygon():
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = os.path.join(tmp, "view.xml")
+        with open(os.path.join(tmp, "view.json"), "w", encoding="utf-8") as f:
+            json.dump({"imageWidth": 1000, "imageHeight": 1000, "shapes": [
+                {"label": "area", "shape_type": "polygon", "points": TRIANGLE},
+                {"label": "other", "shape_type": "polygon", "points": TRIANGLE},
+            ]}, f)
+        # VOC XML 旁边的同名 JSON 优先
+        zone_set, used_path, _ = load_zone_set(xml_path, (1000, 1000))
+        assert used_path.endswith("view.json")
+        assert len(zone_set) == 1
+        assert zone_set.bboxes[0] == [100, 100, 500, 500]
+        # 左下角的框在三角形内
+        assert zone_set.zones_containing([110, 400, 180, 490]) == [0]
+        # 右上角的框在外接矩形内，但不在三角形内
+        assert zone_set.zones_containing([400, 110, 490, 180]) == []
+        # 跨过斜边
+        assert zone_set.zones_containing([200, 150, 300, 300]) == []
+
+        # 缩放后同样成立
+        zone_set, _, _ = load_zone_set(xml_path, (500, 500))
+        assert zone_set.zones_containing([55, 200, 90, 245]) == [0]
+        assert zone_set.zones_containing([200, 55, 245, 90]) == []
+
+
+def test_cvat_polygon_and_box():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cvat.xml")
+        points = ";".join(f"{x},{y}" for x, y in TRIANGLE)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"""<annotations><image id="0" name="f.jpg" width="1000" height="1000">
+<polygon label="area" points="{points}"/>
+<box label="area" xtl="600" ytl="600" xbr="900" ybr="900"/>
+</image></annotations>""")
+        zone_set, _, _ = load_zone_set(path, (1000, 1000))
+        assert len(zone_set) == 2
+        assert zone_set.polygons[0] is not None and zone_set.polygons[1] is None
+        assert zone_set.zones_containing([110, 400, 180, 490]) == [0]
+        assert zone_set.zones_containing([650, 650, 700, 700]) == [1]
+
+
+def test_grid_index_matches_linear_scan():
+    rng = np.random.default_rng(0)
+    zones = []
+    for i in range(100):
+        x1, y1 = rng.integers(0, 1700), rng.integers(0, 950)
+        x2, y2 = x1 + rng.integers(20, 400), y1 + rng.integers(20, 300)
+        if i % 3 == 0:
+            # 三角形多边形
+            zones.append((np.array([[x1, y1], [x1, y2], [x2, y2]], dtype=np.float32), False))
+        else:
+            zones.append((_rect_points(x1, y1, x2, y2), True))
+    zone_set = ZoneSet(zones, (1860, 1080), (930, 540))
+    for _ in range(2000):
+        x1, y1 = rng.uniform(-10, 930), rng.uniform(-10, 540)
+        box = [x1, y1, x1 + rng.uniform(1, 120), y1 + rng.uniform(1, 120)]
+        expected = [i for i in range(len(zone_set)) if zone_set.contains(i, box)]
+        assert zone_set.zones_containing(box) == expected
+
+
+def run_tests():
+    print("========== 检测区域测试 ==========")
+    test_voc_scaling()
+    test_labelme_polygon()
+    test_cvat_polygon_and_box()
+    test_grid_index_matches_linear_scan()
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    run_tests()
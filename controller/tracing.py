@@ -0,0 +1,117 @@
+"""
+分阶段耗时追踪（默认关闭，设置环境变量 GLOVE_TRACE=1 开启）
+- 每个阶段记录为一个span（名称、开始时间、时长、线程、视频源ID、帧序号），写入固定长度的内存环形缓冲
+- 帧从检测线程发到界面线程时记录一条flow，在 Chrome(chrome://tracing) / Perfetto 中可以看到一帧跨线程的完整路径
+- 关闭时 span() 返回同一个空对象，几乎没有开销
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class _NullSpan:
+    """追踪关闭时使用的空span"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "stream", "seq", "start")
+
+    def __init__(self, tracer, name, stream, seq):
+        self.tracer = tracer
+        self.name = name
+        self.stream = stream
+        self.seq = seq
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.start, time.perf_counter_ns(), self.stream, self.seq)
+        return False
+
+
+class Tracer:
+    """追踪器：deque.append 本身是线程安全的，记录时不加锁"""
+
+    def __init__(self, capacity=200000, enabled=None):
+        self.enabled = os.environ.get("GLOVE_TRACE", "0") == "1" if enabled is None else enabled
+        self._events = deque(maxlen=capacity)
+        self._thread_names = {}
+        self._pid = os.getpid()
+
+    def span(self, name, stream=None, seq=None):
+        """with TRACER.span("inference", stream, seq): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, stream, seq)
+
+    def now(self):
+        return time.perf_counter_ns()
+
+    def record(self, name, start_ns, end_ns, stream=None, seq=None, **args):
+        """记录一个已结束的span（时间为 perf_counter_ns）"""
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        self._events.append(("X", name, start_ns, end_ns - start_ns, tid, stream, seq, args or None))
+
+    def flow(self, phase, stream, seq, ts_ns=None):
+        """帧跨线程流转的起点(phase="s")和终点(phase="f")，用 (视频源ID, 帧序号) 关联"""
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        self._events.append((phase, "frame", ts_ns or time.perf_counter_ns(), 0, tid, stream, seq, None))
+
+    def clear(self):
+        self._events.clear()
+
+    def to_chrome_trace(self):
+        """导出为 Chrome Trace Event 格式（Perfetto 也可直接打开）"""
+        events = []
+        for tid, name in list(self._thread_names.items()):
+            events.append({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid,
+                           "args": {"name": name}})
+        for phase, name, ts, dur, tid, stream, seq, extra in list(self._events):
+            event = {"name": name, "cat": "glove", "ph": phase, "ts": ts / 1000.0,
+                     "pid": self._pid, "tid": tid}
+            args = {}
+            if stream is not None:
+                args["stream"] = stream
+            if seq is not None:
+                args["seq"] = seq
+            if extra:
+                args.update(extra)
+            if phase == "X":
+                event["dur"] = dur / 1000.0
+            else:
+                event["id"] = f"{stream}:{seq}"
+                if phase == "f":
+                    event["bp"] = "e"
+            if args:
+                event["args"] = args
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path):
+        """写出追踪文件"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        return path
+
+
+# 全局追踪器
+TRACER = Tracer()
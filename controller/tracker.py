@@ -0,0 +1,171 @@
+"""
+轻量多目标跟踪（ByteTrack思路：卡尔曼预测 + IoU匹配，高低分检测框两轮关联）
+- 每读一帧调用一次 predict()，模型被跳过的帧上轨迹也按速度外推
+- 推理帧调用 update(检测框)，给 bare 框分配稳定的ID
+"""
+
+import numpy as np
+
+# 卡尔曼状态: [cx, cy, w, h, vcx, vcy, vw, vh]，时间步长为1帧
+_F = np.eye(8)
+_F[:4, 4:] = np.eye(4)
+_H = np.eye(4, 8)
+_STD_POS = 1.0 / 20
+_STD_VEL = 1.0 / 160
+
+
+def _xyxy_to_cxcywh(box):
+    x1, y1, x2, y2 = box[:4]
+    return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], dtype=np.float64)
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """两组 xyxy 框的IoU矩阵 (len(a), len(b))"""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+    a = np.asarray(boxes_a, dtype=np.float32)[:, None, :4]
+    b = np.asarray(boxes_b, dtype=np.float32)[None, :, :4]
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+def greedy_match(iou, threshold):
+    """按IoU从大到小贪心匹配，返回 ([(行, 列), ...], 未匹配行, 未匹配列)"""
+    matches = []
+    rows, cols = set(range(iou.shape[0])), set(range(iou.shape[1]))
+    if iou.size:
+        order = np.dstack(np.unravel_index(np.argsort(-iou, axis=None), iou.shape))[0]
+        for r, c in order:
+            if iou[r, c] < threshold:
+                break
+            if r in rows and c in cols:
+                matches.append((int(r), int(c)))
+                rows.discard(r)
+                cols.discard(c)
+    return matches, sorted(rows), sorted(cols)
+
+
+class Track:
+    """单条轨迹"""
+
+    def __init__(self, track_id, box, score):
+        self.id = track_id
+        self.score = float(score)
+        measurement = _xyxy_to_cxcywh(box)
+        self.mean = np.r_[measurement, np.zeros(4)]
+        h = measurement[3]
+        std = [2 * _STD_POS * h, 2 * _STD_POS * h, 2 * _STD_POS * h, 2 * _STD_POS * h,
+               10 * _STD_VEL * h, 10 * _STD_VEL * h, 10 * _STD_VEL * h, 10 * _STD_VEL * h]
+        self.cov = np.diag(np.square(std))
+        self.hits = 1  # 被检测框更新的次数
+        self.time_since_update = 0  # 距上次被检测框更新经过的帧数
+        self.confirmed = False
+        self.tracked = True  # 最近一次 update 时是否匹配上了检测框
+
+        # 报警相关（由检测器维护）
+        self.zones = []  # 最近一次更新时所在的区域索引
+        self.alerted = False  # 该轨迹是否已触发过报警（同一个人只报一次）
+
+    @property
+    def box(self):
+        """当前（预测或更新后）的 xyxy 框"""
+        cx, cy, w, h = self.mean[:4]
+        return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], dtype=np.float32)
+
+    def predict(self):
+        h = self.mean[3]
+        std = [_STD_POS * h, _STD_POS * h, _STD_POS * h, _STD_POS * h,
+               _STD_VEL * h, _STD_VEL * h, _STD_VEL * h, _STD_VEL * h]
+        self.mean = _F @ self.mean
+        self.cov = _F @ self.cov @ _F.T + np.diag(np.square(std))
+        self.time_since_update += 1
+
+    def update(self, box, score):
+        measurement = _xyxy_to_cxcywh(box)
+        h = self.mean[3]
+        r = np.diag(np.square([_STD_POS * h] * 4))
+        s = _H @ self.cov @ _H.T + r
+        gain = self.cov @ _H.T @ np.linalg.inv(s)
+        self.mean = self.mean + gain @ (measurement - _H @ self.mean)
+        self.cov = self.cov - gain @ _H @ self.cov
+        self.score = float(score)
+        self.hits += 1
+        self.time_since_update = 0
+
+
+class ByteTracker:
+    """
+    Args:
+        high_thresh: 高分检测框阈值，只有高分框能新建轨迹
+        low_thresh: 低分检测框阈值，低分框只用于延续已有轨迹（遮挡、模糊时）
+        match_iou: 高分框与轨迹匹配的最小IoU
+        low_match_iou: 低分框与轨迹匹配的最小IoU
+        max_lost_frames: 轨迹连续多少帧没有被更新后删除
+        min_hits: 新轨迹被更新多少次后确认
+    """
+
+    def __init__(self, high_thresh=0.8, low_thresh=0.3, match_iou=0.2, low_match_iou=0.5,
+                 max_lost_frames=75, min_hits=2):
+        self.high_thresh = high_thresh
+        self.low_thresh = low_thresh
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.max_lost_frames = max_lost_frames
+        self.min_hits = min_hits
+        self.tracks = []
+        self._next_id = 1
+
+    def reset(self):
+        self.tracks = []
+
+    def predict(self):
+        """推进一帧：所有轨迹按速度外推，过期的轨迹删除"""
+        for track in self.tracks:
+            track.predict()
+        self.tracks = [t for t in self.tracks if t.time_since_update <= self.max_lost_frames]
+
+    def update(self, detections):
+        """
+        用当前帧的检测结果更新轨迹（调用前应已对本帧 predict()）
+        Args:
+            detections: (N, 5) 数组 [x1, y1, x2, y2, score]
+        Returns:
+            list: 本帧被检测框更新的已确认轨迹
+        """
+        dets = np.asarray(detections, dtype=np.float32).reshape(-1, 5)
+        high = dets[dets[:, 4] >= self.high_thresh]
+        low = dets[(dets[:, 4] >= self.low_thresh) & (dets[:, 4] < self.high_thresh)]
+
+        # 第一轮：高分框 vs 全部轨迹
+        track_boxes = [t.box for t in self.tracks]
+        matches, unmatched_tracks, unmatched_high = greedy_match(iou_matrix(track_boxes, high), self.match_iou)
+        for ti, di in matches:
+            self.tracks[ti].update(high[di], high[di, 4])
+
+        # 第二轮：低分框 vs 第一轮未匹配、且上一次推理时还在跟踪的轨迹
+        remaining = [ti for ti in unmatched_tracks if self.tracks[ti].tracked]
+        matches, _, _ = greedy_match(iou_matrix([self.tracks[ti].box for ti in remaining], low), self.low_match_iou)
+        for ri, di in matches:
+            self.tracks[remaining[ri]].update(low[di], low[di, 4])
+
+        # 未匹配的高分框新建轨迹
+        for di in unmatched_high:
+            self.tracks.append(Track(self._next_id, high[di], high[di, 4]))
+            self._next_id += 1
+
+        updated = []
+        for track in self.tracks:
+            track.tracked = track.time_since_update == 0
+            if track.hits >= self.min_hits:
+                track.confirmed = True
+            if track.confirmed and track.time_since_update == 0:
+                updated.append(track)
+        return updated
+
+    def active_tracks(self):
+        """已确认且最近一次推理时仍匹配上的轨迹（跳过的帧上为预测位置）"""
+        return [t for t in self.tracks if t.confirmed and t.tracked]
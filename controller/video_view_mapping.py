@@ -1,14 +1,9 @@
 """
 存储视频/监控与视角的对应关系
+对应关系配置在 area/views.json（见 view_registry.py），新增摄像头/视角只需修改配置文件
 """
 
-import re
-import os
-
-# 定义视频名称与视角的映射关系，使用列表存储不同视角对应的关键字
-# 这样后续只需要在列表中添加新的关键字即可
-VIEW_1_KEYWORDS = ['20250829_1', '20250820_1']
-VIEW_2_KEYWORDS = ['20250829_2', '20250820_2']
+from controller.view_registry import get_registry
 
 
 def get_view_for_video(video_path):
@@ -17,40 +12,11 @@ def get_view_for_video(video_path):
     Args:
         video_path: 视频文件路径或RTSP地址
     Returns:
-        int: 视角索引 (0表示视角1, 1表示视角2)
+        int: 视角索引 (0表示视角1, 1表示视角2, ...)，无法匹配时为配置的默认视角
     """
-    video_name = os.path.basename(video_path)
-    
-    # RTSP地址处理
-    if video_path.lower().startswith("rtsp://"):
-        # 提取IP地址的最后一段数字
-        ip_match = re.search(r'\b(?:\d{1,3}\.){3}(\d{1,3})\b', video_path)
-        if ip_match:
-            last_octet = ip_match.group(1)
-            # 104对应视角1, 102对应视角2
-            if last_octet == "104":
-                return 0
-            elif last_octet == "102":
-                return 1
-        # 默认视角1
-        return 0
-    
-    # 本地文件处理 - 使用列表方式判断
-    # 检查视频名称是否包含视角1的关键字
-    for keyword in VIEW_1_KEYWORDS:
-        if keyword in video_name:
-            return 0
-    # 检查视频名称是否包含视角2的关键字
-    for keyword in VIEW_2_KEYWORDS:
-        if keyword in video_name:
-            return 1
-    
-    # 默认视角1
-    return 0
+    return get_registry().resolve(video_path)
+
 
 def get_view_name(view_index):
     """获取视角名称"""
-    view_names = ["视角1", "视角2"]
-    if 0 <= view_index < len(view_names):
-        return view_names[view_index]
-    return "未知视角"
\ No newline at end of file
+    return get_registry().view_name(view_index)
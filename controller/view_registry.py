@@ -0,0 +1,133 @@
+"""
+视角注册表：视频源 -> 视角 -> 区域文件
+配置文件 area/views.json（新增摄像头/视角只需修改配置，不用改代码）：
+{
+  "default_view": 0,
+  "views": [
+    {
+      "name": "视角1",
+      "area_file": "0911_1_frame00000.xml",   # 相对配置文件所在目录
+      "keywords": ["20250829_1"],             # 本地视频文件名包含的关键字
+      "patterns": ["^cam_a_\\d+"],            # 可选，文件名正则
+      "hosts": ["192.168.1.104"],             # 实时流地址的主机（精确匹配）
+      "last_octets": ["104"]                  # 实时流IP的最后一段（兼容原来的判断方式）
+    }
+  ]
+}
+加载时建立哈希索引（主机、IP最后一段）并把所有关键字/正则预编译成一个正则，
+按视频源查找视角不随摄像头数量增长。
+"""
+
+import json
+import os
+import re
+from urllib.parse import urlsplit
+
+VIEWS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "area", "views.json")
+STREAM_SCHEMES = ("rtsp", "rtsps", "http", "https")
+
+_IPV4 = re.compile(r'^(?:\d{1,3}\.){3}(\d{1,3})$')
+
+
+class ViewRegistry:
+    """
+    Args:
+        views: [{"name", "area_file", "keywords", "patterns", "hosts", "last_octets"}, ...]，列表下标即视角索引
+        default_view: 无法匹配时使用的视角索引
+        base_dir: area_file 为相对路径时的基准目录
+    """
+
+    def __init__(self, views, default_view=0, base_dir=None):
+        self.views = list(views)
+        self.default_view = default_view
+        self.names = [v.get("name", f"视角{i + 1}") for i, v in enumerate(self.views)]
+        self.area_paths = []
+        self._hosts = {}
+        self._octets = {}
+        alternatives = []
+        self._group_views = {}  # 正则中每个关键字/正则外层分组的编号 -> 视角索引
+        group = 1
+        for index, view in enumerate(self.views):
+            area_file = view.get("area_file", "")
+            if base_dir and area_file and not os.path.isabs(area_file):
+                area_file = os.path.join(base_dir, area_file)
+            self.area_paths.append(area_file)
+            for host in view.get("hosts", []):
+                self._hosts.setdefault(host.lower(), index)
+            for octet in view.get("last_octets", []):
+                self._octets.setdefault(str(octet), index)
+            for keyword in view.get("keywords", []):
+                alternatives.append(re.escape(keyword))
+                self._group_views[group] = index
+                group += 1
+            for pattern in view.get("patterns", []):
+                inner_groups = re.compile(pattern).groups  # 配置错误时在加载阶段报错
+                alternatives.append(pattern)
+                self._group_views[group] = index
+                group += 1 + inner_groups
+        # 每个关键字/正则一个外层分组，外层分组最后闭合，匹配后 lastindex 即外层分组编号
+        self._name_regex = re.compile("|".join(f"({a})" for a in alternatives)) if alternatives else None
+
+    @classmethod
+    def from_file(cls, path=VIEWS_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("views", []), data.get("default_view", 0), os.path.dirname(os.path.abspath(path)))
+
+    def __len__(self):
+        return len(self.views)
+
+    def resolve(self, video_path):
+        """
+        根据视频路径确定对应的视角
+        Args:
+            video_path: 视频文件路径或实时流地址
+        Returns:
+            int: 视角索引
+        """
+        parts = urlsplit(video_path) if "://" in video_path else None
+        if parts is not None and parts.scheme.lower() in STREAM_SCHEMES:
+            host = (parts.hostname or "").lower()
+            if host in self._hosts:
+                return self._hosts[host]
+            ip_match = _IPV4.match(host)
+            if ip_match and ip_match.group(1) in self._octets:
+                return self._octets[ip_match.group(1)]
+            name = parts.path
+        else:
+            # 兼容Windows路径
+            name = os.path.basename(video_path.replace("\\", "/"))
+
+        if self._name_regex is not None:
+            match = self._name_regex.search(name)
+            if match:
+                return self._group_views[match.lastindex]
+        return self.default_view
+
+    def view_name(self, view_index):
+        if 0 <= view_index < len(self.names):
+            return self.names[view_index]
+        return "未知视角"
+
+    def area_path(self, view_index):
+        if 0 <= view_index < len(self.area_paths):
+            return self.area_paths[view_index]
+        return None
+
+
+_registry = None
+
+
+def get_registry():
+    """进程内共享的注册表（首次使用时从配置文件加载）"""
+    global _registry
+    if _registry is None:
+        _registry = ViewRegistry.from_file(VIEWS_FILE)
+    return _registry
+
+
+def reload_registry(path=VIEWS_FILE):
+    """修改配置文件后重新加载（已运行的检测线程不受影响）"""
+    global _registry
+    _registry = ViewRegistry.from_file(path)
+    return _registry
@@ -0,0 +1,209 @@
+"""
+检测区域（危险区域）的加载、缩放和包含判断
+支持的标注格式：
+- VOC XML（labelImg）：<annotation><object><name>area</name><bndbox>...   矩形
+- CVAT XML（images 1.1）：<annotations><image width height><polygon label="area" points="x,y;x,y"/>   多边形/矩形
+- LabelMe JSON：{"imageWidth", "imageHeight", "shapes": [{"label": "area", "shape_type": "polygon", "points"}]}
+多边形区域按视频分辨率光栅化一次并生成积分图，"框完全在区域内"只需查4个值，与多边形复杂度无关
+区域数量多时（密集工位，一个视角50~100个区域）用网格索引只检查候选区域，每个框的耗时与区域数量无关
+"""
+
+import json
+import os
+import xml.etree.ElementTree as ET
+
+import cv2
+import numpy as np
+
+AREA_LABEL = 'area'
+
+
+def resolve_zone_file(path):
+    """VOC XML 旁边如果有同名的 LabelMe JSON（多边形），优先使用 JSON"""
+    stem, ext = os.path.splitext(path)
+    if ext.lower() == ".xml" and os.path.exists(stem + ".json"):
+        return stem + ".json"
+    return path
+
+
+def load_zone_file(path):
+    """
+    读取标注文件中的area区域（原始坐标）
+    Returns:
+        tuple: (标注宽, 标注高, [(点集 (N, 2) float32, 是否为矩形), ...])，宽高未知时为 None
+    """
+    if path.lower().endswith(".json"):
+        return _load_labelme(path)
+    root = ET.parse(path).getroot()
+    if root.tag == "annotations":
+        return _load_cvat(root)
+    return _load_voc(root)
+
+
+def _rect_points(x1, y1, x2, y2):
+    return np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.float32)
+
+
+def _load_voc(root):
+    size_node = root.find("size")
+    src_w = int(size_node.find("width").text) if size_node is not None and size_node.find("width") is not None else None
+    src_h = int(size_node.find("height").text) if size_node is not None and size_node.find("height") is not None else None
+    zones = []
+    for obj in root.findall('object'):
+        if obj.find('name').text == AREA_LABEL:  # 只加载类别为area的区域
+            bndbox = obj.find('bndbox')
+            xmin = int(float(bndbox.find('xmin').text))
+            ymin = int(float(bndbox.find('ymin').text))
+            xmax = int(float(bndbox.find('xmax').text))
+            ymax = int(float(bndbox.find('ymax').text))
+            zones.append((_rect_points(xmin, ymin, xmax, ymax), True))
+    return src_w, src_h, zones
+
+
+def _load_cvat(root):
+    image = root.find("image")
+    if image is None:
+        return None, None, []
+    src_w = int(float(image.get("width"))) if image.get("width") else None
+    src_h = int(float(image.get("height"))) if image.get("height") else None
+    zones = []
+    for node in image:
+        if node.get("label") != AREA_LABEL:
+            continue
+        if node.tag == "polygon":
+            points = [[float(v) for v in p.split(",")] for p in node.get("points").split(";")]
+            zones.append((np.array(points, dtype=np.float32), False))
+        elif node.tag == "box":
+            zones.append((_rect_points(*(float(node.get(k)) for k in ("xtl", "ytl", "xbr", "ybr"))), True))
+    return src_w, src_h, zones
+
+
+def _load_labelme(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    zones = []
+    for shape in data.get("shapes", []):
+        if shape.get("label") != AREA_LABEL:
+            continue
+        points = np.array(shape["points"], dtype=np.float32)
+        if shape.get("shape_type") == "rectangle":
+            (x1, y1), (x2, y2) = points.min(axis=0), points.max(axis=0)
+            zones.append((_rect_points(x1, y1, x2, y2), True))
+        elif len(points) >= 3:
+            zones.append((points, False))
+    return data.get("imageWidth"), data.get("imageHeight"), zones
+
+
+class ZoneGridIndex:
+    """
+    区域外接矩形的网格索引（缩放后的区域集合构建一次）
+    画面按 cell_size 划分网格，每个格子记录外接矩形覆盖它的区域。
+    框完全在区域内时，框的左上角必然在区域外接矩形内，所以只需取左上角所在格子的候选区域
+    """
+
+    def __init__(self, bboxes, frame_size, cell_size=64):
+        self.cell_size = cell_size
+        tw, th = frame_size
+        self.cols = max(1, -(-int(tw) // cell_size))
+        self.rows = max(1, -(-int(th) // cell_size))
+        cells = [[] for _ in range(self.rows * self.cols)]
+        for idx, (x1, y1, x2, y2) in enumerate(bboxes):
+            c1, r1 = self._cell(x1, y1)
+            c2, r2 = self._cell(x2, y2)
+            for r in range(r1, r2 + 1):
+                for c in range(c1, c2 + 1):
+                    cells[r * self.cols + c].append(idx)
+        self._cells = [tuple(c) for c in cells]
+
+    def _cell(self, x, y):
+        c = min(max(int(x) // self.cell_size, 0), self.cols - 1)
+        r = min(max(int(y) // self.cell_size, 0), self.rows - 1)
+        return c, r
+
+    def candidates(self, box):
+        """可能完全包含 box 的区域索引（升序）"""
+        c, r = self._cell(box[0], box[1])
+        return self._cells[r * self.cols + c]
+
+
+class ZoneSet:
+    """
+    缩放到某一分辨率后的区域集合
+    - bboxes: 每个区域的外接矩形 [[x1, y1, x2, y2], ...]（矩形区域即其本身）
+    - 矩形区域直接比较坐标；多边形区域在外接矩形范围内光栅化并保存积分图
+    """
+
+    def __init__(self, zones, src_size, frame_size):
+        tw, th = frame_size
+        src_w, src_h = src_size
+        sx = tw / src_w if src_w else 1.0
+        sy = th / src_h if src_h else 1.0
+
+        self.width, self.height = tw, th
+        self.bboxes = []
+        self.polygons = []  # 缩放后的多边形点集（int32），矩形区域为 None
+        self._integrals = []  # 多边形区域外接矩形内的积分图，矩形区域为 None
+        for points, is_rect in zones:
+            scaled = np.round(points * [sx, sy]).astype(np.int32)
+            # 裁剪到图像范围
+            scaled[:, 0] = np.clip(scaled[:, 0], 0, tw - 1)
+            scaled[:, 1] = np.clip(scaled[:, 1], 0, th - 1)
+            x1, y1 = scaled.min(axis=0).tolist()
+            x2, y2 = scaled.max(axis=0).tolist()
+            self.bboxes.append([x1, y1, x2, y2])
+            if is_rect:
+                self.polygons.append(None)
+                self._integrals.append(None)
+            else:
+                mask = np.zeros((y2 - y1 + 1, x2 - x1 + 1), dtype=np.uint8)
+                cv2.fillPoly(mask, [scaled - [x1, y1]], 1)
+                self.polygons.append(scaled)
+                self._integrals.append(cv2.integral(mask))
+        self.index = ZoneGridIndex(self.bboxes, (tw, th))
+
+    def __len__(self):
+        return len(self.bboxes)
+
+    def contains(self, zone_idx, box):
+        """box（xyxy）是否完全在区域内"""
+        x1, y1, x2, y2 = self.bboxes[zone_idx]
+        bx1, by1, bx2, by2 = box[:4]
+        if not ((bx1 >= x1) and (by1 >= y1) and (bx2 <= x2) and (by2 <= y2)):
+            return False
+        integral = self._integrals[zone_idx]
+        if integral is None:
+            return True
+        # 框覆盖的像素（相对外接矩形左上角）全部在多边形内
+        px1, py1 = int(bx1) - x1, int(by1) - y1
+        px2, py2 = min(int(np.ceil(bx2)), x2) - x1 + 1, min(int(np.ceil(by2)), y2) - y1 + 1
+        inside = (int(integral[py2, px2]) - int(integral[py1, px2])
+                  - int(integral[py2, px1]) + int(integral[py1, px1]))
+        return inside == (px2 - px1) * (py2 - py1)
+
+    def zones_containing(self, box):
+        """完全包含box的所有区域索引（升序）"""
+        return [i for i in self.index.candidates(box) if self.contains(i, box)]
+
+    def draw(self, frame, color=(0, 255, 255), thickness=2):
+        """在帧上绘制区域（矩形/多边形）"""
+        for bbox, polygon in zip(self.bboxes, self.polygons):
+            x1, y1, x2, y2 = bbox
+            if polygon is None:
+                cv2.rectangle(frame, (x1, y1), (x2, y2), color, thickness)
+            else:
+                cv2.polylines(frame, [polygon], True, color, thickness)
+            cv2.putText(frame, "area", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+
+def load_zone_set(path, frame_size):
+    """
+    加载区域文件并缩放到视频分辨率
+    Args:
+        path: VOC/CVAT XML 或 LabelMe JSON 路径（VOC XML 旁有同名JSON时使用JSON）
+        frame_size: (宽, 高)
+    Returns:
+        tuple: (ZoneSet, 实际使用的文件路径, 标注尺寸 (宽, 高))
+    """
+    path = resolve_zone_file(path)
+    src_w, src_h, zones = load_zone_file(path)
+    return ZoneSet(zones, (src_w, src_h), frame_size), path, (src_w, src_h)
@@ -23,7 +23,11 @@ if __name__ == "__main__":
         controller = MainController(window)
         # 将控制器设置到窗口
         window.controller = controller
+        # 退出前停止检测线程并把日志写完
+        app.aboutToQuit.connect(controller.cleanup)
         window.show()
+        # 窗口显示后再在后台加载cv2/torch/ultralytics
+        controller.start_preload()
         sys.exit(app.exec())
     except Exception as e:
         print(f"主程序异常: {str(e)}")
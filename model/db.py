@@ -21,6 +21,7 @@ class VideoSource:
     scene_id: int
     type: int  # 1:本地文件, 2:RTSP, 3:摄像头
     alert_email: str = None  # 新增：报警邮箱
+    imgsz: int = None  # 推理分辨率（None为默认640），近景摄像头可用416，广角需要960
 
 class Database:
     def __init__(self, db_name: str = "monitor.db"):
@@ -59,6 +60,11 @@ class Database:
             )
             ''')
 
+        # 旧数据库升级：视频源表增加推理分辨率字段
+        cursor.execute("PRAGMA table_info(video)")
+        if "imgsz" not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE video ADD COLUMN imgsz INTEGER")
+
         self.conn.commit()
 
     # 场景相关操作
@@ -91,7 +97,7 @@ class Database:
         """获取指定场景下的所有视频源"""
         cursor = self.conn.cursor()
         cursor.execute("""
-        SELECT id, name, path, isTrue, scene_id, type ,is_valid ,alert_email
+        SELECT id, name, path, isTrue, scene_id, type ,is_valid ,alert_email, imgsz
         FROM video 
         WHERE scene_id = ?
         """, (scene_id,))
@@ -104,7 +110,8 @@ class Database:
             scene_id=row[4],
             type=row[5],
             is_valid = row[6] == 1 , # 新增：读取有效性标记
-            alert_email=row[7]
+            alert_email=row[7],
+            imgsz=row[8]
         ) for row in cursor.fetchall()]
         return videos
 
@@ -112,10 +119,10 @@ class Database:
         """添加视频源"""
         cursor = self.conn.cursor()
         cursor.execute("""
-        INSERT INTO video (name, path, isTrue, scene_id, type, is_valid, alert_email) 
-        VALUES (?, ?, ?, ?, ?,?,?)
+        INSERT INTO video (name, path, isTrue, scene_id, type, is_valid, alert_email, imgsz) 
+        VALUES (?, ?, ?, ?, ?,?,?,?)
         """, (video.name, video.path, 1 if video.is_true else 0,
-              video.scene_id, video.type,1 ,video.alert_email)) # 直接设置为1，不再测试
+              video.scene_id, video.type,1 ,video.alert_email, video.imgsz)) # 直接设置为1，不再测试
         self.conn.commit()
         return cursor.lastrowid
 
@@ -124,10 +131,10 @@ class Database:
         cursor = self.conn.cursor()
         cursor.execute("""
         UPDATE video 
-        SET name = ?, path = ?, isTrue = ?, scene_id = ?, type = ?, is_valid = ?, alert_email = ?
+        SET name = ?, path = ?, isTrue = ?, scene_id = ?, type = ?, is_valid = ?, alert_email = ?, imgsz = ?
         WHERE id = ?
         """, (video.name, video.path, 1 if video.is_true else 0,
-              video.scene_id, video.type,  1, video.alert_email, video.id))
+              video.scene_id, video.type,  1, video.alert_email, video.imgsz, video.id))
         self.conn.commit()
         return cursor.rowcount > 0
 
@@ -154,7 +161,7 @@ class Database:
         try:
             cursor = self.conn.cursor()
             cursor.execute("""
-                   SELECT id, name, path, isTrue,is_valid, scene_id, type ,alert_email
+                   SELECT id, name, path, isTrue,is_valid, scene_id, type ,alert_email, imgsz
                    FROM video 
                    WHERE id=?
                    AND scene_id = ?
@@ -169,7 +176,8 @@ class Database:
                     is_valid=row[4] == 1,
                     scene_id=row[5],
                     type=row[6],
-                    alert_email=row[7]
+                    alert_email=row[7],
+                    imgsz=row[8]
                 )
             return None
         except Exception as e:
@@ -0,0 +1,152 @@
+# model/quantize.py
+"""
+生成量化模型变体（CPU推理提速）
+- int8: 导出ONNX后做静态量化，用现场录像抽帧校准（QDQ格式，权重按通道量化）
+- fp16: 导出ONNX后转半精度（输入输出保持float32）；GPU上不需要该文件，直接用best.pt半精度推理
+
+用法：
+    python -m model.quantize --variant int8 --videos D:\\videos\\20250829_1.mp4 D:\\videos\\20250829_2.mp4
+    python -m model.quantize --variant fp16
+生成的文件与 best.pt 同目录（best_int8.onnx / best_fp16.onnx），
+检测时设置环境变量 GLOVE_MODEL_VARIANT=int8 使用。
+依赖：ultralytics、onnx、onnxruntime（int8），onnxconverter-common（fp16）
+"""
+
+import argparse
+import os
+import re
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.letterbox import Letterbox
+from controller.model_loader import variant_path
+
+DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "best.pt")
+
+
+def letterbox(frame, imgsz):
+    """与检测时一致的固定尺寸预处理，返回 (1, 3, imgsz, imgsz) float32"""
+    return Letterbox(imgsz, auto=False)(frame).copy()
+
+
+def sample_frames(videos, n_frames):
+    """从各个视频中均匀抽取共 n_frames 帧"""
+    per_video = max(1, n_frames // max(1, len(videos)))
+    for path in videos:
+        cap = cv2.VideoCapture(path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total <= 0:
+            print(f"无法读取视频: {path}")
+            cap.release()
+            continue
+        for pos in np.linspace(0, total - 1, per_video).astype(int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(pos))
+            ret, frame = cap.read()
+            if ret:
+                yield frame
+        cap.release()
+
+
+def export_onnx(model_path, imgsz):
+    """导出固定输入尺寸的ONNX（ultralytics会把names、imgsz等写入元数据）"""
+    from ultralytics import YOLO
+    return YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True)
+
+
+def _copy_metadata(src_path, dst_path):
+    """量化/转换后的模型保留原ONNX的元数据（ultralytics加载时需要类别名称等）"""
+    import onnx
+    src = onnx.load(src_path, load_external_data=False)
+    dst = onnx.load(dst_path)
+    del dst.metadata_props[:]
+    dst.metadata_props.extend(src.metadata_props)
+    onnx.save(dst, dst_path)
+
+
+def _head_nodes(onnx_path):
+    """检测头（最后一个 /model.N/ 模块）的节点名称，量化时保留浮点精度，减少框坐标误差"""
+    import onnx
+    nodes = onnx.load(onnx_path, load_external_data=False).graph.node
+    indices = [int(m.group(1)) for m in (re.match(r"^/model\.(\d+)/", n.name) for n in nodes) if m]
+    if not indices:
+        return []
+    prefix = f"/model.{max(indices)}/"
+    return [n.name for n in nodes if n.name.startswith(prefix)]
+
+
+def quantize_int8(onnx_path, output_path, videos, imgsz, n_frames=200, exclude_head=True):
+    from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType,
+                                          quantize_static)
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    class VideoCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self._frames = sample_frames(videos, n_frames)
+            self.count = 0
+
+        def get_next(self):
+            frame = next(self._frames, None)
+            if frame is None:
+                return None
+            self.count += 1
+            return {"images": letterbox(frame, imgsz)}
+
+    prep_path = os.path.splitext(output_path)[0] + "_prep.onnx"
+    quant_pre_process(onnx_path, prep_path)
+    reader = VideoCalibrationReader()
+    try:
+        quantize_static(prep_path, output_path, reader,
+                        quant_format=QuantFormat.QDQ,
+                        per_channel=True,
+                        activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8,
+                        calibrate_method=CalibrationMethod.MinMax,
+                        nodes_to_exclude=_head_nodes(prep_path) if exclude_head else [])
+    finally:
+        if os.path.exists(prep_path):
+            os.remove(prep_path)
+    if reader.count == 0:
+        raise RuntimeError("没有读取到校准帧，请检查 --videos")
+    _copy_metadata(onnx_path, output_path)
+    print(f"校准帧数: {reader.count}")
+    return output_path
+
+
+def convert_fp16(onnx_path, output_path):
+    import onnx
+    from onnxconverter_common import float16
+    model = float16.convert_float_to_float16(onnx.load(onnx_path), keep_io_types=True)
+    onnx.save(model, output_path)
+    _copy_metadata(onnx_path, output_path)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成量化模型变体')
+    parser.add_argument('--model', type=str, default=DEFAULT_MODEL, help='fp32 权重路径')
+    parser.add_argument('--variant', type=str, choices=["int8", "fp16"], default="int8", help='生成的变体')
+    parser.add_argument('--videos', type=str, nargs='*', default=[], help='校准用的现场录像(int8必填)')
+    parser.add_argument('--imgsz', type=int, default=640, help='模型输入尺寸')
+    parser.add_argument('--calib_frames', type=int, default=200, help='校准帧数')
+    parser.add_argument('--quantize_head', action='store_true', help='检测头也量化（默认保留浮点）')
+    args = parser.parse_args()
+
+    if args.variant == "int8" and not args.videos:
+        parser.error("int8 量化需要 --videos 指定校准视频")
+
+    onnx_path = export_onnx(args.model, args.imgsz)
+    output_path = variant_path(args.model, args.variant)
+    if args.variant == "int8":
+        quantize_int8(onnx_path, output_path, args.videos, args.imgsz, args.calib_frames,
+                      exclude_head=not args.quantize_head)
+    else:
+        convert_fp16(onnx_path, output_path)
+    print(f"已生成: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,9 @@
-import cv2
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                              QLineEdit, QPushButton, QRadioButton, QGroupBox,
                              QFileDialog, QComboBox, QMessageBox)
 
+IMGSZ_OPTIONS = [320, 416, 512, 640, 768, 960, 1280]  # 可选的推理分辨率（32的倍数）
+
 class VideoSourceDialog(QDialog):
     """添加/编辑视频源对话框"""
 
@@ -78,7 +79,17 @@ class VideoSourceDialog(QDialog):
         email_layout.addWidget(self.email_combo)
         main_layout.addLayout(email_layout)
 
-        # 5. 底部按钮
+        # 5. 推理分辨率（近景摄像头可降低，广角摄像头需要提高）
+        imgsz_layout = QHBoxLayout()
+        imgsz_layout.addWidget(QLabel("推理分辨率:"))
+        self.imgsz_combo = QComboBox()
+        self.imgsz_combo.addItem("默认 (640)", None)
+        for size in IMGSZ_OPTIONS:
+            self.imgsz_combo.addItem(str(size), size)
+        imgsz_layout.addWidget(self.imgsz_combo)
+        main_layout.addLayout(imgsz_layout)
+
+        # 6. 底部按钮
         btn_layout = QHBoxLayout()
         self.ok_btn = QPushButton("确定")
         self.cancel_btn = QPushButton("取消")
@@ -118,6 +129,13 @@ class VideoSourceDialog(QDialog):
                 # 如果邮箱不在选项中，添加并选择
                 self.email_combo.addItem(f"自定义: {self.video_info.alert_email}", self.video_info.alert_email)
                 self.email_combo.setCurrentIndex(self.email_combo.count() - 1)
+        # 推理分辨率
+        imgsz = getattr(self.video_info, 'imgsz', None)
+        index = 0 if imgsz is None else self.imgsz_combo.findData(imgsz)
+        if index < 0:
+            self.imgsz_combo.addItem(str(imgsz), imgsz)
+            index = self.imgsz_combo.count() - 1
+        self.imgsz_combo.setCurrentIndex(index)
 
     """视频类型切换处理"""
     def on_type_changed(self, type_id):
@@ -152,6 +170,8 @@ class VideoSourceDialog(QDialog):
 
     """选择摄像头设备"""
     def _select_camera(self):
+        import cv2  # 只有选择摄像头时才需要，不在启动时导入
+
         available_cameras = []
         # 检测前10个设备ID
         for i in range(10):
@@ -212,7 +232,8 @@ class VideoSourceDialog(QDialog):
             "scene_id": self.scene_id,
             "is_true": False,
             "is_valid": True,
-            "alert_email": self.get_selected_email()  # 新增邮箱信息
+            "alert_email": self.get_selected_email(),  # 新增邮箱信息
+            "imgsz": self.imgsz_combo.currentData()
         }
 
 
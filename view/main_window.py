@@ -1,7 +1,8 @@
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QPixmap
-from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel
+from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QHeaderView
 
+from controller.tracing import TRACER
 from .main_ui import Ui_MainWindow
 
 
@@ -33,6 +34,9 @@ class MainWindow(QMainWindow):
         # 初始化视频显示标签页
         self.init_video_tabs()
 
+        # 运行统计表（放在日志框下方）
+        self.init_stats_table()
+
         # 连接控制器的信号到UI更新函数
         # 仅在控制器存在时连接信号
         # if self.controller:
@@ -46,6 +50,41 @@ class MainWindow(QMainWindow):
         self.video_display.setTabsClosable(True)  # 允许关闭标签页
         self.video_display.tabCloseRequested.connect(self.on_video_tab_closed)
 
+    # 统计表列: (表头, 指标名, 格式)
+    STATS_COLUMNS = [
+        ("采集FPS", "glove_capture_fps", "{:.1f}"),
+        ("解码(ms)", "glove_decode_seconds", "{:.1f}"),
+        ("推理(ms)", "glove_inference_seconds", "{:.1f}"),
+        ("后处理(ms)", "glove_postprocess_seconds", "{:.1f}"),
+        ("绘制(ms)", "glove_draw_seconds", "{:.1f}"),
+        ("队列", "glove_frame_queue_depth", "{}"),
+        ("丢帧", "glove_frames_dropped_total", "{}"),
+        ("显示丢弃", "glove_display_dropped_total", "{}"),
+        ("重连", "glove_reconnects_total", "{}"),
+        ("报警", "glove_alerts_total", "{}"),
+        ("风险", "glove_stream_risk", "{}"),
+    ]
+
+    def init_stats_table(self):
+        """初始化运行统计表"""
+        self.stats_table = QTableWidget(0, len(self.STATS_COLUMNS) + 1, parent=self.ui.centralwidget)
+        self.stats_table.setHorizontalHeaderLabels(["视频源"] + [c[0] for c in self.STATS_COLUMNS])
+        self.stats_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.stats_table.verticalHeader().setVisible(False)
+        self.stats_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.stats_table.setMaximumHeight(150)
+        self.ui.verticalLayout.addWidget(self.stats_table)
+
+    def update_stats_table(self, rows):
+        """更新运行统计表，rows: [(视频源名称, {指标名: 值}), ...]"""
+        self.stats_table.setRowCount(len(rows))
+        for r, (name, values) in enumerate(rows):
+            self.stats_table.setItem(r, 0, QTableWidgetItem(name))
+            for c, (_, key, fmt) in enumerate(self.STATS_COLUMNS, start=1):
+                value = values.get(key)
+                text = "-" if value is None else fmt.format(value)
+                self.stats_table.setItem(r, c, QTableWidgetItem(text))
+
     def add_video_tab(self, video_id, video_name):
         """添加新的视频标签页"""
         if video_id in self.video_tabs:
@@ -116,6 +155,23 @@ class MainWindow(QMainWindow):
         if video_id not in self.video_tabs:
             return
 
+        if TRACER.enabled:
+            self._traced_update_video_frame(video_id, qimage)
+        else:
+            self._paint_video_frame(video_id, qimage)
+
+    def _traced_update_video_frame(self, video_id, qimage):
+        """带追踪的画面更新：记录信号送达延迟和绘制耗时"""
+        seq_text = qimage.text("seq")
+        seq = int(seq_text) if seq_text.isdigit() else None
+        start = TRACER.now()
+        TRACER.flow("f", video_id, seq, start)
+        self._paint_video_frame(video_id, qimage)
+        emit_ns = qimage.text("emit_ns")
+        delivery_ms = round((start - int(emit_ns)) / 1e6, 3) if emit_ns else None
+        TRACER.record("gui_paint", start, TRACER.now(), video_id, seq, delivery_ms=delivery_ms)
+
+    def _paint_video_frame(self, video_id, qimage):
         label = self.video_tabs[video_id]['label']
         pixmap = QPixmap.fromImage(qimage)
 
@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('model/best.pt', 'model')],
+    datas=[('model/best.pt', 'model'), ('area', 'area')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},